@@ -1,10 +1,130 @@
 import json
+import os
 import re
 import math
-from collections import defaultdict, Counter
+import mmap
+import struct
+from collections import defaultdict, Counter, OrderedDict
+from collections.abc import Mapping, Set
 from typing import Dict, List, Tuple, Any
 import numpy as np
 from datetime import datetime
+from model_files import atomic_write, file_sha256
+
+# Binary model layout (little-endian):
+#   header:  magic, format version, reserved, JSON metadata length, vocabulary size,
+#            sha256 of the JSON model it was written with (zeros if none)
+#   body:    JSON metadata | padding to 8 bytes | int64 word counts (vocab x 2)
+#            | int64 word offsets (vocab + 1) | sorted UTF-8 vocabulary bytes
+# Words are looked up by binary search over the mapped string table, so
+# loading does no per-word work.
+BINARY_MAGIC = b'FBCM'
+BINARY_VERSION = 2
+BINARY_HEADER = struct.Struct('<4sHHIQ32s')
+NO_SOURCE = b'\0' * 32
+BINARY_LABELS = ['positive', 'needs_improvement']
+
+
+def binary_model_source(filepath: str):
+    """sha256 of the JSON model a binary model was written with (None if unknown or unreadable)"""
+    try:
+        with open(filepath, 'rb') as f:
+            header = f.read(BINARY_HEADER.size)
+        magic, version, _, _, _, source = BINARY_HEADER.unpack(header)
+    except (OSError, struct.error):
+        return None
+    if magic != BINARY_MAGIC or version != BINARY_VERSION or source == NO_SOURCE:
+        return None
+    return source.hex()
+
+
+def metadata_path(model_path: str) -> str:
+    """Path of the stats sidecar written next to a saved model"""
+    return os.path.splitext(model_path)[0] + '.meta.json'
+
+
+def read_model_metadata(model_path: str) -> Dict[str, Any]:
+    """
+    Read the stats sidecar for a saved model without loading the model.
+    
+    Returns None when the sidecar is missing or unreadable, or was written
+    for different model contents (its recorded sha256 does not match).
+    """
+    sidecar_path = metadata_path(model_path)
+    try:
+        with open(sidecar_path, 'r') as f:
+            metadata = json.load(f)
+        if metadata.pop('model_sha256', None) != file_sha256(model_path):
+            return None
+        return metadata
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _MappedVocabulary(Set):
+    """Read-only set view over the sorted string table of a memory-mapped model"""
+    
+    def __init__(self, buffer: mmap.mmap, offsets: memoryview, base: int):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._base = base
+    
+    def _word_bytes(self, index: int) -> bytes:
+        return self._buffer[self._base + self._offsets[index]:self._base + self._offsets[index + 1]]
+    
+    def index(self, word: str):
+        """Row of `word` in the count array, or None (binary search, UTF-8 byte order = code point order)"""
+        target = word.encode('utf-8')
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._word_bytes(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and self._word_bytes(low) == target:
+            return low
+        return None
+    
+    def __contains__(self, word) -> bool:
+        return isinstance(word, str) and self.index(word) is not None
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._word_bytes(index).decode('utf-8')
+    
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class _MappedWordCounts(Mapping):
+    """Read-only word -> count view over one column of a memory-mapped count array"""
+    
+    def __init__(self, vocabulary: _MappedVocabulary, counts: np.ndarray):
+        self._vocabulary = vocabulary
+        self._counts = counts
+    
+    def __getitem__(self, word: str) -> int:
+        index = self._vocabulary.index(word) if isinstance(word, str) else None
+        return 0 if index is None else int(self._counts[index])
+    
+    def __iter__(self):
+        return iter(self._vocabulary)
+    
+    def __len__(self) -> int:
+        return len(self._vocabulary)
+
+
+def _close_mapping(buffer):
+    """Close a model memory map once nothing exports views of it any more"""
+    if buffer is None:
+        return
+    try:
+        buffer.close()
+    except BufferError:
+        # A caller still holds a view; the map is closed when it is collected
+        pass
+
 
 class FeedbackBayesianClassifier:
     """
@@ -12,7 +132,7 @@ class FeedbackBayesianClassifier:
     Categorizes feedback into 'Positive' or 'Needs Improvement'
     """
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 1024):
         self.vocabulary = set()
         self.word_counts = {
             'positive': defaultdict(int),
@@ -27,8 +147,18 @@ class FeedbackBayesianClassifier:
             'needs_improvement': defaultdict(int)
         }
         self.class_counts = {'positive': 0, 'needs_improvement': 0}
+        self.word_totals = {'positive': 0, 'needs_improvement': 0}
         self.total_documents = 0
         self.is_trained = False
+        self._mapped_buffer = None
+        
+        # Prediction cache, invalidated whenever model_version changes
+        self.model_version = 0
+        self.cache_size = cache_size
+        self._prediction_cache = OrderedDict()
+        self._cache_version = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
         
         # Service categories
         self.service_categories = ['meal', 'activity', 'communication', 'staff', 'facility', 'safety']
@@ -94,11 +224,8 @@ class FeedbackBayesianClassifier:
             'category_features': category_features
         }
     
-    def train(self, training_data: List[Dict[str, Any]]):
-        """Train the Bayesian classifier"""
-        print("Training Bayesian Classifier...")
-        
-        # Initialize positive and negative word lists
+    def _init_sentiment_words(self):
+        """Initialize positive and negative word lists"""
         self.positive_words = {
             'excellent', 'great', 'wonderful', 'amazing', 'fantastic', 'good', 'love', 'happy',
             'satisfied', 'pleased', 'outstanding', 'perfect', 'brilliant', 'superb', 'marvelous',
@@ -112,38 +239,90 @@ class FeedbackBayesianClassifier:
             'slow', 'late', 'cold', 'tasteless', 'boring', 'unsafe', 'problem', 'issue', 'complaint',
             'unsatisfied', 'displeased', 'annoyed', 'upset', 'concerned', 'worried'
         }
+    
+    def add_example(self, item: Dict[str, Any]) -> bool:
+        """Update the count tables with one labelled feedback entry"""
+        feedback_text = item.get('feedback_text', '')
+        rating = item.get('rating', 0)
+        service_category = item.get('service_category', '')
+        label = item.get('label', '')
+        
+        if not label or label not in ['positive', 'needs_improvement']:
+            return False
+        
+        if self._mapped_buffer is not None:
+            self._unmap_counts()
+            
+        # Extract features
+        features = self.extract_features(feedback_text, rating, service_category)
+        
+        # Update vocabulary
+        self.vocabulary.update(features['words'])
+        
+        # Update word counts
+        for word in features['words']:
+            self.word_counts[label][word] += 1
+        self.word_totals[label] += len(features['words'])
+        
+        # Update category counts
+        self.category_counts[label][service_category.lower()] += 1
+        
+        # Update rating counts
+        self.rating_counts[label][str(rating)] += 1
+        
+        # Update class counts
+        self.class_counts[label] += 1
+        self.total_documents += 1
+        self.model_version += 1
+        return True
+    
+    def export_counts(self) -> Dict[str, Any]:
+        """Export the count tables as plain dicts (picklable, mergeable)"""
+        return {
+            'word_counts': {label: dict(counts) for label, counts in self.word_counts.items()},
+            'category_counts': {label: dict(counts) for label, counts in self.category_counts.items()},
+            'rating_counts': {label: dict(counts) for label, counts in self.rating_counts.items()},
+            'class_counts': dict(self.class_counts),
+            'total_documents': self.total_documents
+        }
+    
+    def merge_counts(self, counts: Dict[str, Any]):
+        """Add count tables produced by export_counts() into this classifier"""
+        if self._mapped_buffer is not None:
+            self._unmap_counts()
+        
+        for table_name in ['word_counts', 'category_counts', 'rating_counts']:
+            table = getattr(self, table_name)
+            for label, label_counts in counts[table_name].items():
+                target = table[label]
+                for key, count in label_counts.items():
+                    target[key] += count
+        
+        for label, label_counts in counts['word_counts'].items():
+            self.vocabulary.update(label_counts)
+            self.word_totals[label] += sum(label_counts.values())
+        
+        for label, count in counts['class_counts'].items():
+            self.class_counts[label] += count
+        self.total_documents += counts['total_documents']
+        self.model_version += 1
+    
+    def train(self, training_data: List[Dict[str, Any]]):
+        """Train the Bayesian classifier"""
+        print("Training Bayesian Classifier...")
+        
+        # Initialize positive and negative word lists
+        self._init_sentiment_words()
+        
+        if self._mapped_buffer is not None:
+            self._unmap_counts()
         
         # Process training data
         for item in training_data:
-            feedback_text = item.get('feedback_text', '')
-            rating = item.get('rating', 0)
-            service_category = item.get('service_category', '')
-            label = item.get('label', '')
-            
-            if not label or label not in ['positive', 'needs_improvement']:
-                continue
-                
-            # Extract features
-            features = self.extract_features(feedback_text, rating, service_category)
-            
-            # Update vocabulary
-            self.vocabulary.update(features['words'])
-            
-            # Update word counts
-            for word in features['words']:
-                self.word_counts[label][word] += 1
-            
-            # Update category counts
-            self.category_counts[label][service_category.lower()] += 1
-            
-            # Update rating counts
-            self.rating_counts[label][str(rating)] += 1
-            
-            # Update class counts
-            self.class_counts[label] += 1
-            self.total_documents += 1
+            self.add_example(item)
         
         self.is_trained = True
+        self.model_version += 1
         print(f"Training completed. Processed {self.total_documents} documents.")
         print(f"Vocabulary size: {len(self.vocabulary)}")
         print(f"Class distribution: {self.class_counts}")
@@ -151,7 +330,7 @@ class FeedbackBayesianClassifier:
     def calculate_word_probability(self, word: str, label: str, alpha: float = 1.0) -> float:
         """Calculate P(word|label) using Laplace smoothing"""
         word_count = self.word_counts[label][word]
-        total_words_in_class = sum(self.word_counts[label].values())
+        total_words_in_class = self.word_totals[label]
         vocabulary_size = len(self.vocabulary)
         
         return (word_count + alpha) / (total_words_in_class + alpha * vocabulary_size)
@@ -177,11 +356,81 @@ class FeedbackBayesianClassifier:
         
         return rating_count / total_docs_in_class
     
+    def word_log_ratio(self, word: str) -> float:
+        """log P(word|positive) - log P(word|needs_improvement); 0 for unknown words"""
+        if word not in self.vocabulary:
+            return 0.0
+        return (math.log(self.calculate_word_probability(word, 'positive')) -
+                math.log(self.calculate_word_probability(word, 'needs_improvement')))
+    
+    def context_log_ratio(self, rating: float, service_category: str) -> float:
+        """Prior, category and rating terms of the decision margin (zero probabilities are skipped, as in predict)"""
+        margin = (math.log(self.class_counts['positive'] / self.total_documents) -
+                  math.log(self.class_counts['needs_improvement'] / self.total_documents))
+        
+        for probability, value in [(self.calculate_category_probability, service_category),
+                                   (self.calculate_rating_probability, rating)]:
+            prob_positive = probability(value, 'positive')
+            prob_needs_improvement = probability(value, 'needs_improvement')
+            if prob_positive > 0:
+                margin += math.log(prob_positive)
+            if prob_needs_improvement > 0:
+                margin -= math.log(prob_needs_improvement)
+        
+        return margin
+    
+    def decision_margin(self, feedback_text: str, rating: float, service_category: str) -> float:
+        """Log-odds of 'positive' over 'needs_improvement'; predict() returns 'positive' when > 0"""
+        words = self.preprocess_text(feedback_text)
+        return self.context_log_ratio(rating, service_category) + sum(self.word_log_ratio(word) for word in words)
+    
     def predict(self, feedback_text: str, rating: float, service_category: str) -> Dict[str, Any]:
-        """Predict feedback category"""
+        """Predict feedback category, serving repeated requests from the LRU cache"""
         if not self.is_trained:
             raise ValueError("Classifier must be trained before making predictions")
         
+        if self.cache_size <= 0:
+            return self._predict_uncached(feedback_text, rating, service_category)
+        
+        if self._cache_version != self.model_version:
+            self._prediction_cache.clear()
+            self._cache_version = self.model_version
+        
+        key = (' '.join(self.preprocess_text(feedback_text)), str(rating), service_category)
+        cached = self._prediction_cache.get(key)
+        if cached is not None:
+            self._prediction_cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._copy_result(cached)
+        
+        self.cache_misses += 1
+        result = self._predict_uncached(feedback_text, rating, service_category)
+        self._prediction_cache[key] = self._copy_result(result)
+        if len(self._prediction_cache) > self.cache_size:
+            self._prediction_cache.popitem(last=False)
+        return result
+    
+    def cache_info(self) -> Dict[str, Any]:
+        """Return prediction cache counters"""
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self._prediction_cache),
+            'max_size': self.cache_size,
+            'model_version': self.model_version
+        }
+    
+    @staticmethod
+    def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a prediction result so callers cannot mutate cached entries"""
+        return {
+            **result,
+            'probabilities': dict(result['probabilities']),
+            'features_used': dict(result['features_used'])
+        }
+    
+    def _predict_uncached(self, feedback_text: str, rating: float, service_category: str) -> Dict[str, Any]:
+        """Compute the class probabilities for one feedback entry"""
         # Extract features
         features = self.extract_features(feedback_text, rating, service_category)
         words = features['words']
@@ -256,10 +505,14 @@ class FeedbackBayesianClassifier:
         }
     
     def save_model(self, filepath: str):
-        """Save the trained model to a file"""
+        """
+        Save the trained model to a JSON file, plus the binary model next to
+        it (same name, .bin) tagged with the JSON's sha256 so loaders can
+        tell a current binary from a stale one
+        """
         model_data = {
             'vocabulary': list(self.vocabulary),
-            'word_counts': dict(self.word_counts),
+            'word_counts': {label: dict(counts.items()) for label, counts in self.word_counts.items()},
             'category_counts': dict(self.category_counts),
             'rating_counts': dict(self.rating_counts),
             'class_counts': self.class_counts,
@@ -272,11 +525,31 @@ class FeedbackBayesianClassifier:
             'saved_at': datetime.now().isoformat()
         }
         
-        with open(filepath, 'w') as f:
+        with atomic_write(filepath, 'w') as f:
             json.dump(model_data, f, indent=2)
+        self.save_metadata(filepath)
+        self.save_binary_model(os.path.splitext(filepath)[0] + '.bin', source_path=filepath, metadata=False)
         
         print(f"Model saved to {filepath}")
     
+    def model_summary(self) -> Dict[str, Any]:
+        """Summary statistics reported by the stats endpoint"""
+        return {
+            'vocabulary_size': len(self.vocabulary),
+            'total_documents': self.total_documents,
+            'class_distribution': dict(self.class_counts),
+            'is_trained': self.is_trained,
+            'service_categories': self.service_categories,
+            'positive_words_count': len(self.positive_words),
+            'negative_words_count': len(self.negative_words)
+        }
+    
+    def save_metadata(self, model_path: str):
+        """Write the small stats sidecar that describes a saved model (tagged with its sha256)"""
+        with atomic_write(metadata_path(model_path), 'w') as f:
+            json.dump({**self.model_summary(), 'saved_at': datetime.now().isoformat(),
+                       'model_sha256': file_sha256(model_path)}, f, indent=2)
+    
     def load_model(self, filepath: str):
         """Load a trained model from a file"""
         with open(filepath, 'r') as f:
@@ -296,16 +569,125 @@ class FeedbackBayesianClassifier:
             'needs_improvement': defaultdict(int, model_data['rating_counts']['needs_improvement'])
         }
         self.class_counts = model_data['class_counts']
+        self.word_totals = {
+            label: sum(self.word_counts[label].values()) for label in self.word_counts
+        }
         self.total_documents = model_data['total_documents']
+        previous_buffer, self._mapped_buffer = self._mapped_buffer, None
+        _close_mapping(previous_buffer)
         self.is_trained = model_data['is_trained']
         self.positive_words = set(model_data['positive_words'])
         self.negative_words = set(model_data['negative_words'])
         self.service_categories = model_data['service_categories']
         self.rating_threshold = model_data['rating_threshold']
+        self.model_version += 1
         
         print(f"Model loaded from {filepath}")
         print(f"Vocabulary size: {len(self.vocabulary)}")
         print(f"Class distribution: {self.class_counts}")
+    
+    def save_binary_model(self, filepath: str, source_path: str = None, metadata: bool = True):
+        """
+        Save the trained model in the compact binary format.
+        
+        source_path is the JSON model holding the same counts; its sha256 is
+        recorded so a later JSON-only save makes this binary stale.
+        """
+        vocabulary = sorted(self.vocabulary)
+        counts = np.array(
+            [[self.word_counts[label][word] for label in BINARY_LABELS] for word in vocabulary],
+            dtype='<i8'
+        ).reshape(len(vocabulary), len(BINARY_LABELS))
+        encoded = [word.encode('utf-8') for word in vocabulary]
+        offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+        np.cumsum([len(word) for word in encoded], out=offsets[1:])
+        source = bytes.fromhex(file_sha256(source_path)) if source_path else NO_SOURCE
+        
+        model_metadata = json.dumps({
+            'category_counts': {label: dict(self.category_counts[label]) for label in BINARY_LABELS},
+            'rating_counts': {label: dict(self.rating_counts[label]) for label in BINARY_LABELS},
+            'class_counts': self.class_counts,
+            'word_totals': self.word_totals,
+            'total_documents': self.total_documents,
+            'is_trained': self.is_trained,
+            'positive_words': sorted(self.positive_words),
+            'negative_words': sorted(self.negative_words),
+            'service_categories': self.service_categories,
+            'rating_threshold': self.rating_threshold,
+            'saved_at': datetime.now().isoformat()
+        }).encode('utf-8')
+        padding = b'\0' * (-(BINARY_HEADER.size + len(model_metadata)) % 8)
+        
+        with atomic_write(filepath, 'wb') as f:
+            f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, len(model_metadata), len(vocabulary), source))
+            f.write(model_metadata)
+            f.write(padding)
+            f.write(counts.tobytes())
+            f.write(offsets.tobytes())
+            f.write(b''.join(encoded))
+        if metadata:
+            self.save_metadata(filepath)
+        
+        print(f"Binary model saved to {filepath}")
+    
+    def load_binary_model(self, filepath: str):
+        """Load a model saved with save_binary_model() via a memory map (no per-word parsing)"""
+        with open(filepath, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        try:
+            magic, version, _, metadata_length, vocabulary_size, _ = BINARY_HEADER.unpack_from(buffer, 0)
+        except struct.error:
+            buffer.close()
+            raise ValueError(f"Not a feedback model binary (version {BINARY_VERSION}): {filepath}")
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            buffer.close()
+            raise ValueError(f"Not a feedback model binary (version {BINARY_VERSION}): {filepath}")
+        
+        offset = BINARY_HEADER.size
+        model_data = json.loads(buffer[offset:offset + metadata_length].decode('utf-8'))
+        offset += metadata_length
+        offset += -offset % 8
+        
+        counts = np.frombuffer(
+            buffer, dtype='<i8', count=vocabulary_size * len(BINARY_LABELS), offset=offset
+        ).reshape(vocabulary_size, len(BINARY_LABELS))
+        offset += counts.nbytes
+        offsets = memoryview(buffer)[offset:offset + 8 * (vocabulary_size + 1)].cast('q')
+        vocabulary = _MappedVocabulary(buffer, offsets, offset + offsets.nbytes)
+        
+        previous_buffer, self._mapped_buffer = self._mapped_buffer, buffer
+        self.vocabulary = vocabulary
+        self.word_counts = {
+            label: _MappedWordCounts(vocabulary, counts[:, column])
+            for column, label in enumerate(BINARY_LABELS)
+        }
+        _close_mapping(previous_buffer)
+        self.category_counts = {
+            label: defaultdict(int, model_data['category_counts'][label]) for label in BINARY_LABELS
+        }
+        self.rating_counts = {
+            label: defaultdict(int, model_data['rating_counts'][label]) for label in BINARY_LABELS
+        }
+        self.class_counts = model_data['class_counts']
+        self.word_totals = model_data['word_totals']
+        self.total_documents = model_data['total_documents']
+        self.is_trained = model_data['is_trained']
+        self.positive_words = set(model_data['positive_words'])
+        self.negative_words = set(model_data['negative_words'])
+        self.service_categories = model_data['service_categories']
+        self.rating_threshold = model_data['rating_threshold']
+        self.model_version += 1
+    
+    def _unmap_counts(self):
+        """Copy memory-mapped word counts into mutable tables before further training"""
+        self.word_counts = {
+            label: defaultdict(int, {word: count for word, count in self.word_counts[label].items() if count})
+            for label in BINARY_LABELS
+        }
+        self.vocabulary = set(self.vocabulary)
+        previous_buffer, self._mapped_buffer = self._mapped_buffer, None
+        _close_mapping(previous_buffer)
 
 
 def generate_sample_training_data():
@@ -394,6 +776,6 @@ if __name__ == "__main__":
         print(f"Confidence: {result['confidence']:.3f}")
         print(f"Probabilities: {result['probabilities']}")
     
-    # Save the model
+    # Save the model (JSON for debugging, binary for fast loading)
     classifier.save_model('feedback_bayesian_model.json')
     print("\nModel training and testing completed!")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Synthetic feedback corpus generator and accuracy/throughput harness
+for the Bayesian Feedback Classifier
+
+The generator expands phrase templates, service categories and ratings into
+deterministic corpora of any size (10k to 10M entries) without holding them
+in memory. The harness trains and evaluates a classifier for each size in a
+fresh worker process and reports training throughput, prediction throughput,
+peak memory and accuracy together.
+
+Usage:
+    python feedback_benchmark.py [--sizes 10000,100000,1000000] [--test-size 5000] [--seed 42]
+    python feedback_benchmark.py --write <output.jsonl> <size> [--seed 42]
+"""
+
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from feedback_bayesian_classifier import FeedbackBayesianClassifier
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+# Fraction of entries whose label disagrees with the text, as in real exports
+LABEL_NOISE = 0.03
+
+SUBJECTS = {
+    'meal': ['the food', 'lunch', 'the snacks', 'the meals', 'breakfast', 'the menu'],
+    'activity': ['the activities', 'playtime', 'the art sessions', 'story time', 'the outdoor games'],
+    'communication': ['communication', 'the daily updates', 'the parent app messages', 'the newsletters'],
+    'staff': ['the staff', 'the teachers', 'the caregivers', 'the nanny', 'the front desk'],
+    'facility': ['the facility', 'the classrooms', 'the playground', 'the nap room', 'the bathrooms'],
+    'safety': ['safety', 'the pickup process', 'the security checks', 'the first aid response'],
+}
+
+POSITIVE_PHRASES = [
+    'was excellent', 'is wonderful', 'was amazing', 'is always great', 'was fantastic',
+    'is clean and friendly', 'was delicious', 'is very professional', 'is caring and attentive',
+    'made my child happy', 'is outstanding', 'was perfect today', 'is the best',
+]
+
+NEGATIVE_PHRASES = [
+    'was terrible', 'is poor', 'was cold and tasteless', 'is dirty', 'was disappointing',
+    'is slow and late', 'was rude', 'is unsafe', 'is a real problem', 'was boring',
+    'made my child upset', 'is careless', 'needs improvement',
+]
+
+MIXED_PHRASES = [
+    'was okay but could be better', 'is average', 'was fine', 'has some issues',
+    'is good but needs more updates', 'was satisfactory',
+]
+
+# Long-tail detail words (names, places, dishes) so the vocabulary grows with corpus size
+DETAIL_VOCABULARY_SIZE = 200000
+
+POSITIVE_CLOSINGS = ['Thank you!', 'Highly recommend.', 'Keep it up!', 'We appreciate it.', '']
+NEGATIVE_CLOSINGS = ['Please fix this.', 'Very frustrated.', 'We are worried.', 'Not acceptable.', '']
+
+
+def _detail_word(rank: int) -> str:
+    """Deterministic letters-only word for a long-tail vocabulary rank"""
+    letters = []
+    rank += 26 * 27  # at least three letters, so preprocessing keeps it
+    while rank:
+        rank, remainder = divmod(rank, 26)
+        letters.append(chr(ord('a') + remainder))
+    return ''.join(letters)
+
+
+def generate_feedback_corpus(size: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily generate `size` labelled feedback entries.
+
+    The same (size, seed) always yields the same corpus.
+    """
+    rng = random.Random(seed)
+    categories = list(SUBJECTS)
+
+    for _ in range(size):
+        category = rng.choice(categories)
+        subject = rng.choice(SUBJECTS[category])
+        kind = rng.random()
+
+        if kind < 0.45:
+            label = 'positive'
+            phrase = rng.choice(POSITIVE_PHRASES)
+            closing = rng.choice(POSITIVE_CLOSINGS)
+            rating = rng.choice([4, 5, 5])
+        elif kind < 0.85:
+            label = 'needs_improvement'
+            phrase = rng.choice(NEGATIVE_PHRASES)
+            closing = rng.choice(NEGATIVE_CLOSINGS)
+            rating = rng.choice([1, 2, 2])
+        else:
+            label = 'needs_improvement'
+            phrase = rng.choice(MIXED_PHRASES)
+            closing = ''
+            rating = 3
+
+        if rng.random() < LABEL_NOISE:
+            label = 'positive' if label == 'needs_improvement' else 'needs_improvement'
+
+        text = f"{subject.capitalize()} {phrase}. {closing}".strip()
+        if rng.random() < 0.5:
+            # Zipf-like rank: a few details are common, most are rare
+            rank = min(int(rng.paretovariate(1.0)), DETAIL_VOCABULARY_SIZE)
+            text += f" Mentioned {_detail_word(rank)}."
+        yield {'feedback_text': text, 'rating': rating, 'service_category': category, 'label': label}
+
+
+def write_corpus(path: str, size: int, seed: int = 42) -> int:
+    """Write a generated corpus as JSON lines (readable by feedback_streaming_trainer)"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in generate_feedback_corpus(size, seed):
+            f.write(json.dumps(entry) + '\n')
+            count += 1
+    return count
+
+
+def _peak_memory_mb() -> Optional[float]:
+    """Peak resident memory of the current process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def benchmark_size(size: int, test_size: int = 5000, seed: int = 42) -> Dict[str, Any]:
+    """Train on a generated corpus of `size` entries and evaluate on a held-out corpus"""
+    classifier = FeedbackBayesianClassifier(cache_size=0)
+    classifier._init_sentiment_words()
+
+    start = time.perf_counter()
+    for entry in generate_feedback_corpus(size, seed):
+        classifier.add_example(entry)
+    classifier.is_trained = True
+    train_seconds = time.perf_counter() - start
+
+    test_entries = list(generate_feedback_corpus(test_size, seed + 1))
+    correct = 0
+    start = time.perf_counter()
+    for entry in test_entries:
+        result = classifier.predict(entry['feedback_text'], entry['rating'], entry['service_category'])
+        correct += result['predicted_class'] == entry['label']
+    predict_seconds = time.perf_counter() - start
+
+    return {
+        'size': size,
+        'vocabulary_size': len(classifier.vocabulary),
+        'train_seconds': round(train_seconds, 3),
+        'train_docs_per_second': round(size / train_seconds) if train_seconds else None,
+        'predict_seconds': round(predict_seconds, 3),
+        'predictions_per_second': round(test_size / predict_seconds) if predict_seconds else None,
+        'accuracy': round(correct / test_size, 4) if test_size else None,
+        'peak_memory_mb': _peak_memory_mb()
+    }
+
+
+def run_benchmark(sizes: List[int], test_size: int = 5000, seed: int = 42) -> List[Dict[str, Any]]:
+    """Benchmark each size in its own process so peak memory is measured per size"""
+    results = []
+    for size in sizes:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results.append(executor.submit(benchmark_size, size, test_size, seed).result())
+    return results
+
+
+def print_report(results: List[Dict[str, Any]]):
+    """Print benchmark results as a table"""
+    header = f"{'size':>10} {'vocab':>7} {'train docs/s':>13} {'pred/s':>9} {'accuracy':>9} {'peak MB':>8}"
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        print(f"{row['size']:>10} {row['vocabulary_size']:>7} {row['train_docs_per_second'] or '-':>13} "
+              f"{row['predictions_per_second'] or '-':>9} {row['accuracy']:>9} {row['peak_memory_mb'] or '-':>8}")
+
+
+def main():
+    """Run the harness or write a corpus, depending on arguments"""
+    args = sys.argv[1:]
+    seed = 42
+    if '--seed' in args:
+        index = args.index('--seed')
+        seed = int(args[index + 1])
+        del args[index:index + 2]
+
+    if args and args[0] == '--write':
+        if len(args) < 3:
+            print(json.dumps({'success': False, 'error': 'Usage: --write <output.jsonl> <size>'}))
+            sys.exit(1)
+        count = write_corpus(args[1], int(args[2]), seed)
+        print(json.dumps({'success': True, 'path': args[1], 'entries': count}))
+        return
+
+    sizes = DEFAULT_SIZES
+    test_size = 5000
+    if '--sizes' in args:
+        sizes = [int(size) for size in args[args.index('--sizes') + 1].split(',')]
+    if '--test-size' in args:
+        test_size = int(args[args.index('--test-size') + 1])
+
+    results = run_benchmark(sizes, test_size, seed)
+    print_report(results)
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,34 +7,122 @@ Handles classification requests from Node.js server
 import sys
 import json
 import os
-from feedback_bayesian_classifier import FeedbackBayesianClassifier, generate_sample_training_data
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import redirect_stdout
+from feedback_bayesian_classifier import (
+    FeedbackBayesianClassifier, generate_sample_training_data, read_model_metadata, file_sha256, binary_model_source
+)
+from feedback_dedupe import classify_deduplicated, DEFAULT_THRESHOLD
 
-def load_or_train_model():
-    """Load existing model or train a new one"""
-    model_path = 'feedback_bayesian_model.json'
+# Default model location, next to this script rather than the working directory
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feedback_bayesian_model.json')
+
+# Classifier reused across calls within one process so its prediction cache
+# survives; keyed by the signature of the model file it was loaded from.
+# get_stats reports its hit/miss counters, which only accumulate for batch
+# and in-process callers (the Node routes spawn one process per request).
+_loaded_model = {'signature': None, 'classifier': None}
+
+def get_model_paths():
+    """Resolve the JSON and binary model paths (FEEDBACK_MODEL_PATH overrides the default)"""
+    model_path = os.path.abspath(os.environ.get('FEEDBACK_MODEL_PATH') or DEFAULT_MODEL_PATH)
+    return model_path, os.path.splitext(model_path)[0] + '.bin'
+
+def _model_signature(path):
+    """Identify a model file version by path, modification time and size"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+def _remember_model(path, classifier):
+    """Keep the loaded classifier for later calls in this process"""
+    _loaded_model['signature'] = _model_signature(path)
+    _loaded_model['classifier'] = classifier
+    return classifier
+
+def _binary_is_current(model_path, binary_model_path):
+    """True when the binary model exists and was written from the JSON model as it is now"""
+    if not os.path.exists(binary_model_path):
+        return False
+    if not os.path.exists(model_path):
+        return True
+    return binary_model_source(binary_model_path) == file_sha256(model_path)
+
+def _load_existing_model(model_path, binary_model_path):
+    """
+    Load the saved model, preferring the binary format; None if neither loads.
+    
+    A binary written from a different JSON model (e.g. after a JSON-only
+    save) is stale and skipped. When the JSON is used because the binary is
+    missing or stale, the binary is rewritten from it so later loads map it.
+    """
+    for path in [binary_model_path, model_path]:
+        signature = _model_signature(path)
+        if signature is not None and signature == _loaded_model['signature']:
+            return _loaded_model['classifier']
     
     classifier = FeedbackBayesianClassifier()
     
+    # Prefer the memory-mapped binary model, keep JSON as the fallback
+    if _binary_is_current(model_path, binary_model_path):
+        try:
+            classifier.load_binary_model(binary_model_path)
+            return _remember_model(binary_model_path, classifier)
+        except Exception as e:
+            print(f"Error loading binary model: {e}", file=sys.stderr)
+    
     if os.path.exists(model_path):
         try:
-            classifier.load_model(model_path)
-            return classifier
+            with redirect_stdout(sys.stderr):
+                classifier.load_model(model_path)
         except Exception as e:
             print(f"Error loading model: {e}", file=sys.stderr)
-            # Fall back to training new model
-            pass
+            return None
+        try:
+            with redirect_stdout(sys.stderr):
+                classifier.save_binary_model(binary_model_path, source_path=model_path, metadata=False)
+        except OSError as e:
+            print(f"Could not refresh binary model: {e}", file=sys.stderr)
+        return _remember_model(model_path, classifier)
     
-    # Train new model
-    training_data = generate_sample_training_data()
-    classifier.train(training_data)
-    classifier.save_model(model_path)
+    return None
+
+def build_model(model_path=None):
+    """
+    Train the classifier on the bundled sample data and save it (JSON, stats
+    sidecar and binary). Used by the ahead-of-time build, never by requests.
+    """
+    model_path = model_path or get_model_paths()[0]
+    classifier = FeedbackBayesianClassifier()
+    with redirect_stdout(sys.stderr):
+        classifier.train(generate_sample_training_data())
+        classifier.save_model(model_path)
+    return classifier
+
+def load_serving_model():
+    """
+    Load the saved model for a request.
+    
+    Requests never train: a missing model fails fast with FileNotFoundError
+    (reported as {'success': False, ...}) so the caller can use its
+    rule-based fallback. Build the model ahead of time with
+    server/ml_models/build_models.py or the build_model action.
+    """
+    model_path, binary_model_path = get_model_paths()
     
+    classifier = _load_existing_model(model_path, binary_model_path)
+    if classifier is None:
+        raise FileNotFoundError(
+            f'Feedback model not built at {model_path}; run build_models.py or the build_model action'
+        )
     return classifier
 
 def classify_feedback(feedback_text, rating, service_category):
     """Classify a single feedback entry"""
     try:
-        classifier = load_or_train_model()
+        classifier = load_serving_model()
         result = classifier.predict(feedback_text, rating, service_category)
         return {
             'success': True,
@@ -46,10 +134,25 @@ def classify_feedback(feedback_text, rating, service_category):
             'error': str(e)
         }
 
-def batch_classify(feedback_entries):
-    """Classify multiple feedback entries"""
+def batch_classify(feedback_entries, dedupe=False, similarity_threshold=DEFAULT_THRESHOLD):
+    """
+    Classify multiple feedback entries.
+    
+    With dedupe=True, near-duplicate entries (same rating and category, text
+    similarity >= similarity_threshold) are classified once and share the
+    result; the response then includes the dedupe stats.
+    """
     try:
-        classifier = load_or_train_model()
+        classifier = load_serving_model()
+        
+        if dedupe:
+            results, stats = classify_deduplicated(feedback_entries, classifier, similarity_threshold)
+            return {
+                'success': True,
+                'results': results,
+                'dedupe': stats
+            }
+        
         results = []
         
         for entry in feedback_entries:
@@ -73,20 +176,128 @@ def batch_classify(feedback_entries):
             'error': str(e)
         }
 
+def _classify_chunk(start_index, entries, echo_input=True):
+    """Classify one chunk and return its results as JSON lines plus the error count"""
+    classifier = load_serving_model()
+    lines = []
+    errors = 0
+    
+    for offset, entry in enumerate(entries):
+        row = {'index': start_index + offset}
+        if echo_input:
+            row['input'] = entry
+        try:
+            row['classification'] = classifier.predict(
+                entry['feedback_text'],
+                entry['rating'],
+                entry['service_category']
+            )
+        except Exception as e:
+            row['error'] = str(e)
+            errors += 1
+        lines.append(json.dumps(row))
+    
+    return lines, errors
+
+def _iter_entry_chunks(feedback_entries, chunk_size):
+    """Group an iterable of entries into (start_index, chunk) pairs"""
+    chunk = []
+    start_index = 0
+    for entry in feedback_entries:
+        chunk.append(entry)
+        if len(chunk) >= chunk_size:
+            yield start_index, chunk
+            start_index += len(chunk)
+            chunk = []
+    if chunk:
+        yield start_index, chunk
+
+def batch_classify_stream(feedback_entries, output=None, chunk_size=1000, workers=None, echo_input=True):
+    """
+    Classify a large, lazily read set of feedback entries across a process pool.
+    
+    Results are written to `output` as JSON lines as soon as each chunk
+    completes, so they may arrive out of order; every line carries the
+    entry's `index`. Only a bounded number of chunks is held in memory.
+    
+    Returns:
+        dict: summary with the number of entries and errors
+    """
+    output = output or sys.stdout
+    workers = workers or os.cpu_count() or 1
+    
+    # Make sure the model exists before workers start loading it
+    load_serving_model()
+    
+    summary = {'success': True, 'total': 0, 'errors': 0}
+    
+    def emit(chunk_result):
+        lines, errors = chunk_result
+        for line in lines:
+            output.write(line + '\n')
+        summary['total'] += len(lines)
+        summary['errors'] += errors
+    
+    chunks = _iter_entry_chunks(feedback_entries, chunk_size)
+    if workers == 1:
+        for start_index, chunk in chunks:
+            emit(_classify_chunk(start_index, chunk, echo_input))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for start_index, chunk in chunks:
+                pending.add(executor.submit(_classify_chunk, start_index, chunk, echo_input))
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        emit(future.result())
+            for future in pending:
+                emit(future.result())
+    
+    output.flush()
+    return summary
+
+def parse_flag(value, name):
+    """A boolean option: a JSON boolean, or explicit 'true'/'false'/'1'/'0' (strings or 0/1)"""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('true', '1', 'yes'):
+        return True
+    if text in ('false', '0', 'no'):
+        return False
+    raise ValueError(f'{name} must be true or false, got {value!r}')
+
+def parse_count(value, name):
+    """A positive integer option: a JSON number or a numeric string"""
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a positive integer, got {value!r}')
+    if count < 1 or count != float(value):
+        raise ValueError(f'{name} must be a positive integer, got {value!r}')
+    return count
+
+def _iter_stdin_entries():
+    """Lazily read JSON-lines feedback entries from stdin"""
+    for line in sys.stdin:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
 def get_model_stats():
-    """Get model statistics"""
+    """Get model statistics, from the metadata sidecar when it is current"""
     try:
-        classifier = load_or_train_model()
+        model_path, _ = get_model_paths()
+        stats = read_model_metadata(model_path)
         
-        stats = {
-            'vocabulary_size': len(classifier.vocabulary),
-            'total_documents': classifier.total_documents,
-            'class_distribution': classifier.class_counts,
-            'is_trained': classifier.is_trained,
-            'service_categories': classifier.service_categories,
-            'positive_words_count': len(classifier.positive_words),
-            'negative_words_count': len(classifier.negative_words)
-        }
+        if stats is None:
+            classifier = load_serving_model()
+            stats = classifier.model_summary()
+        
+        # Prediction cache counters of the classifier loaded in this process
+        classifier = _loaded_model['classifier']
+        stats['cache'] = classifier.cache_info() if classifier is not None else {'hits': 0, 'misses': 0, 'size': 0}
         
         return {
             'success': True,
@@ -135,9 +346,35 @@ def main():
                 sys.exit(1)
             
             data = json.loads(sys.argv[2])
-            result = batch_classify(data['feedback_entries'])
+            result = batch_classify(
+                data['feedback_entries'],
+                dedupe=parse_flag(data.get('dedupe', False), 'dedupe'),
+                similarity_threshold=float(data.get('similarity_threshold', DEFAULT_THRESHOLD))
+            )
             print(json.dumps(result))
             
+        elif action == 'batch_classify_stream':
+            # Entries are read as JSON lines from stdin; optional settings in argv
+            options = json.loads(sys.argv[2]) if len(sys.argv) > 2 else {}
+            summary = batch_classify_stream(
+                _iter_stdin_entries(),
+                chunk_size=parse_count(options.get('chunk_size', 1000), 'chunk_size'),
+                workers=parse_count(options['workers'], 'workers') if options.get('workers') is not None else None,
+                echo_input=parse_flag(options.get('echo_input', True), 'echo_input')
+            )
+            print(json.dumps(summary), file=sys.stderr)
+            
+        elif action == 'build_model':
+            # Ahead-of-time build of the serving model (optionally at a given path)
+            options = json.loads(sys.argv[2]) if len(sys.argv) > 2 else {}
+            model_path = options.get('model_path')
+            classifier = build_model(os.path.abspath(model_path) if model_path else None)
+            print(json.dumps({
+                'success': True,
+                'model_path': model_path or get_model_paths()[0],
+                'result': classifier.model_summary()
+            }))
+            
         elif action == 'get_stats':
             result = get_model_stats()
             print(json.dumps(result))
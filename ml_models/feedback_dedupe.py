@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate feedback detection for batch classification
+
+Parents often submit the same or nearly the same comment for several children
+or days. Entries are shingled into word 3-grams, summarised with MinHash
+signatures and bucketed with locality-sensitive hashing; candidate pairs are
+confirmed with the exact Jaccard similarity of their shingle sets. Only
+entries with the same rating and service category are merged, since both
+feed the classifier. One representative per cluster is classified and its
+result is fanned out to the rest.
+"""
+
+import zlib
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from feedback_bayesian_classifier import FeedbackBayesianClassifier
+
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 16
+DEFAULT_THRESHOLD = 0.8
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def shingle_set(tokens: Sequence[str], size: int = SHINGLE_SIZE) -> Set[str]:
+    """Word n-gram shingles; short texts become a single shingle"""
+    if len(tokens) <= size:
+        return {' '.join(tokens)}
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures from universal hashes (a * x + b) mod p"""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, _MERSENNE_PRIME, size=num_permutations).astype(np.uint64)
+        self.b = rng.randint(0, _MERSENNE_PRIME, size=num_permutations).astype(np.uint64)
+
+    def signature(self, shingles: Set[str]) -> np.ndarray:
+        """Minimum permuted hash of the shingles, one value per permutation"""
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) % _MERSENNE_PRIME for shingle in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+
+def _find(parents: List[int], index: int) -> int:
+    while parents[index] != index:
+        parents[index] = parents[parents[index]]
+        index = parents[index]
+    return index
+
+
+def find_near_duplicates(entries: Sequence[Dict[str, Any]], classifier: FeedbackBayesianClassifier,
+                         threshold: float = DEFAULT_THRESHOLD, num_permutations: int = NUM_PERMUTATIONS,
+                         num_bands: int = NUM_BANDS) -> List[int]:
+    """
+    Cluster near-duplicate entries.
+
+    Returns:
+        list: for every entry, the index of its cluster representative
+        (the earliest entry of the cluster)
+    """
+    hasher = MinHasher(num_permutations)
+    rows_per_band = num_permutations // num_bands
+    shingles = []
+    buckets = {}
+
+    for index, entry in enumerate(entries):
+        entry_shingles = shingle_set(classifier.preprocess_text(entry.get('feedback_text', '')))
+        shingles.append(entry_shingles)
+        context = (str(entry.get('rating')), entry.get('service_category'))
+        signature = hasher.signature(entry_shingles)
+        for band in range(num_bands):
+            band_key = (context, band, signature[band * rows_per_band:(band + 1) * rows_per_band].tobytes())
+            buckets.setdefault(band_key, []).append(index)
+
+    parents = list(range(len(entries)))
+    for members in buckets.values():
+        # Compare each member with one entry per cluster already seen in this bucket
+        seen = []
+        for member in members:
+            for other in seen:
+                root_member, root_other = _find(parents, member), _find(parents, other)
+                if root_member == root_other:
+                    break
+                union = len(shingles[member] | shingles[other])
+                if union and len(shingles[member] & shingles[other]) / union >= threshold:
+                    parents[max(root_member, root_other)] = min(root_member, root_other)
+                    break
+            else:
+                seen.append(member)
+
+    return [_find(parents, index) for index in range(len(entries))]
+
+
+def classify_deduplicated(entries: Sequence[Dict[str, Any]], classifier: FeedbackBayesianClassifier,
+                          threshold: float = DEFAULT_THRESHOLD) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Classify one representative per near-duplicate cluster and fan results out.
+
+    Returns:
+        tuple: (per-entry results in input order, dedupe stats)
+    """
+    representatives = find_near_duplicates(entries, classifier, threshold)
+    classifications = {}
+    results = []
+
+    for index, entry in enumerate(entries):
+        representative = representatives[index]
+        if representative not in classifications:
+            rep_entry = entries[representative]
+            classifications[representative] = classifier.predict(
+                rep_entry['feedback_text'], rep_entry['rating'], rep_entry['service_category']
+            )
+        result = {'input': entry, 'classification': classifications[representative]}
+        if representative != index:
+            result['duplicate_of'] = representative
+        results.append(result)
+
+    total = len(entries)
+    unique = len(classifications)
+    stats = {
+        'total': total,
+        'unique': unique,
+        'duplicates_collapsed': total - unique,
+        'dedupe_ratio': (total - unique) / total if total else 0.0
+    }
+    return results, stats
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Selective re-scoring of stored feedback after a model update
+
+Keeps a token -> feedback inverted index over the classified archive together
+with each entry's decision margin (log-odds of 'positive'). When a new model
+replaces an old one, only the tokens whose log-probability ratio moved by more
+than a tolerance (beyond the shift shared by every known token) can change a
+decision on their own; the entries containing them are re-scored. All other
+entries have their margin advanced by the shared shift and the change in the
+prior/category/rating terms, and accumulate an error bound; they are re-scored
+only once that bound is large enough to possibly flip their decision.
+"""
+
+import math
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Set, Tuple
+
+from feedback_bayesian_classifier import FeedbackBayesianClassifier
+
+# Per-token ratio drift (log-odds) absorbed into an entry's error bound instead of
+# triggering a re-score; larger values touch fewer entries now, more later
+DEFAULT_TOLERANCE = 0.1
+
+
+def common_word_shift(old: FeedbackBayesianClassifier, new: FeedbackBayesianClassifier) -> float:
+    """
+    Change in the log ratio of any word whose counts did not change.
+
+    Laplace smoothing divides by (class word total + vocabulary size), so a
+    retrain moves the ratio of every known word by this same amount.
+    """
+    def log_denominator_ratio(classifier):
+        vocabulary_size = len(classifier.vocabulary)
+        return (math.log(classifier.word_totals['needs_improvement'] + vocabulary_size) -
+                math.log(classifier.word_totals['positive'] + vocabulary_size))
+
+    return log_denominator_ratio(new) - log_denominator_ratio(old)
+
+
+class FeedbackRescoringIndex:
+    """Inverted index over classified feedback for selective re-scoring"""
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.documents = {}
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, feedback_id: Hashable, feedback_text: str, rating: float, service_category: str,
+            classifier: FeedbackBayesianClassifier) -> Dict[str, Any]:
+        """Classify a feedback entry and add it to the index"""
+        if feedback_id in self.documents:
+            self.remove(feedback_id)
+
+        tokens = tuple(classifier.preprocess_text(feedback_text))
+        self.documents[feedback_id] = {
+            'feedback_text': feedback_text,
+            'rating': rating,
+            'service_category': service_category,
+            'tokens': tokens
+        }
+        for token in set(tokens):
+            self.postings[token].add(feedback_id)
+
+        return self._score(feedback_id, classifier)
+
+    def remove(self, feedback_id: Hashable):
+        """Remove a feedback entry from the index"""
+        document = self.documents.pop(feedback_id)
+        for token in set(document['tokens']):
+            postings = self.postings[token]
+            postings.discard(feedback_id)
+            if not postings:
+                del self.postings[token]
+
+    def predicted_class(self, feedback_id: Hashable) -> str:
+        """Current stored decision for a feedback entry"""
+        return 'positive' if self.documents[feedback_id]['margin'] > 0 else 'needs_improvement'
+
+    def _score(self, feedback_id: Hashable, classifier: FeedbackBayesianClassifier) -> Dict[str, Any]:
+        """Fully classify one indexed entry and reset its margin and error bound"""
+        document = self.documents[feedback_id]
+        result = classifier.predict(document['feedback_text'], document['rating'], document['service_category'])
+        document['margin'] = classifier.decision_margin(
+            document['feedback_text'], document['rating'], document['service_category']
+        )
+        document['known_tokens'] = sum(token in classifier.vocabulary for token in document['tokens'])
+        document['slack'] = 0.0
+        return result
+
+    def changed_tokens(self, old: FeedbackBayesianClassifier, new: FeedbackBayesianClassifier,
+                       tolerance: float = DEFAULT_TOLERANCE) -> Set[str]:
+        """Indexed tokens whose log ratio moved by more than `tolerance` beyond the shared shift"""
+        shift = common_word_shift(old, new)
+        changed = set()
+        for token in self.postings:
+            in_old = token in old.vocabulary
+            in_new = token in new.vocabulary
+            if in_old != in_new:
+                changed.add(token)
+            elif in_old and abs(new.word_log_ratio(token) - old.word_log_ratio(token) - shift) > tolerance:
+                changed.add(token)
+        return changed
+
+    def rescore(self, old: FeedbackBayesianClassifier, new: FeedbackBayesianClassifier,
+                tolerance: float = DEFAULT_TOLERANCE) -> Tuple[Dict[Hashable, Dict[str, Any]], Dict[str, Any]]:
+        """
+        Bring the index up to date with `new`, re-scoring only entries whose decision may change.
+
+        Args:
+            old: Model the index is currently scored with
+            new: Retrained model
+            tolerance: Per-token ratio change (log-odds) treated as unchanged
+
+        Returns:
+            tuple: ({feedback_id: new prediction} for re-scored entries, summary stats)
+        """
+        changed = self.changed_tokens(old, new, tolerance)
+        candidates = set()
+        for token in changed:
+            candidates.update(self.postings[token])
+
+        shift = common_word_shift(old, new)
+        context_deltas = {}
+        for feedback_id, document in self.documents.items():
+            if feedback_id in candidates:
+                continue
+
+            context_key = (str(document['rating']), document['service_category'])
+            if context_key not in context_deltas:
+                context_deltas[context_key] = (
+                    new.context_log_ratio(document['rating'], document['service_category']) -
+                    old.context_log_ratio(document['rating'], document['service_category'])
+                )
+
+            document['margin'] += context_deltas[context_key] + shift * document['known_tokens']
+            document['slack'] += tolerance * document['known_tokens']
+            if abs(document['margin']) <= document['slack']:
+                candidates.add(feedback_id)
+
+        flipped = 0
+        results = {}
+        for feedback_id in candidates:
+            previous_class = self.predicted_class(feedback_id)
+            results[feedback_id] = self._score(feedback_id, new)
+            flipped += results[feedback_id]['predicted_class'] != previous_class
+
+        summary = {
+            'total': len(self.documents),
+            'changed_tokens': len(changed),
+            'rescored': len(candidates),
+            'rescored_fraction': len(candidates) / len(self.documents) if self.documents else 0.0,
+            'flipped': flipped
+        }
+        return results, summary
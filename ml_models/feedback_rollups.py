@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Incremental per-category sentiment rollups for the admin dashboard
+
+Maintains day and week buckets of classified feedback per service category
+(plus an every-category total) as classifications arrive: entry count, 'needs
+improvement' count and summed confidence. Each query reads one bucket, so
+dashboard loads never reclassify or re-aggregate the history.
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Union
+
+from feedback_bayesian_classifier import FeedbackBayesianClassifier, atomic_write
+
+WINDOWS = ('day', 'week')
+# Category key of the every-category total; pass it to query/series. Every
+# string, including 'all', is an ordinary service category
+ALL_CATEGORIES = None
+
+Timestamp = Union[datetime, date, str]
+
+
+def _to_date(timestamp: Timestamp) -> date:
+    """Accept datetimes, dates and ISO strings (including a trailing 'Z')"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if isinstance(timestamp, datetime):
+        return timestamp.date()
+    return timestamp
+
+
+def _query_key(service_category: Optional[str]) -> Optional[str]:
+    """Bucket category key for a query (ALL_CATEGORIES for the total)"""
+    if service_category is ALL_CATEGORIES:
+        return ALL_CATEGORIES
+    return service_category.lower()
+
+
+def window_start(timestamp: Timestamp, window: str) -> date:
+    """First day of the day/week bucket containing timestamp (weeks start on Monday)"""
+    day = _to_date(timestamp)
+    if window == 'day':
+        return day
+    if window == 'week':
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unknown window '{window}', expected one of {WINDOWS}")
+
+
+class SentimentRollup:
+    """Windowed 'needs improvement' counts and mean confidence per service category"""
+
+    def __init__(self, classifier: Optional[FeedbackBayesianClassifier] = None, windows=WINDOWS):
+        self.classifier = classifier
+        self.windows = tuple(windows)
+        # (window, window start ISO date, category or ALL_CATEGORIES for the total)
+        #   -> [total, needs_improvement, confidence_sum]
+        self.buckets = {}
+
+    def add(self, result: Dict[str, Any], service_category: str, timestamp: Timestamp):
+        """Fold one classification result (as returned by predict) into its buckets"""
+        needs_improvement = 1 if result['predicted_class'] == 'needs_improvement' else 0
+        confidence = float(result['confidence'])
+        category = (service_category or '').lower()
+
+        for window in self.windows:
+            start = window_start(timestamp, window).isoformat()
+            for key in [(window, start, category), (window, start, ALL_CATEGORIES)]:
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    bucket = self.buckets[key] = [0, 0, 0.0]
+                bucket[0] += 1
+                bucket[1] += needs_improvement
+                bucket[2] += confidence
+
+    def classify_and_add(self, feedback_text: str, rating: float, service_category: str,
+                         timestamp: Timestamp) -> Dict[str, Any]:
+        """Classify a new feedback entry with the attached classifier and record it"""
+        if self.classifier is None:
+            raise ValueError("SentimentRollup needs a classifier to classify feedback")
+        result = self.classifier.predict(feedback_text, rating, service_category)
+        self.add(result, service_category, timestamp)
+        return result
+
+    def query(self, service_category: Optional[str], window: str, timestamp: Timestamp) -> Dict[str, Any]:
+        """Stats for the bucket containing timestamp; ALL_CATEGORIES (None) for every category"""
+        start = window_start(timestamp, window).isoformat()
+        total, needs_improvement, confidence_sum = self.buckets.get(
+            (window, start, _query_key(service_category)), [0, 0, 0.0]
+        )
+        return {
+            'window': window,
+            'window_start': start,
+            'service_category': service_category,
+            'total': total,
+            'needs_improvement': needs_improvement,
+            'needs_improvement_rate': needs_improvement / total if total else 0.0,
+            'mean_confidence': confidence_sum / total if total else 0.0
+        }
+
+    def series(self, service_category: Optional[str], window: str) -> List[Dict[str, Any]]:
+        """All buckets of one category and window, oldest first"""
+        category = _query_key(service_category)
+        starts = sorted(start for (w, start, c) in self.buckets if w == window and c == category)
+        return [self.query(service_category, window, start) for start in starts]
+
+    def prune(self, before: Timestamp):
+        """Drop buckets that start before the given date"""
+        cutoff = _to_date(before).isoformat()
+        for key in [key for key in self.buckets if key[1] < cutoff]:
+            del self.buckets[key]
+
+    def save(self, filepath: str):
+        """Persist the rollup so later processes can keep adding to it"""
+        with atomic_write(filepath, 'w') as f:
+            json.dump({
+                'windows': list(self.windows),
+                'buckets': [[*key, *bucket] for key, bucket in self.buckets.items()]
+            }, f)
+
+    @classmethod
+    def load(cls, filepath: str, classifier: Optional[FeedbackBayesianClassifier] = None) -> 'SentimentRollup':
+        """Load a rollup saved with save()"""
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+        rollup = cls(classifier, windows=data['windows'])
+        for window, start, category, total, needs_improvement, confidence_sum in data['buckets']:
+            rollup.buckets[(window, start, category)] = [total, needs_improvement, confidence_sum]
+        return rollup
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Streaming, multi-process trainer for the Bayesian Feedback Classifier
+
+Reads JSON-lines, JSON-array (mongoexport --jsonArray) or CSV feedback
+exports from disk, ships fixed-size chunks
+to worker processes that each build partial count tables, and merges the
+partial counts in a reduce step. Only a bounded number of chunks is in flight
+at any time, so memory stays flat regardless of corpus size.
+
+Usage:
+    python feedback_streaming_trainer.py <output_model.json> <export.jsonl|export.csv> [...]
+        [--workers N] [--chunk-size N]
+"""
+
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from feedback_bayesian_classifier import FeedbackBayesianClassifier
+
+DEFAULT_CHUNK_SIZE = 5000
+ARRAY_READ_SIZE = 1 << 16
+
+
+def _coerce_rating(value: Any) -> Any:
+    """Convert a rating read from disk to the numeric form used in training"""
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        rating = float(value)
+    except (TypeError, ValueError):
+        return 0
+    return int(rating) if rating.is_integer() else rating
+
+
+def _parse_record(record: Any) -> Optional[Dict[str, Any]]:
+    """Turn a raw JSON line or CSV row into a training entry"""
+    if isinstance(record, str):
+        record = record.strip()
+        if not record:
+            return None
+        try:
+            record = json.loads(record)
+        except json.JSONDecodeError:
+            return None
+    if not isinstance(record, dict):
+        return None
+
+    return {
+        'feedback_text': record.get('feedback_text') or '',
+        'rating': _coerce_rating(record.get('rating', 0)),
+        'service_category': record.get('service_category') or '',
+        'label': record.get('label') or ''
+    }
+
+
+def _iter_json_array(f, path: str) -> Iterator[Any]:
+    """Incrementally decode the elements of a top-level JSON array, one buffer at a time"""
+    decoder = json.JSONDecoder()
+    buffer = f.read(ARRAY_READ_SIZE).lstrip()[1:]  # drop the opening '['
+    position = 0
+    eof = False
+
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            if position >= len(buffer):
+                raise ValueError('need more data')
+            element, end = decoder.raw_decode(buffer, position)
+            if end == len(buffer) and not eof:
+                # A number may continue in the next read
+                raise ValueError('need more data')
+        except ValueError:
+            if eof:
+                raise ValueError(f'{path}: malformed or truncated JSON array export')
+            data = f.read(ARRAY_READ_SIZE)
+            eof = not data
+            buffer = buffer[position:] + data
+            position = 0
+            continue
+        yield element
+        position = end
+
+
+def iter_raw_records(path: str) -> Iterator[Any]:
+    """
+    Lazily yield raw records from a feedback export.
+
+    JSON-lines files yield unparsed lines (parsing happens in the workers);
+    files holding a JSON array yield its decoded elements, streamed without
+    loading the whole array; CSV files yield dict rows keyed by the header.
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield row
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            first = f.read(ARRAY_READ_SIZE).lstrip()[:1]
+            f.seek(0)
+            if first == '[':
+                yield from _iter_json_array(f, path)
+                return
+            for line in f:
+                yield line
+
+
+def iter_feedback_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Lazily yield parsed training entries from a feedback export"""
+    for raw in iter_raw_records(path):
+        record = _parse_record(raw)
+        if record is not None:
+            yield record
+
+
+def _iter_chunks(paths: Iterable[str], chunk_size: int) -> Iterator[List[Any]]:
+    """Group raw records from all files into lists of at most chunk_size"""
+    chunk = []
+    for path in paths:
+        for raw in iter_raw_records(path):
+            chunk.append(raw)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def count_chunk(raw_records: List[Any]) -> Dict[str, Any]:
+    """Worker task: accumulate count tables for one chunk of raw records"""
+    partial = FeedbackBayesianClassifier()
+    partial._init_sentiment_words()
+    for raw in raw_records:
+        record = _parse_record(raw)
+        if record is not None:
+            partial.add_example(record)
+    return partial.export_counts()
+
+
+def train_from_files(paths: List[str], workers: Optional[int] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     max_pending: Optional[int] = None) -> FeedbackBayesianClassifier:
+    """
+    Train a classifier from feedback exports on disk.
+
+    Args:
+        paths: JSON-lines or JSON-array (.jsonl/.json) or CSV (.csv) feedback exports
+        workers: Number of worker processes (defaults to CPU count, 1 = in-process)
+        chunk_size: Records per chunk shipped to a worker
+        max_pending: Maximum chunks in flight (defaults to 2 * workers)
+
+    Returns:
+        FeedbackBayesianClassifier: trained classifier with merged counts
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+
+    classifier = FeedbackBayesianClassifier()
+    classifier._init_sentiment_words()
+
+    if workers == 1:
+        for chunk in _iter_chunks(paths, chunk_size):
+            classifier.merge_counts(count_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for chunk in _iter_chunks(paths, chunk_size):
+                pending.add(executor.submit(count_chunk, chunk))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        classifier.merge_counts(future.result())
+            for future in pending:
+                classifier.merge_counts(future.result())
+
+    classifier.is_trained = classifier.total_documents > 0
+    return classifier
+
+
+def main():
+    """Train from exports given on the command line and save the model"""
+    args = sys.argv[1:]
+    workers = None
+    chunk_size = DEFAULT_CHUNK_SIZE
+
+    if '--workers' in args:
+        index = args.index('--workers')
+        workers = int(args[index + 1])
+        del args[index:index + 2]
+    if '--chunk-size' in args:
+        index = args.index('--chunk-size')
+        chunk_size = int(args[index + 1])
+        del args[index:index + 2]
+
+    if len(args) < 2:
+        print(json.dumps({
+            'success': False,
+            'error': 'Usage: python feedback_streaming_trainer.py <output_model.json> <export> [...]'
+        }))
+        sys.exit(1)
+
+    output_path, input_paths = args[0], args[1:]
+    try:
+        classifier = train_from_files(input_paths, workers=workers, chunk_size=chunk_size)
+    except ValueError as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+    if not classifier.is_trained:
+        print(json.dumps({
+            'success': False,
+            'error': 'No labelled feedback found in the given exports'
+        }))
+        sys.exit(1)
+
+    classifier.save_model(output_path)
+    print(json.dumps({
+        'success': True,
+        'total_documents': classifier.total_documents,
+        'vocabulary_size': len(classifier.vocabulary),
+        'class_distribution': classifier.class_counts
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Model file helpers shared by the feedback models and the server models
+(server/ml_models loads this file through shared_model_files.py).
+Standard library only, so lightweight serving paths can import it.
+"""
+
+import os
+import hashlib
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(filepath: str, mode: str = 'w'):
+    """Write to a temporary file in the target directory, then rename it into place"""
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(filepath) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# Digests by absolute path, with the stat fields they were computed for
+_sha256_cache = {}
+
+
+def file_sha256(filepath: str) -> str:
+    """
+    Content fingerprint of a saved model file.
+
+    The digest is cached per process and recomputed only when the file's
+    inode, size, mtime or ctime change; utime() cannot reset ctime, so
+    rewrites that keep the old mtime are still re-hashed.
+    """
+    path = os.path.abspath(filepath)
+    stat = os.stat(path)
+    key = (stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns)
+    cached = _sha256_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    _sha256_cache[path] = (key, digest.hexdigest())
+    return _sha256_cache[path][1]
@@ -4,7 +4,12 @@ Test script for the feedback classification API
 """
 
 import json
-from feedback_classification_api import classify_feedback, batch_classify, get_model_stats
+import os
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from feedback_classification_api import classify_feedback, batch_classify, batch_classify_stream, get_model_stats
 
 def test_classification():
     """Test single feedback classification"""
@@ -54,6 +59,75 @@ def test_batch_classification():
     print(f"Result: {json.dumps(result, indent=2)}")
     return result
 
+def test_deduplicated_batch_classification():
+    """Test near-duplicate collapse before batch classification"""
+    print("\nTesting deduplicated batch classification...")
+    
+    test_entries = [
+        {"feedback_text": "The teachers are caring and the room is always clean!", "rating": 5, "service_category": "staff"},
+        {"feedback_text": "the teachers are caring and the room is always clean", "rating": 5, "service_category": "staff"},
+        {"feedback_text": "The teachers are caring and the room is always clean. Thanks", "rating": 5, "service_category": "staff"},
+        {"feedback_text": "The teachers are caring and the room is always clean!", "rating": 2, "service_category": "staff"},
+        {"feedback_text": "Lunch was cold again today", "rating": 2, "service_category": "meal"},
+    ]
+    
+    result = batch_classify(test_entries, dedupe=True)
+    duplicate_of = [row.get('duplicate_of') for row in result['results']]
+    
+    print(f"Dedupe: {result['dedupe']}")
+    assert duplicate_of == [None, 0, 0, None, None]
+    assert result['dedupe']['unique'] == 3
+    assert result['results'][1]['classification'] == result['results'][0]['classification']
+    assert result['results'][3]['input'] == test_entries[3]
+    return result
+
+def test_streamed_batch_classification():
+    """Test chunked, multi-process batch classification with JSON-lines output"""
+    print("\nTesting streamed batch classification...")
+    
+    entries = [
+        {"feedback_text": "Great service overall!", "rating": 4.5, "service_category": "meal"},
+        {"feedback_text": "Needs improvement in communication", "rating": 2.5, "service_category": "communication"},
+        {"feedback_text": "Amazing activities, my child loves it!", "rating": 5, "service_category": "activity"},
+        {"feedback_text": "Missing rating"},
+    ] * 5
+    
+    output = StringIO()
+    summary = batch_classify_stream(iter(entries), output=output, chunk_size=3, workers=2, echo_input=False)
+    rows = sorted((json.loads(line) for line in output.getvalue().splitlines()), key=lambda row: row['index'])
+    
+    assert summary == {'success': True, 'total': len(entries), 'errors': 5}
+    assert [row['index'] for row in rows] == list(range(len(entries)))
+    assert all('input' not in row for row in rows)
+    
+    expected = batch_classify(entries[:3])['results']
+    for row, reference in zip(rows, expected):
+        assert row['classification'] == reference['classification']
+    
+    # String flags from the CLI are parsed, not truthiness-tested
+    api_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feedback_classification_api.py')
+    stdin = json.dumps(entries[0]) + '\n'
+    for flag, echoed in [('false', False), ('0', False), (True, True)]:
+        result = subprocess.run([sys.executable, api_path, 'batch_classify_stream',
+                                 json.dumps({'echo_input': flag, 'workers': 1})],
+                                input=stdin, capture_output=True, text=True, check=True)
+        assert ('input' in json.loads(result.stdout)) == echoed
+    invalid = subprocess.run([sys.executable, api_path, 'batch_classify_stream', json.dumps({'echo_input': 'maybe'})],
+                             input=stdin, capture_output=True, text=True)
+    assert invalid.returncode == 1 and 'echo_input must be true or false' in json.loads(invalid.stdout)['error']
+    
+    # Counts arrive as JSON numbers or numeric strings
+    result = subprocess.run([sys.executable, api_path, 'batch_classify_stream',
+                             json.dumps({'workers': '2', 'chunk_size': '1', 'echo_input': False})],
+                            input=stdin * 3, capture_output=True, text=True, check=True)
+    assert sorted(json.loads(line)['index'] for line in result.stdout.splitlines()) == [0, 1, 2]
+    for options in [{'workers': 'many'}, {'workers': 0}, {'chunk_size': -5}]:
+        invalid = subprocess.run([sys.executable, api_path, 'batch_classify_stream', json.dumps(options)],
+                                 input=stdin, capture_output=True, text=True)
+        assert invalid.returncode == 1 and 'must be a positive integer' in json.loads(invalid.stdout)['error']
+    print(f"Summary: {summary}")
+    return summary
+
 def test_model_stats():
     """Test model statistics"""
     print("\nTesting model statistics...")
@@ -63,6 +137,91 @@ def test_model_stats():
     print(f"Stats: {json.dumps(result, indent=2)}")
     return result
 
+def test_model_stats_sidecar():
+    """Test that stats come from the sidecar and match the full model"""
+    print("\nTesting model stats sidecar...")
+    
+    from feedback_classification_api import build_model, load_serving_model
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, 'model.json')
+        previous = os.environ.get('FEEDBACK_MODEL_PATH')
+        os.environ['FEEDBACK_MODEL_PATH'] = model_path
+        try:
+            build_model()
+            classifier = load_serving_model()
+            assert os.path.exists(os.path.join(tmp_dir, 'model.meta.json'))
+            
+            for _ in range(3):
+                classify_feedback("Lovely staff and clean rooms", 5, 'staff')
+            stats = get_model_stats()['result']
+            cache = stats.pop('cache')
+            assert cache['misses'] >= 1 and cache['hits'] >= 2
+            assert cache == load_serving_model().cache_info()
+            stats.pop('saved_at')
+            assert stats == classifier.model_summary()
+            
+            # Same-second rewrites (or copies keeping the old mtime) are caught by the content hash
+            from feedback_bayesian_classifier import read_model_metadata
+            stat = os.stat(model_path)
+            with open(model_path, 'r') as f:
+                data = json.load(f)
+            data['total_documents'] += 1
+            with open(model_path, 'w') as f:
+                json.dump(data, f)
+            os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            assert read_model_metadata(model_path) is None
+            
+            # The hash is cached until the file changes, even in place at the same size and mtime
+            import model_files
+            model_files.file_sha256(model_path)
+            key, digest = model_files._sha256_cache[os.path.abspath(model_path)]
+            model_files._sha256_cache[os.path.abspath(model_path)] = (key, 'cached')
+            assert model_files.file_sha256(model_path) == 'cached'
+            with open(model_path, 'rb') as f:
+                content = f.read()
+            stat = os.stat(model_path)
+            with open(model_path, 'r+b') as f:
+                f.write(b' ' + content[1:] if content[:1] != b' ' else b'\n' + content[1:])
+            os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            assert os.stat(model_path).st_size == stat.st_size
+            assert model_files.file_sha256(model_path) not in ('cached', digest)
+            print(f"Stats: {stats}")
+        finally:
+            if previous is None:
+                del os.environ['FEEDBACK_MODEL_PATH']
+            else:
+                os.environ['FEEDBACK_MODEL_PATH'] = previous
+
+def test_requests_never_train():
+    """Test that concurrent first requests fail fast instead of training a missing model"""
+    print("\nTesting requests without a built model...")
+    
+    api_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ, FEEDBACK_MODEL_PATH=os.path.join(tmp_dir, 'model.json'))
+        command = [sys.executable, os.path.join(api_dir, 'feedback_classification_api.py'), 'classify',
+                   json.dumps({'feedback_text': 'Great food', 'rating': 5, 'service_category': 'meal'})]
+        processes = [
+            subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            for _ in range(4)
+        ]
+        outputs = [process.communicate() for process in processes]
+        
+        for stdout, stderr in outputs:
+            result = json.loads(stdout)
+            assert not result['success'] and 'not built' in result['error']
+            assert 'Training completed' not in stderr
+        assert os.listdir(tmp_dir) == []
+        
+        # The build action creates the model the requests then use
+        build = subprocess.run([sys.executable, os.path.join(api_dir, 'feedback_classification_api.py'), 'build_model'],
+                               env=env, capture_output=True, text=True, check=True)
+        assert json.loads(build.stdout)['success']
+        assert sorted(os.listdir(tmp_dir)) == ['model.bin', 'model.json', 'model.meta.json']
+        result = json.loads(subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout)
+        assert result['success']
+        print(f"Prediction after build: {result['result']['predicted_class']}")
+
 if __name__ == "__main__":
     try:
         # Test single classification
@@ -71,9 +230,21 @@ if __name__ == "__main__":
         # Test batch classification
         test_batch_classification()
         
+        # Test deduplicated batch classification
+        test_deduplicated_batch_classification()
+        
+        # Test streamed batch classification
+        test_streamed_batch_classification()
+        
         # Test model stats
         test_model_stats()
         
+        # Test stats sidecar
+        test_model_stats_sidecar()
+        
+        # Test that requests never train
+        test_requests_never_train()
+        
         print("\n✅ All tests completed successfully!")
         
     except Exception as e:
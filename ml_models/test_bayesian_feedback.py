@@ -5,9 +5,16 @@ Test script for the Bayesian Feedback Classifier
 
 import sys
 import os
+import csv
+import json
+import tempfile
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from feedback_bayesian_classifier import FeedbackBayesianClassifier, generate_sample_training_data
+from feedback_streaming_trainer import train_from_files
+from feedback_benchmark import generate_feedback_corpus, benchmark_size
+from feedback_rescoring import FeedbackRescoringIndex
+from feedback_rollups import ALL_CATEGORIES, SentimentRollup
 
 def test_bayesian_classifier():
     """Test the Bayesian classifier with sample data"""
@@ -114,15 +121,16 @@ def test_bayesian_classifier():
     print(f"   Correct Predictions: {correct_predictions}/{total_predictions}")
     print(f"   Accuracy: {accuracy:.1f}%")
     
-    # Save the model
-    model_path = 'feedback_bayesian_model.json'
-    classifier.save_model(model_path)
-    print(f"\n💾 Model saved to: {model_path}")
-    
-    # Test loading the model
-    print("\n🔄 Testing model loading...")
-    new_classifier = FeedbackBayesianClassifier()
-    new_classifier.load_model(model_path)
+    # Save the model (to a scratch directory, leaving the committed model alone)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, 'feedback_bayesian_model.json')
+        classifier.save_model(model_path)
+        print(f"\n💾 Model saved to: {model_path}")
+        
+        # Test loading the model
+        print("\n🔄 Testing model loading...")
+        new_classifier = FeedbackBayesianClassifier()
+        new_classifier.load_model(model_path)
     
     # Test with a new prediction
     test_result = new_classifier.predict(
@@ -171,6 +179,259 @@ def test_api_integration():
     
     return classifier
 
+def test_streaming_trainer():
+    """Test that streaming, multi-process training matches in-memory training"""
+    print("\n📦 Testing Streaming Trainer:")
+    print("=" * 30)
+    
+    training_data = generate_sample_training_data()
+    reference = FeedbackBayesianClassifier()
+    reference.train(training_data)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        jsonl_path = os.path.join(tmp_dir, 'feedback.jsonl')
+        csv_path = os.path.join(tmp_dir, 'feedback.csv')
+        half = len(training_data) // 2
+        
+        with open(jsonl_path, 'w') as f:
+            for item in training_data[:half]:
+                f.write(json.dumps(item) + '\n')
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['feedback_text', 'rating', 'service_category', 'label'])
+            writer.writeheader()
+            writer.writerows(training_data[half:])
+        
+        streamed = train_from_files([jsonl_path, csv_path], workers=2, chunk_size=5)
+        
+        # mongoexport --jsonArray output streams element by element
+        array_path = os.path.join(tmp_dir, 'feedback.json')
+        with open(array_path, 'w') as f:
+            json.dump(training_data, f, indent=2)
+        from_array = train_from_files([array_path], workers=1, chunk_size=5)
+        assert from_array.class_counts == reference.class_counts
+        
+        with open(array_path, 'w') as f:
+            f.write(json.dumps(training_data)[:-20])
+        try:
+            train_from_files([array_path], workers=1)
+            assert False, "a truncated JSON array should be reported"
+        except ValueError as e:
+            assert 'JSON array' in str(e)
+    
+    assert streamed.total_documents == reference.total_documents
+    assert streamed.vocabulary == reference.vocabulary
+    assert streamed.class_counts == reference.class_counts
+    for label in ['positive', 'needs_improvement']:
+        assert dict(streamed.word_counts[label]) == dict(reference.word_counts[label])
+        assert dict(streamed.rating_counts[label]) == dict(reference.rating_counts[label])
+    
+    text = "Amazing staff, very professional and caring!"
+    assert streamed.predict(text, 5, 'staff') == reference.predict(text, 5, 'staff')
+    print(f"   Streamed {streamed.total_documents} documents across 2 workers ✅")
+
+def test_binary_model_format():
+    """Test that the binary model loads with identical predictions"""
+    print("\n💽 Testing Binary Model Format:")
+    print("=" * 30)
+    
+    classifier = FeedbackBayesianClassifier()
+    classifier.train(generate_sample_training_data())
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        binary_path = os.path.join(tmp_dir, 'feedback_bayesian_model.bin')
+        classifier.save_binary_model(binary_path)
+        
+        loaded = FeedbackBayesianClassifier()
+        loaded.load_binary_model(binary_path)
+        
+        assert len(loaded.vocabulary) == len(classifier.vocabulary)
+        assert loaded.word_totals == classifier.word_totals
+        for text, rating, category in [
+            ("Amazing staff, very professional and caring!", 5, 'staff'),
+            ("Food was cold and the room was dirty", 2, 'meal'),
+            ("unknownword only", 3, 'general'),
+        ]:
+            assert loaded.predict(text, rating, category) == classifier.predict(text, rating, category)
+        
+        # Lookups go through the mapped string table, including non-ASCII words
+        assert 'staff' in loaded.vocabulary and 'zzz-not-a-word' not in loaded.vocabulary
+        assert sorted(loaded.vocabulary) == sorted(classifier.vocabulary)
+        for label in ['positive', 'needs_improvement']:
+            assert all(loaded.word_counts[label][word] == classifier.word_counts[label][word]
+                       for word in classifier.vocabulary)
+        unicode_model = FeedbackBayesianClassifier()
+        unicode_model.train([{'feedback_text': 'café naïve über zebra apple', 'rating': 5,
+                              'service_category': 'meal', 'label': 'positive'}])
+        unicode_path = os.path.join(tmp_dir, 'unicode.bin')
+        unicode_model.save_binary_model(unicode_path)
+        mapped = FeedbackBayesianClassifier()
+        mapped.load_binary_model(unicode_path)
+        for word in unicode_model.vocabulary:
+            assert mapped.word_counts['positive'][word] == unicode_model.word_counts['positive'][word]
+        
+        # Reloading closes the previous memory map
+        first_buffer = mapped._mapped_buffer
+        mapped.load_binary_model(binary_path)
+        assert first_buffer.closed
+        
+        # A mapped model still exports to JSON for debugging
+        exported_path = os.path.join(tmp_dir, 'exported.json')
+        mapped.save_model(exported_path)
+        exported = FeedbackBayesianClassifier()
+        exported.load_model(exported_path)
+        assert exported.predict("Food was cold", 2, 'meal') == classifier.predict("Food was cold", 2, 'meal')
+        assert sorted(exported.vocabulary) == sorted(classifier.vocabulary)
+        
+        # Training on top of a mapped model copies the counts first
+        loaded.train([{'feedback_text': 'brand new words', 'rating': 4,
+                       'service_category': 'meal', 'label': 'positive'}])
+        assert 'brand' in loaded.vocabulary
+        assert loaded.total_documents == classifier.total_documents + 1
+        del loaded
+        
+        # A JSON-only save (older writers) makes the binary stale
+        from feedback_classification_api import _load_existing_model
+        from feedback_bayesian_classifier import binary_model_source, file_sha256
+        json_path = os.path.join(tmp_dir, 'model.json')
+        bin_path = os.path.join(tmp_dir, 'model.bin')
+        classifier.save_model(json_path)
+        assert binary_model_source(bin_path) == file_sha256(json_path)
+        
+        retrained = FeedbackBayesianClassifier()
+        retrained.train(generate_sample_training_data() + [
+            {'feedback_text': 'terrible awful', 'rating': 1, 'service_category': 'meal', 'label': 'needs_improvement'}
+        ])
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+        data['total_documents'] = retrained.total_documents
+        with open(json_path, 'w') as f:
+            json.dump(data, f)
+        assert binary_model_source(bin_path) != file_sha256(json_path)
+        
+        served = _load_existing_model(json_path, bin_path)
+        assert served.total_documents == retrained.total_documents
+        assert binary_model_source(bin_path) == file_sha256(json_path)
+    print(f"   Round-tripped {len(classifier.vocabulary)} words ✅")
+
+def test_prediction_cache():
+    """Test that repeated predictions hit the cache and retraining invalidates it"""
+    print("\n🗂️ Testing Prediction Cache:")
+    print("=" * 30)
+    
+    classifier = FeedbackBayesianClassifier(cache_size=2)
+    classifier.train(generate_sample_training_data())
+    
+    first = classifier.predict("Great food!", 5, 'meal')
+    first['probabilities']['positive'] = -1  # callers cannot corrupt the cache
+    second = classifier.predict("  great FOOD ", 5, 'meal')
+    assert second['probabilities']['positive'] != -1
+    assert classifier.cache_info()['hits'] == 1
+    
+    # Integer and float ratings map to different rating counts
+    classifier.predict("Great food!", 5.0, 'meal')
+    assert classifier.cache_info()['misses'] == 2
+    
+    # LRU eviction keeps the cache bounded
+    classifier.predict("Dirty facility", 1, 'facility')
+    assert classifier.cache_info()['size'] == 2
+    
+    classifier.train([{'feedback_text': 'great food but cold', 'rating': 5,
+                       'service_category': 'meal', 'label': 'needs_improvement'}])
+    after_retrain = classifier.predict("Great food!", 5, 'meal')
+    assert classifier.cache_info()['misses'] == 4
+    assert after_retrain == classifier._predict_uncached("Great food!", 5, 'meal')
+    print(f"   Cache info: {classifier.cache_info()} ✅")
+
+def test_synthetic_corpus_benchmark():
+    """Test the synthetic corpus generator and the benchmark harness"""
+    print("\n📏 Testing Synthetic Corpus Benchmark:")
+    print("=" * 30)
+    
+    assert list(generate_feedback_corpus(50, seed=7)) == list(generate_feedback_corpus(50, seed=7))
+    assert list(generate_feedback_corpus(50, seed=7)) != list(generate_feedback_corpus(50, seed=8))
+    
+    result = benchmark_size(10000, test_size=1000)
+    print(f"   {result}")
+    assert result['size'] == 10000
+    assert result['accuracy'] > 0.9
+    assert result['train_docs_per_second'] > 0
+
+def test_selective_rescoring():
+    """Test that selective re-scoring keeps every stored decision correct"""
+    print("\n♻️ Testing Selective Re-scoring:")
+    print("=" * 30)
+    
+    base_corpus = list(generate_feedback_corpus(5000, seed=1))
+    old_model = FeedbackBayesianClassifier()
+    old_model.train(base_corpus)
+    new_model = FeedbackBayesianClassifier()
+    new_model.train(base_corpus + list(generate_feedback_corpus(100, seed=2)))
+    
+    index = FeedbackRescoringIndex()
+    archive = list(generate_feedback_corpus(2000, seed=3))
+    for feedback_id, entry in enumerate(archive):
+        index.add(feedback_id, entry['feedback_text'], entry['rating'], entry['service_category'], old_model)
+    
+    results, summary = index.rescore(old_model, new_model)
+    print(f"   {summary}")
+    assert summary['rescored'] == len(results)
+    assert summary['rescored_fraction'] < 0.5
+    
+    for feedback_id, entry in enumerate(archive):
+        expected = new_model.predict(entry['feedback_text'], entry['rating'], entry['service_category'])
+        assert index.predicted_class(feedback_id) == expected['predicted_class']
+
+def test_sentiment_rollups():
+    """Test windowed per-category rollups against a full re-aggregation"""
+    print("\n📅 Testing Sentiment Rollups:")
+    print("=" * 30)
+    
+    classifier = FeedbackBayesianClassifier()
+    classifier.train(generate_sample_training_data())
+    rollup = SentimentRollup(classifier)
+    
+    entries = [
+        ('Food was cold and tasteless', 2, 'meal', '2024-03-04T09:00:00Z'),   # Monday
+        ('Delicious and healthy meals', 5, 'meal', '2024-03-04T12:30:00Z'),
+        ('Great activities, very fun', 5, 'activity', '2024-03-06T10:00:00Z'),
+        ('Meals are unhealthy', 1, 'Meal', '2024-03-10T18:00:00Z'),           # Sunday, same week
+        ('Terrible food quality', 1, 'meal', '2024-03-11T08:00:00Z'),         # next week
+    ]
+    results = [rollup.classify_and_add(*entry) for entry in entries]
+    
+    week = rollup.query('meal', 'week', '2024-03-07')
+    meal_week = [result for result, entry in zip(results, entries)
+                 if entry[2].lower() == 'meal' and entry[3] < '2024-03-11']
+    assert week['window_start'] == '2024-03-04'
+    assert week['total'] == len(meal_week) == 3
+    assert week['needs_improvement'] == sum(r['predicted_class'] == 'needs_improvement' for r in meal_week)
+    assert abs(week['mean_confidence'] - sum(r['confidence'] for r in meal_week) / 3) < 1e-12
+    
+    assert rollup.query('meal', 'day', '2024-03-04')['total'] == 2
+    assert rollup.query(ALL_CATEGORIES, 'week', '2024-03-04')['total'] == 4
+    assert rollup.query('safety', 'week', '2024-03-04')['total'] == 0
+    assert [row['window_start'] for row in rollup.series('meal', 'week')] == ['2024-03-04', '2024-03-11']
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'rollup.json')
+        rollup.save(path)
+        assert SentimentRollup.load(path).buckets == rollup.buckets
+    
+    # A category literally named 'all' is an ordinary category, counted once in the total
+    rollup.classify_and_add('Nice day overall', 4, 'all', '2024-03-05T09:00:00Z')
+    assert rollup.query(ALL_CATEGORIES, 'week', '2024-03-04')['total'] == 5
+    assert rollup.query('all', 'week', '2024-03-04')['total'] == 1
+    assert [row['total'] for row in rollup.series(ALL_CATEGORIES, 'week')] == [5, 1]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'rollup.json')
+        rollup.save(path)
+        assert SentimentRollup.load(path).buckets == rollup.buckets
+        assert SentimentRollup.load(path).query(ALL_CATEGORIES, 'week', '2024-03-04')['total'] == 5
+    
+    rollup.prune('2024-03-11')
+    assert rollup.query('meal', 'week', '2024-03-04')['total'] == 0
+    print(f"   {week} ✅")
+
 if __name__ == "__main__":
     try:
         # Test the classifier
@@ -179,6 +440,24 @@ if __name__ == "__main__":
         # Test API integration
         test_api_integration()
         
+        # Test streaming trainer
+        test_streaming_trainer()
+        
+        # Test binary model format
+        test_binary_model_format()
+        
+        # Test prediction cache
+        test_prediction_cache()
+        
+        # Test synthetic corpus benchmark
+        test_synthetic_corpus_benchmark()
+        
+        # Test selective re-scoring
+        test_selective_rescoring()
+        
+        # Test sentiment rollups
+        test_sentiment_rollups()
+        
     except Exception as e:
         print(f"❌ Error during testing: {e}")
         import traceback
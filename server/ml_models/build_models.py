@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Ahead-of-time model build
+Trains every served model into a new versioned artifact directory
+(artifacts/<version>/<model>/), validates each one by loading it back the
+way the serving code does, and writes a manifest with file checksums and
+validation metrics. Request paths never train; a validated build is put
+into service with `promote`, which copies its files into the directories
+the APIs read from. Each file is replaced atomically but the set is not:
+stop (or drain) the serving processes while promoting, or a request may
+load one model's new pickle next to another file from the old version.
+
+Usage:
+    python build_models.py [--version V] [--only meal,purchase_svm,...] [--promote]
+    python build_models.py promote <version>
+    python build_models.py list
+"""
+
+import sys
+import os
+import json
+import shutil
+import contextlib
+import importlib.util
+from datetime import datetime
+import numpy as np
+from shared_model_files import file_sha256
+from shared_model_files import atomic_write
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+FEEDBACK_DIR = os.path.join(os.path.dirname(os.path.dirname(MODEL_DIR)), 'ml_models')
+ARTIFACTS_DIR = os.path.join(MODEL_DIR, 'artifacts')
+CURRENT_FILE = 'CURRENT.json'
+
+# Where each model's promoted files are served from
+SERVING_DIRS = {
+    'meal': MODEL_DIR,
+    'purchase_svm': MODEL_DIR,
+    'product_svm': MODEL_DIR,
+    'demand_bpnn': MODEL_DIR,
+    'feedback': FEEDBACK_DIR
+}
+
+def _load_module(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _check(condition, message):
+    if not condition:
+        raise ValueError(f'Validation failed: {message}')
+
+def build_meal(output_dir):
+    """Meal decision tree, its compiled rules and the precomputed answer table"""
+    from meal_decision_tree import MealDecisionTree
+    from meal_recommender import answer_key, load_answer_table
+
+    meal_tree = MealDecisionTree()
+    accuracy = meal_tree.train_model()
+    model_path = os.path.join(output_dir, 'meal_decision_tree_model.pkl')
+    meal_tree.save_model(model_path)
+
+    rules = _load_module(os.path.join(output_dir, 'meal_tree_rules.py'), 'built_meal_tree_rules')
+    answers = load_answer_table(os.path.join(output_dir, 'meal_answers.json'), model_path)
+    _check(rules.SOURCE_MODEL_SHA256 == file_sha256(model_path), 'compiled meal rules do not match the pickle')
+    _check(answers is not None, 'meal answer table does not match the pickle')
+
+    served = MealDecisionTree()
+    served.load_model(model_path)
+    for age in range(1, 7):
+        for diet in [0, 1]:
+            for allergy in [0, 1]:
+                prediction = served.predict_meal(age, diet, allergy)['prediction']
+                _check(rules.predict(age, diet, allergy) == prediction, f'compiled rules differ at {age},{diet},{allergy}')
+                _check(answers[answer_key(age, diet, allergy)]['prediction'] == prediction,
+                       f'answer table differs at {age},{diet},{allergy}')
+
+    files = ['meal_decision_tree_model.pkl', 'meal_tree_rules.py', 'meal_answers.json']
+    return files, {'test_accuracy': float(accuracy), 'answers': len(answers)}
+
+def build_purchase_svm(output_dir):
+    """Purchase prediction SVM (purchase_prediction_svm.py)"""
+    from purchase_prediction_svm import generate_training_data, train_svm_model, predict_purchase
+
+    svm_model, scaler = train_svm_model(output_dir)
+    X, y = generate_training_data()
+
+    result = predict_purchase('toy', 40, 20, 'parent', model_dir=output_dir)
+    expected = svm_model.predict_proba(scaler.transform(np.array([[0, 40.0, 20.0, 0]])))[0]
+    _check(np.isclose(result['probability_yes'], expected[1]), 'saved purchase SVM does not reproduce the trained one')
+
+    accuracy = float(svm_model.score(scaler.transform(X), y))
+    return ['purchase_svm_model.pkl', 'purchase_svm_scaler.pkl'], {'train_accuracy': accuracy}
+
+def build_product_svm(output_dir):
+    """Product purchase SVM with its label encoders (product_purchase_svm.py)"""
+    from product_purchase_svm import train_model, training_data
+    from reduced_precision import load_svm_artifacts
+
+    result = train_model(output_dir)
+    _check(result['success'], result.get('error', 'product SVM training failed'))
+
+    svm_model, scaler, label_encoders = load_svm_artifacts(output_dir)
+    X = np.array([
+        [label_encoders['category'].transform([category])[0], price, discount,
+         label_encoders['customer_type'].transform([customer_type])[0]]
+        for category, price, discount, customer_type, _ in training_data
+    ], dtype=float)
+    probabilities = svm_model.predict_proba(scaler.transform(X))
+    _check(np.allclose(probabilities.sum(axis=1), 1.0), 'product SVM probabilities do not sum to one')
+
+    accuracy = float(np.mean(svm_model.classes_[probabilities.argmax(axis=1)] == [row[4] for row in training_data]))
+    return ['svm_model.pkl', 'svm_scaler.pkl', 'svm_encoders.pkl'], {
+        'test_accuracy': float(result['accuracy']), 'train_accuracy': accuracy
+    }
+
+def build_demand_bpnn(output_dir):
+    """Demand BPNN pickles and the NumPy serving bundle"""
+    from demand_bpnn import train_model, training_data, encode_training_rows, load_artifacts, predict_proba_matrix
+    from demand_bpnn_numpy import NumpyDemandPredictor
+
+    result = train_model(output_dir)
+    _check(result['success'], result.get('error', 'demand BPNN training failed'))
+
+    bpnn_model, scaler, _, demand_encoder = load_artifacts(output_dir)
+    X, _, _, _ = encode_training_rows(training_data)
+    labels, probabilities, _ = predict_proba_matrix(X, bpnn_model, scaler, demand_encoder)
+    bundle = NumpyDemandPredictor(os.path.join(output_dir, 'bpnn_bundle.npz'))
+    drift = float(np.abs(bundle.predict_proba(X) - probabilities).max())
+    _check(drift < 1e-9, f'NumPy bundle drifts from the network by {drift}')
+
+    accuracy = float(np.mean(labels == [row[4] for row in training_data]))
+    files = ['bpnn_model.pkl', 'bpnn_scaler.pkl', 'bpnn_product_encoder.pkl', 'bpnn_demand_encoder.pkl',
+             'bpnn_bundle.npz']
+    return files, {'test_accuracy': float(result['accuracy']), 'train_accuracy': accuracy, 'bundle_drift': drift}
+
+def build_feedback(output_dir):
+    """Bayesian feedback classifier, JSON and binary formats"""
+    if FEEDBACK_DIR not in sys.path:
+        sys.path.append(FEEDBACK_DIR)
+    from feedback_classification_api import build_model
+    from feedback_bayesian_classifier import FeedbackBayesianClassifier, generate_sample_training_data
+
+    model_path = os.path.join(output_dir, 'feedback_bayesian_model.json')
+    classifier = build_model(model_path)
+
+    samples = generate_sample_training_data()
+    loaded = FeedbackBayesianClassifier()
+    loaded.load_binary_model(os.path.join(output_dir, 'feedback_bayesian_model.bin'))
+    correct = 0
+    for sample in samples:
+        expected = classifier.predict(sample['feedback_text'], sample['rating'], sample['service_category'])
+        actual = loaded.predict(sample['feedback_text'], sample['rating'], sample['service_category'])
+        _check(actual['predicted_class'] == expected['predicted_class'], 'binary feedback model differs from the trained one')
+        correct += actual['predicted_class'] == sample['label']
+
+    files = ['feedback_bayesian_model.json', 'feedback_bayesian_model.meta.json', 'feedback_bayesian_model.bin']
+    return files, {'train_accuracy': correct / len(samples), 'vocabulary_size': len(classifier.vocabulary)}
+
+BUILDERS = {
+    'meal': build_meal,
+    'purchase_svm': build_purchase_svm,
+    'product_svm': build_product_svm,
+    'demand_bpnn': build_demand_bpnn,
+    'feedback': build_feedback
+}
+
+def build_all(version=None, models=None, artifacts_dir=ARTIFACTS_DIR):
+    """
+    Train and validate models into artifacts_dir/<version>.
+
+    The build happens in a staging directory that is renamed into place only
+    when every model validated, so a version directory is always complete.
+
+    Returns:
+        dict: the manifest (version, build time, per-model files with sha256 and metrics)
+    """
+    version = version or datetime.now().strftime('%Y%m%d-%H%M%S')
+    models = list(models or BUILDERS)
+    unknown = [name for name in models if name not in BUILDERS]
+    if unknown:
+        raise ValueError(f'Unknown models: {", ".join(unknown)}')
+
+    version_dir = os.path.join(artifacts_dir, version)
+    if os.path.exists(version_dir):
+        raise FileExistsError(f'Artifact version {version} already exists')
+    staging_dir = version_dir + '.partial'
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    manifest = {'version': version, 'built_at': datetime.now().isoformat(), 'models': {}}
+    try:
+        for name in models:
+            output_dir = os.path.join(staging_dir, name)
+            os.makedirs(output_dir)
+            with contextlib.redirect_stdout(sys.stderr):
+                files, metrics = BUILDERS[name](output_dir)
+            manifest['models'][name] = {
+                'files': {filename: file_sha256(os.path.join(output_dir, filename)) for filename in files},
+                'metrics': metrics
+            }
+
+        with open(os.path.join(staging_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(staging_dir, version_dir)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    return manifest
+
+def read_manifest(version, artifacts_dir=ARTIFACTS_DIR):
+    with open(os.path.join(artifacts_dir, version, 'manifest.json'), 'r') as f:
+        return json.load(f)
+
+def promote(version, artifacts_dir=ARTIFACTS_DIR, serving_dirs=None):
+    """
+    Install a built version into the serving directories.
+
+    Checksums are verified first; each file is then replaced atomically,
+    one at a time, so serving must be quiesced until this returns.
+    CURRENT.json is written last and names the version only once every
+    file is installed. The demand model's serving grid is rebuilt if one
+    is in use.
+
+    Returns:
+        list: installed file paths
+    """
+    serving_dirs = {**SERVING_DIRS, **(serving_dirs or {})}
+    manifest = read_manifest(version, artifacts_dir)
+    version_dir = os.path.join(artifacts_dir, version)
+
+    for name, model in manifest['models'].items():
+        for filename, sha256 in model['files'].items():
+            if file_sha256(os.path.join(version_dir, name, filename)) != sha256:
+                raise ValueError(f'Checksum mismatch for {name}/{filename} in version {version}')
+
+    installed = []
+    for name, model in manifest['models'].items():
+        target_dir = serving_dirs[name]
+        os.makedirs(target_dir, exist_ok=True)
+        for filename in model['files']:
+            target = os.path.join(target_dir, filename)
+            with open(os.path.join(version_dir, name, filename), 'rb') as source, atomic_write(target, 'wb') as f:
+                shutil.copyfileobj(source, f)
+            installed.append(target)
+
+        if name == 'demand_bpnn':
+            from demand_bpnn import refresh_serving_artifacts
+            with contextlib.redirect_stdout(sys.stderr):
+                refresh_serving_artifacts(target_dir)
+
+    with atomic_write(os.path.join(artifacts_dir, CURRENT_FILE), 'w') as f:
+        json.dump({'version': version, 'promoted_at': datetime.now().isoformat(),
+                   'models': sorted(manifest['models'])}, f, indent=2)
+    return installed
+
+def list_versions(artifacts_dir=ARTIFACTS_DIR):
+    """Built versions (oldest first) and the promoted one"""
+    if not os.path.isdir(artifacts_dir):
+        return [], None
+    versions = sorted(
+        entry for entry in os.listdir(artifacts_dir)
+        if os.path.exists(os.path.join(artifacts_dir, entry, 'manifest.json'))
+    )
+    current = None
+    if os.path.exists(os.path.join(artifacts_dir, CURRENT_FILE)):
+        with open(os.path.join(artifacts_dir, CURRENT_FILE), 'r') as f:
+            current = json.load(f)['version']
+    return versions, current
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    try:
+        if args[:1] == ['promote']:
+            if len(args) < 2:
+                raise ValueError('Missing version to promote')
+            installed = promote(args[1])
+            print(json.dumps({'success': True, 'version': args[1], 'installed': installed}))
+        elif args[:1] == ['list']:
+            versions, current = list_versions()
+            print(json.dumps({'success': True, 'versions': versions, 'current': current}))
+        else:
+            version = args[args.index('--version') + 1] if '--version' in args else None
+            models = args[args.index('--only') + 1].split(',') if '--only' in args else None
+            manifest = build_all(version, models)
+            if '--promote' in args:
+                promote(manifest['version'])
+            print(json.dumps({
+                'success': True,
+                'version': manifest['version'],
+                'promoted': '--promote' in args,
+                'metrics': {name: model['metrics'] for name, model in manifest['models'].items()}
+            }))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
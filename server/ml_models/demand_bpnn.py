@@ -11,11 +11,27 @@ import sys
 import json
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.neural_network import MLPClassifier
 import pickle
 import os
+import copy
+import time
+import itertools
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+from demand_bpnn_numpy import (
+    FEATURE_COLUMNS, TYPE_MODELS_DIRNAME, DemandModelRouter, NumpyDemandPredictor, encode_products
+)
+from shared_model_files import atomic_write
+from demand_grid import DemandGrid, build_grid
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fields every retraining sales record must carry
+SALES_RECORD_FIELDS = ('product_type', 'previous_sales', 'delivery_time', 'price', 'demand')
 
 # Sample training data
 training_data = [
@@ -70,7 +86,7 @@ training_data = [
     ['Footwear', 18, 3, 850, 'Medium'],
 ]
 
-def train_model():
+def train_model(model_dir=MODEL_DIR):
     """Train the BPNN model"""
     try:
         # Create DataFrame
@@ -117,19 +133,7 @@ def train_model():
         accuracy = bpnn.score(X_test, y_test)
         
         # Save model and encoders
-        model_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        with open(os.path.join(model_dir, 'bpnn_model.pkl'), 'wb') as f:
-            pickle.dump(bpnn, f)
-        
-        with open(os.path.join(model_dir, 'bpnn_scaler.pkl'), 'wb') as f:
-            pickle.dump(scaler, f)
-        
-        with open(os.path.join(model_dir, 'bpnn_product_encoder.pkl'), 'wb') as f:
-            pickle.dump(le_product, f)
-        
-        with open(os.path.join(model_dir, 'bpnn_demand_encoder.pkl'), 'wb') as f:
-            pickle.dump(le_demand, f)
+        save_artifacts(model_dir, bpnn, scaler, le_product, le_demand)
         
         result = {
             'success': True,
@@ -157,19 +161,7 @@ def predict(data):
         price = float(data.get('price', 300))
         
         # Load model
-        model_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        with open(os.path.join(model_dir, 'bpnn_model.pkl'), 'rb') as f:
-            bpnn_model = pickle.load(f)
-        
-        with open(os.path.join(model_dir, 'bpnn_scaler.pkl'), 'rb') as f:
-            scaler = pickle.load(f)
-        
-        with open(os.path.join(model_dir, 'bpnn_product_encoder.pkl'), 'rb') as f:
-            product_encoder = pickle.load(f)
-        
-        with open(os.path.join(model_dir, 'bpnn_demand_encoder.pkl'), 'rb') as f:
-            demand_encoder = pickle.load(f)
+        bpnn_model, scaler, product_encoder, demand_encoder = load_artifacts()
         
         # Prepare input
         X_input = pd.DataFrame({
@@ -224,6 +216,627 @@ def predict(data):
         print(json.dumps(error))
         return error
 
+def save_artifacts(model_dir, bpnn_model, scaler, product_encoder, demand_encoder):
+    """Save the network, scaler and encoders (each replaced atomically), then refresh the sklearn-free copies"""
+    artifacts = [bpnn_model, scaler, product_encoder, demand_encoder]
+    for name, artifact in zip(['bpnn_model.pkl', 'bpnn_scaler.pkl', 'bpnn_product_encoder.pkl',
+                               'bpnn_demand_encoder.pkl'], artifacts):
+        with atomic_write(os.path.join(model_dir, name), 'wb') as f:
+            pickle.dump(artifact, f)
+    
+    # Plain-array copy for sklearn-free inference
+    refresh_serving_artifacts(model_dir)
+
+def load_artifacts(model_dir=MODEL_DIR):
+    """Load the trained network, scaler and encoders"""
+    artifacts = []
+    for name in ['bpnn_model.pkl', 'bpnn_scaler.pkl', 'bpnn_product_encoder.pkl', 'bpnn_demand_encoder.pkl']:
+        with open(os.path.join(model_dir, name), 'rb') as f:
+            artifacts.append(pickle.load(f))
+    return tuple(artifacts)
+
+def scale_features(scaler, features):
+    """Apply the fitted scaler to a FEATURE_COLUMNS-ordered matrix"""
+    if hasattr(scaler, 'feature_names_in_'):
+        # Fitted on a DataFrame (train_model): pass the same column names
+        features = pd.DataFrame(features, columns=FEATURE_COLUMNS)
+    return scaler.transform(features)
+
+def predict_proba_matrix(features, bpnn_model, scaler, demand_encoder):
+    """Scale a feature matrix and return (demand labels, probability matrix, class names)"""
+    class_names = demand_encoder.inverse_transform(bpnn_model.classes_)
+    if len(features) == 0:
+        return class_names[:0], np.zeros((0, len(class_names))), class_names
+    
+    X_scaled = scale_features(scaler, features)
+    probabilities = bpnn_model.predict_proba(X_scaled)
+    labels = class_names[probabilities.argmax(axis=1)]
+    return labels, probabilities, class_names
+
+def export_numpy_bundle(model_dir=MODEL_DIR, bundle_path=None):
+    """Export weights, scaler statistics and encoder classes for demand_bpnn_numpy"""
+    bpnn_model, scaler, product_encoder, demand_encoder = load_artifacts(model_dir)
+    bundle_path = bundle_path or os.path.join(model_dir, 'bpnn_bundle.npz')
+    
+    arrays = bundle_arrays(bpnn_model, scaler, product_encoder.classes_,
+                           demand_encoder.inverse_transform(bpnn_model.classes_))
+    with atomic_write(bundle_path, 'wb') as f:
+        np.savez(f, **arrays)
+    return bundle_path
+
+def bundle_arrays(bpnn_model, scaler, product_classes, class_names):
+    """Arrays of a NumPy bundle (the format NumpyDemandPredictor loads)"""
+    arrays = {
+        'n_layers': np.array(len(bpnn_model.coefs_)),
+        'scaler_mean': scaler.mean_,
+        'scaler_scale': scaler.scale_,
+        'product_classes': np.asarray(product_classes).astype(str),
+        'class_names': np.asarray(class_names).astype(str),
+        'activation': np.array(bpnn_model.activation),
+        'out_activation': np.array(bpnn_model.out_activation_)
+    }
+    for i, (coef, intercept) in enumerate(zip(bpnn_model.coefs_, bpnn_model.intercepts_)):
+        arrays[f'coef_{i}'] = coef
+        arrays[f'intercept_{i}'] = intercept
+    return arrays
+
+def refresh_serving_artifacts(model_dir=MODEL_DIR):
+    """Re-export the NumPy bundle, and rebuild the lookup grid if one is in use; returns the bundle path"""
+    bundle_path = export_numpy_bundle(model_dir)
+    grid_path = os.path.join(model_dir, 'bpnn_grid.npz')
+    if os.path.exists(grid_path):
+        with np.load(grid_path) as grid:
+            spec = dict(zip(['previous_sales', 'delivery_time', 'price'], grid['spec'].tolist()))
+        build_grid(bundle_path, grid_path, spec)
+    return bundle_path
+
+def read_sales_records(paths, known_types, known_demands):
+    """
+    Read monthly sales records (JSON lines) for retraining.
+    
+    Each line needs product_type, previous_sales, delivery_time, price and
+    the observed demand class. Malformed or incomplete lines and product
+    types or demand classes the fitted encoders do not know are skipped.
+    
+    Returns:
+        tuple: (features array, demand labels array, skipped count)
+    """
+    products = []
+    demands = []
+    skipped = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    skipped += 1
+                    continue
+                if (not isinstance(record, dict)
+                        or any(field not in record for field in SALES_RECORD_FIELDS)
+                        or record['demand'] not in known_demands):
+                    skipped += 1
+                    continue
+                products.append(record)
+                demands.append(record['demand'])
+    
+    features, _, errors = encode_products(products, known_types)
+    valid = np.array([error is None for error in errors], dtype=bool)
+    skipped += int((~valid).sum())
+    return features[valid], np.array(demands, dtype=object)[valid], skipped
+
+def retrain_model(paths, model_dir=MODEL_DIR, holdout_fraction=0.2, max_epochs=200, patience=10,
+                  random_state=42):
+    """
+    Continue training the saved network on new monthly sales records.
+    
+    The scaler and encoders stay fixed so the existing weights remain valid.
+    The new records (plus the seed training data, so older patterns are not
+    forgotten) are fed through partial_fit one epoch at a time; training
+    stops once accuracy on a held-out slice of the new records has not
+    improved for `patience` epochs, and the best epoch's weights are kept.
+    """
+    try:
+        start = time.perf_counter()
+        bpnn_model, scaler, product_encoder, demand_encoder = load_artifacts(model_dir)
+        
+        features, demands, skipped = read_sales_records(
+            paths, product_encoder.classes_, set(demand_encoder.classes_)
+        )
+        if len(features) < 2:
+            raise ValueError(f'Not enough valid sales records to retrain ({len(features)} found)')
+        
+        X_new = scale_features(scaler, features)
+        y_new = demand_encoder.transform(demands)
+        X_train, X_holdout, y_train, y_holdout = train_test_split(
+            X_new, y_new, test_size=holdout_fraction, random_state=random_state
+        )
+        
+        seed_rows = np.array([row[:4] for row in training_data], dtype=object)
+        seed_features = np.column_stack([
+            seed_rows[:, 1:4].astype(float), product_encoder.transform(seed_rows[:, 0])
+        ])
+        X_train = np.vstack([X_train, scale_features(scaler, seed_features)])
+        y_train = np.concatenate([y_train, demand_encoder.transform([row[4] for row in training_data])])
+        
+        initial_accuracy = bpnn_model.score(X_holdout, y_holdout)
+        best_accuracy = initial_accuracy
+        best_model = copy.deepcopy(bpnn_model)
+        best_epoch = 0
+        rng = np.random.RandomState(random_state)
+        
+        epoch = 0
+        for epoch in range(1, max_epochs + 1):
+            order = rng.permutation(len(X_train))
+            bpnn_model.partial_fit(X_train[order], y_train[order], classes=bpnn_model.classes_)
+            accuracy = bpnn_model.score(X_holdout, y_holdout)
+            if accuracy > best_accuracy:
+                best_accuracy = accuracy
+                best_model = copy.deepcopy(bpnn_model)
+                best_epoch = epoch
+            elif epoch - best_epoch >= patience:
+                break
+        
+        # Swap the model in atomically, then refresh the NumPy bundle
+        model_path = os.path.join(model_dir, 'bpnn_model.pkl')
+        with atomic_write(model_path, 'wb') as f:
+            pickle.dump(best_model, f)
+        refresh_serving_artifacts(model_dir)
+        
+        result = {
+            'success': True,
+            'records': int(len(features)),
+            'skipped': skipped,
+            'holdout_size': int(len(X_holdout)),
+            'epochs': epoch,
+            'best_epoch': best_epoch,
+            'initial_accuracy': initial_accuracy,
+            'accuracy': best_accuracy,
+            'seconds': round(time.perf_counter() - start, 3),
+            'message': f'BPNN model retrained on {len(features)} records with {best_accuracy*100:.2f}% holdout accuracy'
+        }
+        
+        print(json.dumps(result))
+        return result
+        
+    except Exception as e:
+        error = {
+            'success': False,
+            'error': str(e)
+        }
+        print(json.dumps(error))
+        return error
+
+# Candidates for search_hyperparameters(); every combination is tried unless n_iter is given
+SEARCH_GRID = {
+    'hidden_layer_sizes': [(50,), (100,), (64, 32), (100, 50)],
+    'alpha': [0.0001, 0.001, 0.01, 0.1]
+}
+
+_search_folds = None
+
+def encode_training_rows(rows):
+    """Encode [product_type, previous_sales, delivery_time, price, demand] rows (FEATURE_COLUMNS order)"""
+    le_product = LabelEncoder()
+    le_demand = LabelEncoder()
+    product_types = le_product.fit_transform([row[0] for row in rows])
+    X = np.column_stack([np.array([row[1:4] for row in rows], dtype=float), product_types])
+    y = le_demand.fit_transform([row[4] for row in rows])
+    return X, y, le_product, le_demand
+
+def build_folds(X, y, folds=5, random_state=42):
+    """Stratified folds, each scaled with statistics of its own training part"""
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state)
+    cached = []
+    for train_index, test_index in splitter.split(X, y):
+        scaler = StandardScaler().fit(X[train_index])
+        cached.append((scaler.transform(X[train_index]), y[train_index],
+                       scaler.transform(X[test_index]), y[test_index]))
+    return cached
+
+def _init_search_worker(folds):
+    global _search_folds
+    _search_folds = folds
+
+def _make_network(params, random_state=42):
+    return MLPClassifier(
+        hidden_layer_sizes=tuple(params['hidden_layer_sizes']),
+        activation='relu',
+        solver='adam',
+        alpha=params['alpha'],
+        learning_rate='adaptive',
+        max_iter=params.get('max_iter', 1000),
+        random_state=random_state
+    )
+
+def _evaluate_candidate(params):
+    """Cross-validate one candidate on the worker's cached folds"""
+    scores = []
+    start = time.perf_counter()
+    for X_train, y_train, X_test, y_test in _search_folds:
+        scores.append(_make_network(params).fit(X_train, y_train).score(X_test, y_test))
+    seconds = time.perf_counter() - start
+    return {
+        'hidden_layer_sizes': list(params['hidden_layer_sizes']),
+        'alpha': params['alpha'],
+        'mean_accuracy': float(np.mean(scores)),
+        'std_accuracy': float(np.std(scores)),
+        'fit_seconds': round(seconds / len(scores), 4)
+    }
+
+# search_hyperparameters arguments the CLI accepts
+SEARCH_OPTIONS = ('param_grid', 'folds', 'n_iter', 'workers')
+
+def search_hyperparameters(param_grid=None, folds=5, n_iter=None, workers=None, model_dir=MODEL_DIR,
+                           rows=None, random_state=42):
+    """
+    Grid or random search over architecture and regularization with k-fold CV.
+    
+    The training rows are encoded and every fold is scaled once; the cached
+    folds are shipped to each worker process a single time and reused for
+    every candidate. The best candidate (highest mean accuracy, then fastest)
+    is refitted on all rows and saved like train_model, and the full
+    timing/accuracy table is written to bpnn_search_results.json.
+    """
+    try:
+        start = time.perf_counter()
+        rows = rows if rows is not None else training_data
+        param_grid = dict(SEARCH_GRID, **(param_grid or {}))
+        
+        names = sorted(param_grid)
+        candidates = [dict(zip(names, values)) for values in itertools.product(*(param_grid[n] for n in names))]
+        if n_iter is not None and n_iter < len(candidates):
+            candidates = random.Random(random_state).sample(candidates, n_iter)
+        
+        X, y, le_product, le_demand = encode_training_rows(rows)
+        cached_folds = build_folds(X, y, folds, random_state)
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+                                 initargs=(cached_folds,)) as executor:
+            table = list(executor.map(_evaluate_candidate, candidates))
+        table.sort(key=lambda row: (-row['mean_accuracy'], row['fit_seconds']))
+        best = table[0]
+        
+        scaler = StandardScaler().fit(X)
+        bpnn = _make_network(best, random_state).fit(scaler.transform(X), y)
+        save_artifacts(model_dir, bpnn, scaler, le_product, le_demand)
+        
+        with open(os.path.join(model_dir, 'bpnn_search_results.json'), 'w') as f:
+            json.dump(table, f, indent=2)
+        
+        result = {
+            'success': True,
+            'best': best,
+            'candidates': len(table),
+            'folds': folds,
+            'seconds': round(time.perf_counter() - start, 3),
+            'results': table,
+            'message': (f"Best BPNN {tuple(best['hidden_layer_sizes'])}, alpha={best['alpha']} "
+                        f"with {best['mean_accuracy']*100:.2f}% cross-validated accuracy")
+        }
+        
+        print(json.dumps(result))
+        return result
+        
+    except Exception as e:
+        error = {
+            'success': False,
+            'error': str(e)
+        }
+        print(json.dumps(error))
+        return error
+
+def parse_search_options(text):
+    """Options for search_hyperparameters from a CLI JSON object; raises ValueError if invalid"""
+    options = json.loads(text) if text else {}
+    if not isinstance(options, dict):
+        raise ValueError('Search options must be a JSON object')
+    unknown = sorted(set(options) - set(SEARCH_OPTIONS))
+    if unknown:
+        raise ValueError(f"Unknown search options: {', '.join(unknown)} (allowed: {', '.join(SEARCH_OPTIONS)})")
+    return options
+
+def predict_batch(products, output=None, model_dir=MODEL_DIR, engine='sklearn', precision='float64'):
+    """
+    Predict demand for many products with one forward pass.
+    
+    Writes one JSON line per product (same fields as predict, plus
+    per-class probabilities) to `output` when given. engine='numpy' runs
+    the exported bundle instead of the pickled sklearn network, with
+    float64, float32 or int8-quantized weights (see reduced_precision.py
+    for the drift report). engine='grid' looks predictions up in the
+    precomputed demand grid, which must already be built (demand_grid.py
+    build or the build_grid action).
+    engine='per_type' routes each row to its product type's model
+    (train_type_models) with the global network as fallback.
+    
+    Returns:
+        list: per-product result dicts in input order
+    """
+    if engine == 'grid':
+        grid_path = os.path.join(model_dir, 'bpnn_grid.npz')
+        bundle_path = os.path.join(model_dir, 'bpnn_bundle.npz')
+        if not os.path.exists(grid_path):
+            raise FileNotFoundError(f'Demand grid not built: {grid_path} (run demand_grid.py build)')
+        grid = DemandGrid(grid_path, bundle_path)
+        labels, probabilities, factors, errors = grid.predict_products(products)
+        class_names = grid.class_names
+    elif engine == 'per_type':
+        router = DemandModelRouter(model_dir)
+        labels, probabilities, factors, errors = router.predict_products(products)
+        class_names = router.class_names
+    elif engine == 'numpy':
+        predictor = NumpyDemandPredictor(os.path.join(model_dir, 'bpnn_bundle.npz'), precision)
+        labels, probabilities, factors, errors = predictor.predict_products(products)
+        class_names = predictor.class_names
+    else:
+        bpnn_model, scaler, product_encoder, demand_encoder = load_artifacts(model_dir)
+        features, factors, errors = encode_products(products, product_encoder.classes_)
+        
+        valid = np.array([error is None for error in errors], dtype=bool)
+        labels, probabilities, class_names = predict_proba_matrix(
+            features[valid], bpnn_model, scaler, demand_encoder
+        )
+    
+    results = []
+    row = 0
+    for factor, error in zip(factors, errors):
+        if error is not None:
+            result = {
+                'success': False,
+                'error': error,
+                'prediction': 'Medium',  # Fallback
+                'confidence': 0.65,
+                'explanation': 'Default prediction based on heuristics'
+            }
+        else:
+            prediction = str(labels[row])
+            confidence = float(probabilities[row].max())
+            result = {
+                'success': True,
+                'prediction': prediction,
+                'confidence': confidence,
+                'probabilities': {str(name): float(p) for name, p in zip(class_names, probabilities[row])},
+                'explanation': generate_explanation(
+                    factor['product_type'], factor['previous_sales'], factor['delivery_time'],
+                    factor['price'], prediction, confidence
+                ),
+                'factors': factor
+            }
+            row += 1
+        
+        results.append(result)
+        if output is not None:
+            output.write(json.dumps(result) + '\n')
+    
+    return results
+
+def _make_type_network(params):
+    return MLPClassifier(
+        hidden_layer_sizes=tuple(params.get('hidden_layer_sizes', (16,))),
+        activation='relu',
+        solver='lbfgs',  # full-batch solver suits a handful of rows
+        alpha=params.get('alpha', 0.01),
+        max_iter=params.get('max_iter', 2000),
+        random_state=42
+    )
+
+def _fit_type_model(task):
+    """Train one product type's network (runs in a worker process)"""
+    product_type, X, y, product_classes, params = task
+    start = time.perf_counter()
+    
+    le_demand = LabelEncoder()
+    y_encoded = le_demand.fit_transform(y)
+    if len(le_demand.classes_) < 2:
+        return {'product_type': product_type, 'rows': len(y), 'error': 'Only one demand class in training data'}
+    
+    # Cross-validate with as many folds as the rarest class allows, up to `folds`
+    folds = min(params.get('folds', 3), int(np.bincount(y_encoded).min()))
+    cv_scores = [
+        _make_type_network(params).fit(X_train, y_train).score(X_test, y_test)
+        for X_train, y_train, X_test, y_test in (build_folds(X, y_encoded, folds) if folds >= 2 else [])
+    ]
+    
+    scaler = StandardScaler().fit(X)
+    bpnn = _make_type_network(params).fit(scaler.transform(X), y_encoded)
+    
+    return {
+        'product_type': product_type,
+        'rows': len(y),
+        'classes': [str(name) for name in le_demand.classes_],
+        'cv_folds': len(cv_scores),
+        'cv_accuracy': float(np.mean(cv_scores)) if cv_scores else None,
+        'training_accuracy': float(bpnn.score(scaler.transform(X), y_encoded)),
+        'fit_seconds': round(time.perf_counter() - start, 4),
+        'arrays': bundle_arrays(bpnn, scaler, product_classes, le_demand.classes_)
+    }
+
+def type_model_filename(product_type, taken=()):
+    """Bundle filename for a product type: its name with unsafe characters replaced"""
+    stem = 'type_' + (re.sub(r'[^A-Za-z0-9_-]+', '_', product_type).strip('_') or 'unnamed')
+    filename, suffix = stem + '.npz', 1
+    while filename in taken:
+        suffix += 1
+        filename = f'{stem}_{suffix}.npz'
+    return filename
+
+def train_type_models(rows=None, model_dir=MODEL_DIR, workers=None, params=None):
+    """
+    Train one small network per product type, concurrently across cores.
+    
+    Each type's network sees only its own rows (the product type column is
+    constant there and scales to zero), uses the global model's product
+    encoding, and is saved as a NumPy bundle under bpnn_types/ with a
+    manifest. DemandModelRouter dispatches predictions to these models and
+    falls back to the global network for types without one.
+    
+    Bundles are named after their product type and replaced atomically,
+    the manifest is replaced last, and bundles it no longer lists are
+    removed. cv_accuracy is the k-fold accuracy on the type's own rows
+    (None when a class has fewer than two rows).
+    """
+    try:
+        start = time.perf_counter()
+        rows = rows if rows is not None else training_data
+        product_classes = NumpyDemandPredictor(os.path.join(model_dir, 'bpnn_bundle.npz')).product_classes
+        
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row[0], []).append(row)
+        
+        tasks = []
+        for product_type, type_rows in sorted(grouped.items()):
+            features, _, errors = encode_products([
+                {'product_type': r[0], 'previous_sales': r[1], 'delivery_time': r[2], 'price': r[3]}
+                for r in type_rows
+            ], product_classes)
+            if errors[0] is not None:
+                raise ValueError(errors[0])
+            tasks.append((product_type, features, [r[4] for r in type_rows], product_classes, params or {}))
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            trained = list(executor.map(_fit_type_model, tasks))
+        
+        types_dir = os.path.join(model_dir, TYPE_MODELS_DIRNAME)
+        os.makedirs(types_dir, exist_ok=True)
+        manifest = {}
+        for model in trained:
+            if 'arrays' not in model:
+                continue
+            filename = type_model_filename(model['product_type'], set(manifest.values()))
+            with atomic_write(os.path.join(types_dir, filename), 'wb') as f:
+                np.savez(f, **model.pop('arrays'))
+            manifest[model['product_type']] = filename
+        with atomic_write(os.path.join(types_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        
+        # Drop bundles of types that are no longer trained
+        for filename in os.listdir(types_dir):
+            if filename.endswith('.npz') and filename not in manifest.values():
+                os.remove(os.path.join(types_dir, filename))
+        
+        result = {
+            'success': True,
+            'models': trained,
+            'trained': len(manifest),
+            'seconds': round(time.perf_counter() - start, 3),
+            'message': f'Trained {len(manifest)} per-type demand models'
+        }
+        
+        print(json.dumps(result))
+        return result
+        
+    except Exception as e:
+        error = {
+            'success': False,
+            'error': str(e)
+        }
+        print(json.dumps(error))
+        return error
+
+# Largest price x delivery_time grid a single sweep evaluates
+MAX_SWEEP_POINTS = 100000
+
+def _sweep_range(spec):
+    """(start, step, number of points) of a {"start", "stop", "step"} range, stop inclusive"""
+    start, stop, step = float(spec['start']), float(spec['stop']), float(spec.get('step', 1))
+    if not np.isfinite([start, stop, step]).all() or step <= 0 or stop < start:
+        raise ValueError(f'Invalid range: {spec}')
+    n = np.floor((stop - start) / step + 1e-9) + 1
+    if not n <= MAX_SWEEP_POINTS:
+        raise ValueError(f'Sweep range {spec} exceeds {MAX_SWEEP_POINTS} points')
+    return start, step, int(n)
+
+def sweep_size(spec):
+    """Number of points sweep_values would produce, without building the axis"""
+    if isinstance(spec, dict):
+        return _sweep_range(spec)[2]
+    if isinstance(spec, (list, tuple)):
+        return len(spec)
+    return 1
+
+def sweep_values(spec, default):
+    """Sweep axis from a list, a {"start", "stop", "step"} range (stop inclusive), or a single value"""
+    if spec is None:
+        return np.array([float(default)])
+    if isinstance(spec, dict):
+        start, step, n = _sweep_range(spec)
+        return start + step * np.arange(n)
+    if isinstance(spec, (list, tuple)):
+        return np.array(spec, dtype=float)
+    return np.array([float(spec)])
+
+def sweep_demand(data, model_dir=MODEL_DIR):
+    """
+    What-if demand over a price x delivery_time grid for one product.
+    
+    Args:
+        data: base product (product_type, previous_sales, delivery_time, price)
+            plus optional 'price_range' and 'delivery_time_range', each a list
+            of values or {"start", "stop", "step"}
+    
+    Returns:
+        dict: prices, delivery_times, and matrices (rows = delivery time,
+        columns = price) of predicted classes and per-class probabilities
+    """
+    try:
+        # Bound the grid before allocating either axis
+        points = sweep_size(data.get('price_range')) * sweep_size(data.get('delivery_time_range'))
+        if points > MAX_SWEEP_POINTS:
+            raise ValueError(f'Sweep of {points} points exceeds {MAX_SWEEP_POINTS}')
+        
+        predictor = NumpyDemandPredictor(os.path.join(model_dir, 'bpnn_bundle.npz'))
+        prices = sweep_values(data.get('price_range'), data.get('price', 300))
+        delivery_times = sweep_values(data.get('delivery_time_range'), data.get('delivery_time', 2))
+        
+        base, _, errors = encode_products([data], predictor.product_classes)
+        if errors[0] is not None:
+            raise ValueError(errors[0])
+        
+        features = np.repeat(base, len(delivery_times) * len(prices), axis=0)
+        features[:, FEATURE_COLUMNS.index('delivery_time')] = np.repeat(delivery_times, len(prices))
+        features[:, FEATURE_COLUMNS.index('price')] = np.tile(prices, len(delivery_times))
+        
+        shape = (len(delivery_times), len(prices))
+        probabilities = predictor.predict_proba(features)
+        classes = predictor.class_names[probabilities.argmax(axis=1)].reshape(shape)
+        
+        result = {
+            'success': True,
+            'product_type': data.get('product_type', 'Diaper'),
+            'previous_sales': float(base[0, FEATURE_COLUMNS.index('previous_sales')]),
+            'prices': prices.tolist(),
+            'delivery_times': delivery_times.tolist(),
+            'classes': classes.tolist(),
+            'probabilities': {
+                str(name): np.round(probabilities[:, i].reshape(shape), 4).tolist()
+                for i, name in enumerate(predictor.class_names)
+            }
+        }
+        
+        print(json.dumps(result))
+        return result
+        
+    except Exception as e:
+        error = {
+            'success': False,
+            'error': str(e)
+        }
+        print(json.dumps(error))
+        return error
+
+def read_products(argv, stream):
+    """Read products from an argv JSON array, or from stdin as a JSON array or JSON lines"""
+    if len(argv) > 2:
+        return json.loads(argv[2])
+    text = stream.read().strip()
+    if text.startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
 def generate_explanation(product_type, previous_sales, delivery_time, price, prediction, confidence):
     """Generate human-readable explanation"""
     
@@ -284,6 +897,45 @@ if __name__ == '__main__':
             predict(data)
         except json.JSONDecodeError:
             print(json.dumps({'error': 'Invalid JSON data'}))
+    elif action == 'predict_batch':
+        try:
+            predict_batch(read_products(sys.argv, sys.stdin), output=sys.stdout)
+        except json.JSONDecodeError:
+            print(json.dumps({'error': 'Invalid JSON data'}))
+    elif action == 'retrain':
+        if len(sys.argv) < 3:
+            print(json.dumps({'error': 'Missing sales record files'}))
+            sys.exit(1)
+        retrain_model(sys.argv[2:])
+    elif action == 'train_types':
+        train_type_models()
+    elif action == 'sweep':
+        if len(sys.argv) < 3:
+            print(json.dumps({'error': 'Missing sweep data'}))
+            sys.exit(1)
+        
+        try:
+            sweep_demand(json.loads(sys.argv[2]))
+        except json.JSONDecodeError:
+            print(json.dumps({'error': 'Invalid JSON data'}))
+    elif action == 'search':
+        # Optional JSON options: {"param_grid": {...}, "folds": 5, "n_iter": 8, "workers": 4}
+        try:
+            search_hyperparameters(**parse_search_options(sys.argv[2] if len(sys.argv) > 2 else None))
+        except json.JSONDecodeError:
+            print(json.dumps({'error': 'Invalid JSON data'}))
+        except (TypeError, ValueError) as e:
+            print(json.dumps({'success': False, 'error': str(e)}))
+    elif action == 'build_grid':
+        try:
+            spec = json.loads(sys.argv[2]) if len(sys.argv) > 2 else None
+            print(json.dumps({'success': True, 'grid': build_grid(spec=spec)}))
+        except json.JSONDecodeError:
+            print(json.dumps({'error': 'Invalid JSON data'}))
+        except (FileNotFoundError, TypeError, ValueError) as e:
+            print(json.dumps({'success': False, 'error': str(e)}))
+    elif action == 'export_bundle':
+        print(json.dumps({'success': True, 'bundle': refresh_serving_artifacts()}))
     else:
         print(json.dumps({'error': 'Invalid action'}))
 
@@ -5,7 +5,10 @@ Handles training and prediction requests
 
 import sys
 import json
-from demand_bpnn import train_model, predict
+from demand_bpnn import (
+    train_model, retrain_model, train_type_models, search_hyperparameters, sweep_demand, predict, predict_batch, read_products,
+    parse_search_options
+)
 
 if __name__ == '__main__':
     if len(sys.argv) < 2:
@@ -29,6 +32,46 @@ if __name__ == '__main__':
         except json.JSONDecodeError as e:
             result = {'success': False, 'error': f'Invalid JSON data: {str(e)}'}
             print(json.dumps(result))
+    elif action == 'predict_batch':
+        # Products as a JSON array argument, or a JSON array / JSON lines on stdin
+        try:
+            predict_batch(read_products(sys.argv, sys.stdin), output=sys.stdout)
+        except json.JSONDecodeError as e:
+            result = {'success': False, 'error': f'Invalid JSON data: {str(e)}'}
+            print(json.dumps(result))
+    elif action == 'train_types':
+        # One small network per product type, trained in parallel
+        train_type_models()
+    elif action == 'sweep':
+        # Base product plus price_range / delivery_time_range, e.g.
+        # {"product_type": "Toy", "previous_sales": 30, "price_range": {"start": 200, "stop": 1000, "step": 50}}
+        if len(sys.argv) < 3:
+            result = {'success': False, 'error': 'Missing sweep data'}
+            print(json.dumps(result))
+            sys.exit(1)
+        
+        try:
+            sweep_demand(json.loads(sys.argv[2]))
+        except json.JSONDecodeError as e:
+            result = {'success': False, 'error': f'Invalid JSON data: {str(e)}'}
+            print(json.dumps(result))
+    elif action == 'search':
+        # Optional JSON options: param_grid, folds, n_iter, workers
+        try:
+            search_hyperparameters(**parse_search_options(sys.argv[2] if len(sys.argv) > 2 else None))
+        except json.JSONDecodeError as e:
+            result = {'success': False, 'error': f'Invalid JSON data: {str(e)}'}
+            print(json.dumps(result))
+        except (TypeError, ValueError) as e:
+            result = {'success': False, 'error': str(e)}
+            print(json.dumps(result))
+    elif action == 'retrain':
+        # One or more JSON lines files of monthly sales records
+        if len(sys.argv) < 3:
+            result = {'success': False, 'error': 'Missing sales record files'}
+            print(json.dumps(result))
+            sys.exit(1)
+        retrain_model(sys.argv[2:])
     else:
         result = {'success': False, 'error': 'Invalid action'}
         print(json.dumps(result))
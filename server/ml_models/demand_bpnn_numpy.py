@@ -0,0 +1,224 @@
+"""
+Pure-NumPy inference engine for the BPNN demand model
+Runs the exported MLP weights, scaler statistics and encoder classes
+without importing scikit-learn or pandas.
+
+The bundle is written by demand_bpnn.export_numpy_bundle() (and on every
+train) as bpnn_bundle.npz next to the pickled model.
+"""
+
+import os
+import json
+import numpy as np
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_PATH = os.path.join(MODEL_DIR, 'bpnn_bundle.npz')
+
+# Column order the scaler and network were fitted with
+FEATURE_COLUMNS = ['previous_sales', 'delivery_time', 'price', 'product_type_encoded']
+
+# Per-product-type bundles and their manifest live in this subdirectory
+TYPE_MODELS_DIRNAME = 'bpnn_types'
+
+# Weight storage options: full precision, half the memory, or a quarter
+# (int8 weights with one float32 scale per output unit)
+PRECISIONS = ('float64', 'float32', 'int8')
+
+def encode_products(products, known_types):
+    """
+    Encode product dicts into one feature matrix (FEATURE_COLUMNS order).
+
+    Args:
+        products: list of dicts with product_type, previous_sales, delivery_time, price
+        known_types: sorted product type classes of the fitted encoder
+
+    Returns:
+        tuple: (features array, factors list, errors list with None for valid rows)
+    """
+    features = np.zeros((len(products), len(FEATURE_COLUMNS)))
+    factors = []
+    errors = []
+
+    for i, data in enumerate(products):
+        try:
+            product_type = data.get('product_type', 'Diaper')
+            previous_sales = float(data.get('previous_sales', 50))
+            delivery_time = float(data.get('delivery_time', 2))
+            price = float(data.get('price', 300))
+        except (AttributeError, TypeError, ValueError) as e:
+            factors.append(None)
+            errors.append(str(e))
+            continue
+
+        type_index = np.searchsorted(known_types, product_type)
+        if type_index >= len(known_types) or known_types[type_index] != product_type:
+            factors.append(None)
+            errors.append(f"y contains previously unseen labels: '{product_type}'")
+            continue
+
+        features[i] = [previous_sales, delivery_time, price, type_index]
+        factors.append({
+            'product_type': product_type,
+            'previous_sales': previous_sales,
+            'delivery_time': delivery_time,
+            'price': price
+        })
+        errors.append(None)
+
+    return features, factors, errors
+
+def quantize_int8(weights):
+    """Symmetric per-output-column int8 quantization; returns (int8 weights, float32 scales)"""
+    scales = np.abs(weights).max(axis=0) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.round(weights / scales), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+def _relu(x):
+    return np.maximum(x, 0)
+
+def _softmax(x):
+    shifted = x - x.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+def _logistic(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+class NumpyDemandPredictor:
+    """
+    Forward pass of the exported (100, 50) relu network in plain NumPy.
+
+    precision='float32' stores and computes with float32 weights;
+    precision='int8' additionally quantizes the weight matrices to int8.
+    """
+
+    def __init__(self, bundle_path=BUNDLE_PATH, precision='float64'):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+        self.precision = precision
+
+        with np.load(bundle_path, allow_pickle=False) as bundle:
+            n_layers = int(bundle['n_layers'])
+            self.coefs = [bundle[f'coef_{i}'] for i in range(n_layers)]
+            self.intercepts = [bundle[f'intercept_{i}'] for i in range(n_layers)]
+            self.scaler_mean = bundle['scaler_mean']
+            self.scaler_scale = bundle['scaler_scale']
+            self.product_classes = bundle['product_classes']
+            self.class_names = bundle['class_names']
+            self.activation = str(bundle['activation'])
+            self.out_activation = str(bundle['out_activation'])
+
+        if self.activation != 'relu':
+            raise ValueError(f"Unsupported hidden activation: {self.activation}")
+
+        self.dtype = np.float64 if precision == 'float64' else np.float32
+        self.intercepts = [intercept.astype(self.dtype) for intercept in self.intercepts]
+        self.scales = [None] * len(self.coefs)
+        if precision == 'int8':
+            quantized = [quantize_int8(coef) for coef in self.coefs]
+            self.coefs = [weights for weights, _ in quantized]
+            self.scales = [scales for _, scales in quantized]
+        else:
+            self.coefs = [coef.astype(self.dtype) for coef in self.coefs]
+
+    def weight_bytes(self):
+        """Memory held by weights, biases and quantization scales"""
+        arrays = self.coefs + self.intercepts + [scales for scales in self.scales if scales is not None]
+        return int(sum(array.nbytes for array in arrays))
+
+    def _layer(self, activations, index):
+        coef, scales = self.coefs[index], self.scales[index]
+        if scales is None:
+            return activations @ coef + self.intercepts[index]
+        return (activations @ coef.astype(np.float32)) * scales + self.intercepts[index]
+
+    def predict_proba_scaled(self, X_scaled):
+        """Class probabilities for already-scaled features"""
+        activations = np.asarray(X_scaled, dtype=self.dtype)
+        for index in range(len(self.coefs) - 1):
+            activations = _relu(self._layer(activations, index))
+        logits = self._layer(activations, len(self.coefs) - 1)
+
+        if self.out_activation == 'softmax':
+            return _softmax(logits)
+        positive = _logistic(logits).ravel()
+        return np.column_stack([1 - positive, positive])
+
+    def predict_proba(self, features):
+        """Class probabilities for raw features (FEATURE_COLUMNS order)"""
+        return self.predict_proba_scaled((features - self.scaler_mean) / self.scaler_scale)
+
+    def predict(self, features):
+        """Demand labels for raw features"""
+        return self.class_names[self.predict_proba(features).argmax(axis=1)]
+
+    def predict_products(self, products):
+        """
+        Score product dicts in one pass.
+
+        Returns:
+            tuple: (labels, probabilities, factors, errors); labels and
+            probabilities only cover rows whose error is None
+        """
+        features, factors, errors = encode_products(products, self.product_classes)
+        valid = np.array([error is None for error in errors], dtype=bool)
+        probabilities = self.predict_proba(features[valid])
+        labels = self.class_names[probabilities.argmax(axis=1)]
+        return labels, probabilities, factors, errors
+
+class DemandModelRouter:
+    """
+    Dispatches each row to its product type's model (see
+    demand_bpnn.train_type_models), falling back to the global network
+    for types without one.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR):
+        self.fallback = NumpyDemandPredictor(os.path.join(model_dir, 'bpnn_bundle.npz'))
+        self.product_classes = self.fallback.product_classes
+        self.class_names = self.fallback.class_names
+        self.models = {}
+
+        types_dir = os.path.join(model_dir, TYPE_MODELS_DIRNAME)
+        manifest_path = os.path.join(types_dir, 'manifest.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            for product_type, filename in manifest.items():
+                model = NumpyDemandPredictor(os.path.join(types_dir, filename))
+                # Type models must share the global encoding to receive the same features
+                if np.array_equal(model.product_classes, self.product_classes):
+                    columns = np.searchsorted(self.class_names, model.class_names)
+                    self.models[product_type] = (model, columns)
+
+    def predict_proba(self, features):
+        """Class probabilities (global class order) for raw features, routed by the type column"""
+        probabilities = np.zeros((len(features), len(self.class_names)))
+        routed = np.zeros(len(features), dtype=bool)
+        type_indices = features[:, FEATURE_COLUMNS.index('product_type_encoded')].astype(int)
+
+        for type_index in np.unique(type_indices):
+            entry = self.models.get(str(self.product_classes[type_index]))
+            if entry is None:
+                continue
+            rows = type_indices == type_index
+            model, columns = entry
+            probabilities[np.ix_(rows, columns)] = model.predict_proba(features[rows])
+            routed |= rows
+
+        if (~routed).any():
+            probabilities[~routed] = self.fallback.predict_proba(features[~routed])
+        return probabilities
+
+    def predict(self, features):
+        """Demand labels for raw features"""
+        return self.class_names[self.predict_proba(features).argmax(axis=1)]
+
+    def predict_products(self, products):
+        """Same contract as NumpyDemandPredictor.predict_products"""
+        features, factors, errors = encode_products(products, self.product_classes)
+        valid = np.array([error is None for error in errors], dtype=bool)
+        probabilities = self.predict_proba(features[valid])
+        labels = self.class_names[probabilities.argmax(axis=1)]
+        return labels, probabilities, factors, errors
@@ -0,0 +1,200 @@
+"""
+Precomputed demand lookup grid for the BPNN demand model
+Evaluates the network once over a quantized grid of previous sales,
+delivery time and price for every product type, stores the class
+probability table, and serves predictions by rounding inputs to the
+nearest grid point. Inputs outside the grid fall back to the network.
+
+Usage:
+    python demand_grid.py build [grid spec JSON]
+    python demand_grid.py report
+"""
+
+import sys
+import json
+import os
+import numpy as np
+from demand_bpnn_numpy import BUNDLE_PATH, MODEL_DIR, NumpyDemandPredictor, encode_products
+from shared_model_files import atomic_write
+
+GRID_PATH = os.path.join(MODEL_DIR, 'bpnn_grid.npz')
+
+# (start, stop, step) per numeric feature, in FEATURE_COLUMNS order
+DEFAULT_GRID_SPEC = {
+    'previous_sales': (0, 150, 5),
+    'delivery_time': (1, 7, 1),
+    'price': (100, 1200, 10)
+}
+NUMERIC_COLUMNS = ['previous_sales', 'delivery_time', 'price']
+
+# Largest probability table build_grid evaluates (product types x grid points)
+MAX_GRID_CELLS = 2000000
+
+def grid_shape(spec):
+    """Points per numeric feature axis; raises ValueError for an invalid spec"""
+    unknown = sorted(set(spec) - set(NUMERIC_COLUMNS))
+    if unknown:
+        raise ValueError(f"Unknown grid columns: {', '.join(unknown)}")
+    shape = []
+    for column in NUMERIC_COLUMNS:
+        try:
+            start, stop, step = (float(value) for value in spec[column])
+        except (TypeError, ValueError):
+            raise ValueError(f'{column} must be [start, stop, step], got {spec[column]!r}') from None
+        if not np.isfinite([start, stop, step]).all() or step <= 0 or start >= stop:
+            raise ValueError(f'Invalid {column} range {spec[column]!r}: need start < stop and step > 0')
+        intervals = (stop - start) / step
+        if not intervals < MAX_GRID_CELLS:
+            raise ValueError(f'{column} axis exceeds {MAX_GRID_CELLS} grid cells')
+        shape.append(int(round(intervals)) + 1)
+    return shape
+
+def grid_axes(spec):
+    """Grid point values per numeric feature"""
+    return [
+        float(spec[column][0]) + float(spec[column][2]) * np.arange(points)
+        for column, points in zip(NUMERIC_COLUMNS, grid_shape(spec))
+    ]
+
+def build_grid(bundle_path=BUNDLE_PATH, grid_path=GRID_PATH, spec=None):
+    """
+    Evaluate the network over the grid and save the probability table.
+
+    Returns:
+        str: path of the saved grid
+    """
+    if spec is not None and not isinstance(spec, dict):
+        raise ValueError('Grid spec must be a JSON object')
+    spec = dict(DEFAULT_GRID_SPEC, **(spec or {}))
+    predictor = NumpyDemandPredictor(bundle_path)
+    n_types = len(predictor.product_classes)
+
+    # Bound the table before allocating any axis
+    cells = n_types * int(np.prod(grid_shape(spec), dtype=float))
+    if cells > MAX_GRID_CELLS:
+        raise ValueError(f'Grid of {cells} cells exceeds {MAX_GRID_CELLS}')
+    axes = grid_axes(spec)
+
+    mesh = np.meshgrid(np.arange(n_types), *axes, indexing='ij')
+    features = np.column_stack([mesh[1].ravel(), mesh[2].ravel(), mesh[3].ravel(), mesh[0].ravel()])
+    probabilities = predictor.predict_proba(features).reshape(
+        (n_types,) + tuple(len(axis) for axis in axes) + (len(predictor.class_names),)
+    )
+
+    with atomic_write(grid_path, 'wb') as f:
+        np.savez(
+            f,
+            probabilities=probabilities,
+            spec=np.array([spec[column] for column in NUMERIC_COLUMNS], dtype=float),
+            product_classes=predictor.product_classes,
+            class_names=predictor.class_names
+        )
+    return grid_path
+
+class DemandGrid:
+    """Nearest-grid-point demand lookup with fallback to the network"""
+
+    def __init__(self, grid_path=GRID_PATH, bundle_path=BUNDLE_PATH):
+        with np.load(grid_path, allow_pickle=False) as grid:
+            self.probabilities = grid['probabilities']
+            self.spec = grid['spec']
+            self.product_classes = grid['product_classes']
+            self.class_names = grid['class_names']
+        self.bundle_path = bundle_path
+        self._fallback = None
+
+    @property
+    def fallback(self):
+        """Network used for out-of-grid inputs, loaded on first use"""
+        if self._fallback is None:
+            self._fallback = NumpyDemandPredictor(self.bundle_path)
+        return self._fallback
+
+    def bucket_indices(self, features):
+        """Grid indices per row (FEATURE_COLUMNS order) and a mask of rows inside the grid"""
+        starts, stops, steps = self.spec[:, 0], self.spec[:, 1], self.spec[:, 2]
+        numeric = features[:, :3]
+        inside = ((numeric >= starts - steps / 2) & (numeric <= stops + steps / 2)).all(axis=1)
+        indices = np.rint((numeric - starts) / steps).astype(int)
+        indices = np.clip(indices, 0, np.array(self.probabilities.shape[1:4]) - 1)
+        return indices, inside
+
+    def predict_proba(self, features, return_hits=False):
+        """Class probabilities by lookup; rows outside the grid are run through the network"""
+        features = np.asarray(features, dtype=float).reshape(-1, 4)
+        indices, inside = self.bucket_indices(features)
+        type_indices = features[:, 3].astype(int)
+
+        probabilities = np.empty((len(features), len(self.class_names)))
+        probabilities[inside] = self.probabilities[
+            type_indices[inside], indices[inside, 0], indices[inside, 1], indices[inside, 2]
+        ]
+        if (~inside).any():
+            probabilities[~inside] = self.fallback.predict_proba(features[~inside])
+
+        if return_hits:
+            return probabilities, inside
+        return probabilities
+
+    def predict(self, features):
+        """Demand labels by lookup"""
+        return self.class_names[self.predict_proba(features).argmax(axis=1)]
+
+    def predict_products(self, products):
+        """Same contract as NumpyDemandPredictor.predict_products"""
+        features, factors, errors = encode_products(products, self.product_classes)
+        valid = np.array([error is None for error in errors], dtype=bool)
+        probabilities = self.predict_proba(features[valid])
+        labels = self.class_names[probabilities.argmax(axis=1)]
+        return labels, probabilities, factors, errors
+
+def disagreement_report(grid_path=GRID_PATH, bundle_path=BUNDLE_PATH, samples=20000, seed=0):
+    """
+    Compare grid lookups with the network at random in-grid inputs.
+
+    Inputs are whole numbers (sales counts, days, rupees) drawn uniformly
+    over each range, so most fall between grid points and measure the
+    quantization error.
+    """
+    grid = DemandGrid(grid_path, bundle_path)
+    rng = np.random.RandomState(seed)
+    starts, stops = grid.spec[:, 0], grid.spec[:, 1]
+    features = np.column_stack([
+        rng.randint(starts, stops + 1, size=(samples, 3)),
+        rng.randint(len(grid.product_classes), size=samples)
+    ])
+
+    looked_up = grid.predict_proba(features)
+    exact = grid.fallback.predict_proba(features)
+    difference = np.abs(looked_up - exact)
+    disagree = looked_up.argmax(axis=1) != exact.argmax(axis=1)
+
+    return {
+        'success': True,
+        'grid_points': int(np.prod(grid.probabilities.shape[:-1])),
+        'table_bytes': int(grid.probabilities.nbytes),
+        'samples': samples,
+        'label_disagreement': float(disagree.mean()),
+        'max_probability_difference': float(difference.max()),
+        'mean_probability_difference': float(difference.mean())
+    }
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(json.dumps({'success': False, 'error': 'Missing action parameter'}))
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    try:
+        if action == 'build':
+            spec = json.loads(sys.argv[2]) if len(sys.argv) > 2 else None
+            path = build_grid(spec=spec)
+            print(json.dumps({'success': True, 'grid': path, **disagreement_report(path)}))
+        elif action == 'report':
+            print(json.dumps(disagreement_report()))
+        else:
+            print(json.dumps({'success': False, 'error': 'Invalid action'}))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
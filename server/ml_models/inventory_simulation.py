@@ -0,0 +1,262 @@
+"""
+Monte Carlo inventory reorder simulation driven by demand predictions
+Simulates stock trajectories for every product x warehouse item at once.
+Each trial draws a demand class (Low/Medium/High) from the BPNN class
+probabilities, then daily Poisson demand around the item's monthly sales
+scaled for that class. Replenishment orders placed at the reorder point
+arrive after the vendor delivery time, and the initial batch is written
+off on its expiry date.
+
+Outputs per item the stockout probability over the horizon with its
+current reorder point, and a suggested reorder point covering lead-time
+demand at the requested service level.
+
+Usage:
+    python inventory_simulation.py [items JSON] [--trials 500] [--horizon 30]
+                                   [--service-level 0.95] [--seed 42]
+    (items as a JSON array argument, or a JSON array / JSON lines on stdin)
+"""
+
+import sys
+import json
+from datetime import date, datetime
+import numpy as np
+from demand_bpnn_numpy import BUNDLE_PATH, NumpyDemandPredictor
+
+# Monthly demand relative to previous_sales for each predicted class
+DEMAND_MULTIPLIERS = {'Low': 0.5, 'Medium': 1.0, 'High': 1.5}
+DAYS_PER_MONTH = 30
+NEVER = np.iinfo(np.int64).max  # expiry day for items that do not expire
+
+def _to_date(value):
+    """Expiry dates as date objects (ISO strings, datetimes, or {"$date": ...})"""
+    if isinstance(value, dict):
+        value = value.get('$date')
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00')).date()
+
+def prepare_items(items, predictor, start_date=None):
+    """
+    Turn item dicts into simulation arrays.
+
+    Items carry the InventoryItem fields (quantity, reorderPoint or
+    reorder_point, expiryDate or expiry_date) and the demand inputs
+    (product_type, previous_sales, delivery_time, price). Items the demand
+    model cannot score are reported as errors and left out.
+
+    Returns:
+        tuple: (arrays dict for the valid items, errors list with None for valid items)
+    """
+    start_date = start_date or date.today()
+    _, probabilities, factors, errors = predictor.predict_products(items)
+    errors = list(errors)
+
+    columns = {'quantity': [], 'reorder_point': [], 'expiry_day': [], 'order_quantity': []}
+    valid = []
+    for i, (item, factor) in enumerate(zip(items, factors)):
+        if errors[i] is not None:
+            continue
+        try:
+            quantity = float(item.get('quantity', 0))
+            reorder_point = float(item.get('reorder_point', item.get('reorderPoint', 0)))
+            expiry = _to_date(item.get('expiry_date', item.get('expiryDate')))
+            order_quantity = item.get('order_quantity')
+            order_quantity = float(order_quantity) if order_quantity is not None else None
+        except (TypeError, ValueError) as e:
+            errors[i] = str(e)
+            continue
+        columns['quantity'].append(quantity)
+        columns['reorder_point'].append(reorder_point)
+        columns['expiry_day'].append(NEVER if expiry is None else max((expiry - start_date).days, 0))
+        columns['order_quantity'].append(order_quantity)
+        valid.append(i)
+
+    multipliers = np.array([DEMAND_MULTIPLIERS.get(str(name), 1.0) for name in predictor.class_names])
+    previous_sales = np.array([factors[i]['previous_sales'] for i in valid], dtype=float)
+    lead_times = np.array([max(int(np.ceil(factors[i]['delivery_time'])), 1) for i in valid], dtype=np.int64)
+
+    # Rows of `probabilities` follow the items the model could score
+    scored_rows = np.cumsum([factor is not None for factor in factors]) - 1
+    class_probabilities = probabilities[scored_rows[valid]] if valid else np.zeros((0, len(multipliers)))
+
+    # Daily demand rate per item and class
+    daily_rates = previous_sales[:, None] * multipliers[None, :] / DAYS_PER_MONTH
+    expected_daily = (class_probabilities * daily_rates).sum(axis=1)
+    order_quantity = np.array([
+        given if given is not None else max(np.round(expected_daily[row] * DAYS_PER_MONTH), 1.0)
+        for row, given in enumerate(columns['order_quantity'])
+    ])
+
+    arrays = {
+        'indices': np.array(valid, dtype=np.int64),
+        'quantity': np.array(columns['quantity']),
+        'reorder_point': np.array(columns['reorder_point']),
+        'expiry_day': np.array(columns['expiry_day'], dtype=np.int64),
+        'order_quantity': order_quantity,
+        'lead_time': lead_times,
+        'class_probabilities': class_probabilities,
+        'daily_rates': daily_rates,
+        'expected_daily': expected_daily
+    }
+    return arrays, errors
+
+def sample_classes(class_probabilities, trials, rng):
+    """Demand class index per (trial, item), drawn from each item's class probabilities"""
+    cumulative = np.cumsum(class_probabilities, axis=1)
+    cumulative[:, -1] = 1.0
+    draws = rng.random((trials, len(class_probabilities)))
+    return (draws[:, :, None] > cumulative[None, :, :]).sum(axis=2)
+
+def simulate(arrays, reorder_points, trials=500, horizon=30, rng=None):
+    """
+    Run the stock trajectories for all items, trials and reorder policies together.
+
+    Every policy (row of `reorder_points`) sees the same sampled demand, so
+    policies are compared on common random numbers.
+
+    Returns:
+        dict: per-policy, per-item stockout probability, mean unmet demand,
+        mean expired units and mean orders placed
+    """
+    rng = rng or np.random.default_rng()
+    reorder_points = np.atleast_2d(reorder_points).astype(np.float32)[:, None, :]
+    n_items = len(arrays['quantity'])
+    shape = (len(reorder_points), trials, n_items)
+
+    classes = sample_classes(arrays['class_probabilities'], trials, rng)
+    rates = arrays['daily_rates'][np.arange(n_items)[None, :], classes]
+
+    on_hand = np.empty(shape, dtype=np.float32)
+    on_hand[...] = arrays['quantity']
+    initial_left = on_hand.copy()  # units of the initial (expiring) batch still on hand
+    pending = np.zeros(shape, dtype=bool)
+    arrival_day = np.full(shape, horizon, dtype=np.int32)
+    stocked_out = np.zeros(shape, dtype=bool)
+    unmet = np.zeros(shape, dtype=np.float32)
+    orders = np.zeros(shape, dtype=np.int32)
+    order_quantity = np.broadcast_to(arrays['order_quantity'].astype(np.float32), shape)
+    lead_time = arrays['lead_time'].astype(np.int32)
+    expired = np.zeros((len(reorder_points), n_items), dtype=np.float32)
+    shortfall = np.empty(shape, dtype=np.float32)
+
+    for day in range(horizon):
+        arriving = arrival_day == day
+        np.add(on_hand, order_quantity, out=on_hand, where=arriving)
+        pending &= ~arriving
+
+        expiring = arrays['expiry_day'] == day
+        if expiring.any():
+            expired[:, expiring] += initial_left[:, :, expiring].sum(axis=1)
+            on_hand[:, :, expiring] -= initial_left[:, :, expiring]
+            initial_left[:, :, expiring] = 0
+
+        demand = rng.poisson(rates).astype(np.float32)
+        np.subtract(demand, on_hand, out=shortfall)
+        np.maximum(shortfall, 0, out=shortfall)
+        stocked_out |= shortfall > 0
+        unmet += shortfall
+        np.subtract(on_hand, demand, out=on_hand)
+        np.maximum(on_hand, 0, out=on_hand)
+        # Oldest stock is sold first
+        np.minimum(initial_left, on_hand, out=initial_left)
+
+        reorder = on_hand <= reorder_points
+        reorder &= ~pending
+        pending |= reorder
+        np.copyto(arrival_day, day + lead_time, where=reorder)
+        orders += reorder
+
+    return {
+        'stockout_probability': stocked_out.mean(axis=1),
+        'expected_unmet_demand': unmet.mean(axis=1),
+        'expected_expired_units': expired / trials,
+        'expected_orders': orders.mean(axis=1)
+    }
+
+def suggest_reorder_points(arrays, service_level=0.95, trials=500, rng=None):
+    """Lead-time demand quantile per item: stock that covers the vendor delivery time"""
+    rng = rng or np.random.default_rng()
+    items = np.arange(len(arrays['quantity']))
+    classes = sample_classes(arrays['class_probabilities'], trials, rng)
+    lead_time_demand = rng.poisson(arrays['daily_rates'][items[None, :], classes] * arrays['lead_time'][None, :])
+    return np.ceil(np.quantile(lead_time_demand, service_level, axis=0))
+
+def run_simulation(items, trials=500, horizon=30, service_level=0.95, seed=42, start_date=None,
+                   bundle_path=BUNDLE_PATH, chunk_size=1000):
+    """
+    Simulate every item and suggest reorder points.
+
+    Items are processed in chunks of `chunk_size` so each state array
+    (trials x chunk_size per policy) stays cache-sized.
+
+    Returns:
+        list: per-item result dicts in input order
+    """
+    predictor = NumpyDemandPredictor(bundle_path)
+    rng = np.random.default_rng(seed)
+    results = [None] * len(items)
+
+    for chunk_start in range(0, len(items), chunk_size):
+        chunk = items[chunk_start:chunk_start + chunk_size]
+        arrays, errors = prepare_items(chunk, predictor, start_date)
+
+        for i, error in enumerate(errors):
+            if error is not None:
+                results[chunk_start + i] = {'success': False, 'error': error}
+        if len(arrays['indices']) == 0:
+            continue
+
+        suggested = suggest_reorder_points(arrays, service_level, trials, rng)
+        outcome = simulate(arrays, [arrays['reorder_point'], suggested], trials, horizon, rng)
+
+        for row, index in enumerate(arrays['indices']):
+            item = chunk[index]
+            results[chunk_start + index] = {
+                'success': True,
+                'product': item.get('product', item.get('product_id')),
+                'warehouse': item.get('warehouse'),
+                'quantity': float(arrays['quantity'][row]),
+                'reorder_point': float(arrays['reorder_point'][row]),
+                'demand_probabilities': {
+                    str(name): float(p) for name, p in zip(predictor.class_names, arrays['class_probabilities'][row])
+                },
+                'expected_daily_demand': float(arrays['expected_daily'][row]),
+                'lead_time_days': int(arrays['lead_time'][row]),
+                'stockout_probability': float(outcome['stockout_probability'][0, row]),
+                'expected_unmet_demand': float(outcome['expected_unmet_demand'][0, row]),
+                'expected_expired_units': float(outcome['expected_expired_units'][0, row]),
+                'expected_orders': float(outcome['expected_orders'][0, row]),
+                'suggested_reorder_point': float(suggested[row]),
+                'suggested_stockout_probability': float(outcome['stockout_probability'][1, row])
+            }
+
+    return results
+
+def _read_items(argv, stream):
+    if argv and not argv[0].startswith('--'):
+        return json.loads(argv[0])
+    text = stream.read().strip()
+    if text.startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    try:
+        options = {}
+        for flag, name, cast in [('--trials', 'trials', int), ('--horizon', 'horizon', int),
+                                 ('--service-level', 'service_level', float), ('--seed', 'seed', int)]:
+            if flag in args:
+                options[name] = cast(args[args.index(flag) + 1])
+
+        results = run_simulation(_read_items(args, sys.stdin), **options)
+        for result in results:
+            sys.stdout.write(json.dumps(result) + '\n')
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
@@ -11,6 +11,12 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
+from meal_recommender import (
+    FEATURE_NAMES, MEAL_CATEGORIES, validate_inputs, create_explanation, build_result,
+    build_answer_table, write_answer_table
+)
+from meal_tree_compiler import write_compiled_module
+from shared_model_files import file_sha256
 
 class MealDecisionTree:
     def __init__(self):
@@ -21,15 +27,8 @@ class MealDecisionTree:
             min_samples_leaf=5,
             random_state=42
         )
-        self.feature_names = ['age', 'dietary_preference', 'has_allergy']
-        self.meal_categories = {
-            'soft_veg': 'Soft Vegetarian Meal',
-            'standard_veg': 'Standard Vegetarian Meal', 
-            'soft_nonveg': 'Soft Non-Vegetarian Meal',
-            'standard_nonveg': 'Standard Non-Vegetarian Meal',
-            'allergy_free_soft': 'Allergy-Free Soft Meal',
-            'allergy_free_standard': 'Allergy-Free Standard Meal'
-        }
+        self.feature_names = list(FEATURE_NAMES)
+        self.meal_categories = dict(MEAL_CATEGORIES)
     
     def create_sample_data(self):
         """Create sample training data for the decision tree"""
@@ -123,14 +122,7 @@ class MealDecisionTree:
             dict: Prediction results
         """
         # Validate inputs
-        if not isinstance(age, (int, float)) or age < 1 or age > 6:
-            raise ValueError("Age must be between 1 and 6")
-        
-        if dietary_preference not in [0, 1]:
-            raise ValueError("Dietary preference must be 0 (Vegetarian) or 1 (Non-Vegetarian)")
-        
-        if has_allergy not in [0, 1]:
-            raise ValueError("Has allergy must be 0 (No) or 1 (Yes)")
+        validate_inputs(age, dietary_preference, has_allergy)
         
         # Prepare input
         X = np.array([[age, dietary_preference, has_allergy]])
@@ -142,43 +134,33 @@ class MealDecisionTree:
         # Get feature importance
         feature_importance = dict(zip(self.feature_names, self.model.feature_importances_))
         
-        # Create explanation
-        explanation = self._create_explanation(age, dietary_preference, has_allergy, prediction)
-        
-        return {
-            'prediction': prediction,
-            'meal_category': self.meal_categories.get(prediction, prediction),
-            'confidence': float(max(probability)),
-            'feature_importance': feature_importance,
-            'explanation': explanation,
-            'input_features': {
-                'age': age,
-                'dietary_preference': 'Vegetarian' if dietary_preference == 0 else 'Non-Vegetarian',
-                'has_allergy': 'Yes' if has_allergy == 1 else 'No'
-            }
-        }
+        return build_result(age, dietary_preference, has_allergy, prediction, max(probability), feature_importance)
+    
+    def predict_meals(self, rows):
+        """
+        Predict meal recommendations for many children with one predict_proba call
+        
+        Args:
+            rows (list): validated (age, dietary_preference, has_allergy) tuples
+            
+        Returns:
+            list: predict_meal results in row order
+        """
+        if not rows:
+            return []
+        probabilities = self.model.predict_proba(np.array(rows, dtype=float))
+        best = probabilities.argmax(axis=1)
+        feature_importance = dict(zip(self.feature_names, self.model.feature_importances_))
+        
+        return [
+            build_result(age, dietary_preference, has_allergy, self.model.classes_[index],
+                         probabilities[row, index], dict(feature_importance))
+            for row, ((age, dietary_preference, has_allergy), index) in enumerate(zip(rows, best))
+        ]
     
     def _create_explanation(self, age, dietary_preference, has_allergy, prediction):
         """Create human-readable explanation for the prediction"""
-        explanations = []
-        
-        if age < 3:
-            explanations.append(f"Child is {age} years old (young child)")
-            if has_allergy:
-                explanations.append("Has allergies - recommending allergy-free soft meal")
-            else:
-                explanations.append("No allergies - recommending age-appropriate soft meal")
-        else:
-            explanations.append(f"Child is {age} years old (older child)")
-            if has_allergy:
-                explanations.append("Has allergies - recommending allergy-free standard meal")
-            else:
-                explanations.append("No allergies - recommending standard meal")
-        
-        dietary_pref_text = "Vegetarian" if dietary_preference == 0 else "Non-Vegetarian"
-        explanations.append(f"Dietary preference: {dietary_pref_text}")
-        
-        return " | ".join(explanations)
+        return create_explanation(age, dietary_preference, has_allergy, prediction)
     
     def print_decision_rules(self):
         """Print the decision tree rules in text format"""
@@ -189,10 +171,25 @@ class MealDecisionTree:
         print(tree_rules)
     
     def save_model(self, filepath='meal_decision_tree_model.pkl'):
-        """Save the trained model"""
+        """Save the trained model and regenerate the compiled rules next to it"""
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         joblib.dump(self.model, filepath)
         print(f"💾 Model saved to: {filepath}")
+        
+        rules_path = self.compile_rules(os.path.join(os.path.dirname(filepath), 'meal_tree_rules.py'), filepath)
+        print(f"⚙️ Compiled rules saved to: {rules_path}")
+        
+        answers_path = self.save_answer_table(os.path.join(os.path.dirname(filepath), 'meal_answers.json'), filepath)
+        print(f"📋 Answer table saved to: {answers_path}")
+    
+    def compile_rules(self, output_path, source_path=None):
+        """Write the fitted tree as a standalone rules module (see meal_tree_compiler.py)"""
+        return write_compiled_module(self.model, self.feature_names, output_path, source_path)
+    
+    def save_answer_table(self, output_path, source_path=None):
+        """Precompute predict_meal for the whole integer input domain (24 cases)"""
+        source_sha256 = file_sha256(source_path) if source_path and os.path.exists(source_path) else None
+        return write_answer_table(build_answer_table(self.predict_meal), output_path, source_sha256)
     
     def load_model(self, filepath='meal_decision_tree_model.pkl'):
         """Load a pre-trained model"""
@@ -1,15 +1,79 @@
 #!/usr/bin/env python3
 """
 Meal Decision Tree API - Command line interface for meal recommendations
+
+Usage:
+    python meal_decision_tree_api.py <age> <dietary_preference> <has_allergy>
+    python meal_decision_tree_api.py --batch < children.json
+    (a JSON array of children, or {"date": ..., "children": [...]}; each child
+    has age, dietary_preference and has_allergy or an allergies list, plus
+    optional child_id, name and classroom)
 """
 
 import sys
 import json
 import os
-from meal_decision_tree import MealDecisionTree
+import contextlib
+from meal_recommender import (
+    answer_key, load_answer_table, compiled_rules_current, recommend_meal, recommend_rows, plan_meals
+)
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(MODEL_DIR, 'meal_decision_tree_model.pkl')
+ANSWERS_PATH = os.path.join(MODEL_DIR, 'meal_answers.json')
+
+def load_meal_tree(model_path):
+    """
+    Pickled tree for inputs the answer table and compiled rules cannot serve.
+    Requests never train: a missing model is an error, and the meal route
+    answers with its rule-based fallback.
+    """
+    from meal_decision_tree import MealDecisionTree
+    
+    # Initialize model
+    meal_tree = MealDecisionTree()
+    
+    if not meal_tree.load_model(model_path):
+        raise FileNotFoundError(f'Meal model not built at {model_path}; run build_models.py')
+    return meal_tree
+
+def predict_rows(rows, model_path=MODEL_PATH, answers_path=ANSWERS_PATH):
+    """Recommendations for validated rows in one batch (lookups and rules, or one predict_proba call)"""
+    answers = load_answer_table(answers_path, model_path)
+    covered = answers is not None and all(answer_key(*row) in answers for row in rows)
+    if covered or compiled_rules_current(model_path):
+        return recommend_rows(rows, answers)
+    
+    with contextlib.redirect_stdout(sys.stderr):
+        meal_tree = load_meal_tree(model_path)
+    return meal_tree.predict_meals(rows)
+
+def read_children(stream):
+    """Children list and plan date from a JSON array or {"date": ..., "children": [...]}"""
+    payload = json.load(stream)
+    if isinstance(payload, dict):
+        return payload.get('children') or [], payload.get('date')
+    if isinstance(payload, list):
+        return payload, None
+    raise ValueError('Expected a JSON array of children or an object with a "children" list')
+
+def batch_main():
+    """Plan meals for every child on stdin in one call"""
+    try:
+        children, plan_date = read_children(sys.stdin)
+        plan = plan_meals(children, predict_rows)
+        if plan_date is not None:
+            plan['date'] = plan_date
+        print(json.dumps(plan))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
 
 def main():
     """Main function to handle command line arguments and return JSON result"""
+    if sys.argv[1:] == ['--batch']:
+        return batch_main()
+    
     if len(sys.argv) != 4:
         print(json.dumps({
             'error': 'Invalid arguments. Usage: python meal_decision_tree_api.py <age> <dietary_preference> <has_allergy>'
@@ -22,18 +86,21 @@ def main():
         dietary_preference = int(sys.argv[2])  # 0=Vegetarian, 1=Non-Vegetarian
         has_allergy = int(sys.argv[3])  # 0=No, 1=Yes
         
-        # Initialize model
-        meal_tree = MealDecisionTree()
-        
-        # Try to load existing model, otherwise train new one
-        model_path = os.path.join(os.path.dirname(__file__), 'meal_decision_tree_model.pkl')
-        if not meal_tree.load_model(model_path):
-            print("Training new model...", file=sys.stderr)
-            meal_tree.train_model()
-            meal_tree.save_model(model_path)
+        model_path = MODEL_PATH
+        answers = load_answer_table(ANSWERS_PATH, model_path)
+        key = answer_key(age, dietary_preference, has_allergy)
         
-        # Make prediction
-        result = meal_tree.predict_meal(age, dietary_preference, has_allergy)
+        if answers is not None and key in answers:
+            # Precomputed at save time for every valid input
+            result = answers[key]
+        elif compiled_rules_current(model_path):
+            # Compiled rules match the saved tree: no sklearn import needed
+            result = recommend_meal(age, dietary_preference, has_allergy)
+        else:
+            meal_tree = load_meal_tree(model_path)
+            
+            # Make prediction
+            result = meal_tree.predict_meal(age, dietary_preference, has_allergy)
         
         # Output JSON result
         print(json.dumps(result, indent=2))
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Meal recommendation runtime - no pandas, sklearn or joblib
+Input validation, explanations and result formatting shared by
+MealDecisionTree and the compiled rule module (meal_tree_rules.py,
+generated by meal_tree_compiler.py from the fitted tree), and the
+precomputed answer table (meal_answers.json) holding the full result
+for every valid integer input, plus batch meal planning with kitchen totals.
+"""
+
+import os
+import json
+
+FEATURE_NAMES = ['age', 'dietary_preference', 'has_allergy']
+
+MEAL_CATEGORIES = {
+    'soft_veg': 'Soft Vegetarian Meal',
+    'standard_veg': 'Standard Vegetarian Meal',
+    'soft_nonveg': 'Soft Non-Vegetarian Meal',
+    'standard_nonveg': 'Standard Non-Vegetarian Meal',
+    'allergy_free_soft': 'Allergy-Free Soft Meal',
+    'allergy_free_standard': 'Allergy-Free Standard Meal'
+}
+
+def validate_inputs(age, dietary_preference, has_allergy):
+    """Raise ValueError for inputs outside the model's domain"""
+    if not isinstance(age, (int, float)) or age < 1 or age > 6:
+        raise ValueError("Age must be between 1 and 6")
+
+    if dietary_preference not in [0, 1]:
+        raise ValueError("Dietary preference must be 0 (Vegetarian) or 1 (Non-Vegetarian)")
+
+    if has_allergy not in [0, 1]:
+        raise ValueError("Has allergy must be 0 (No) or 1 (Yes)")
+
+def create_explanation(age, dietary_preference, has_allergy, prediction):
+    """Create human-readable explanation for the prediction"""
+    explanations = []
+
+    if age < 3:
+        explanations.append(f"Child is {age} years old (young child)")
+        if has_allergy:
+            explanations.append("Has allergies - recommending allergy-free soft meal")
+        else:
+            explanations.append("No allergies - recommending age-appropriate soft meal")
+    else:
+        explanations.append(f"Child is {age} years old (older child)")
+        if has_allergy:
+            explanations.append("Has allergies - recommending allergy-free standard meal")
+        else:
+            explanations.append("No allergies - recommending standard meal")
+
+    dietary_pref_text = "Vegetarian" if dietary_preference == 0 else "Non-Vegetarian"
+    explanations.append(f"Dietary preference: {dietary_pref_text}")
+
+    return " | ".join(explanations)
+
+def build_result(age, dietary_preference, has_allergy, prediction, confidence, feature_importance):
+    """Result dict returned by predict_meal"""
+    return {
+        'prediction': prediction,
+        'meal_category': MEAL_CATEGORIES.get(prediction, prediction),
+        'confidence': float(confidence),
+        'feature_importance': feature_importance,
+        'explanation': create_explanation(age, dietary_preference, has_allergy, prediction),
+        'input_features': {
+            'age': age,
+            'dietary_preference': 'Vegetarian' if dietary_preference == 0 else 'Non-Vegetarian',
+            'has_allergy': 'Yes' if has_allergy == 1 else 'No'
+        }
+    }
+
+# The whole integer input domain: 6 ages x 2 dietary preferences x 2 allergy flags
+ANSWER_AGES = range(1, 7)
+
+def answer_key(age, dietary_preference, has_allergy):
+    """Answer table key, or None for inputs the table does not cover (e.g. fractional ages)"""
+    if type(age) is not int or type(dietary_preference) is not int or type(has_allergy) is not int:
+        return None
+    return f'{age},{dietary_preference},{has_allergy}'
+
+def build_answer_table(predict_meal):
+    """Full result of predict_meal for every valid integer input"""
+    return {
+        answer_key(age, dietary_preference, has_allergy): json.loads(json.dumps(
+            predict_meal(age, dietary_preference, has_allergy)
+        ))
+        for age in ANSWER_AGES for dietary_preference in [0, 1] for has_allergy in [0, 1]
+    }
+
+def write_answer_table(answers, filepath, source_sha256=None):
+    """Save the answer table atomically, tagged with the pickle it was built from"""
+    from shared_model_files import atomic_write
+
+    with atomic_write(filepath, 'w') as f:
+        json.dump({'source_model_sha256': source_sha256, 'answers': answers}, f, indent=1)
+    return filepath
+
+def load_answer_table(filepath, model_path):
+    """Answers built from the pickle at model_path, or None if missing, stale or unreadable"""
+    from shared_model_files import file_sha256
+
+    if not os.path.exists(filepath) or not os.path.exists(model_path):
+        return None
+    try:
+        with open(filepath, 'r') as f:
+            table = json.load(f)
+        if table.get('source_model_sha256') != file_sha256(model_path):
+            return None
+        answers = table['answers']
+    except (AttributeError, KeyError, ValueError):
+        # Corrupt or truncated table: callers fall back to the rules or the pickle
+        return None
+    return answers if isinstance(answers, dict) else None
+
+def compiled_rules_current(model_path):
+    """True when meal_tree_rules.py exists and was compiled from the pickle at model_path"""
+    try:
+        import meal_tree_rules
+    except ImportError:
+        return False
+    from shared_model_files import file_sha256
+
+    return os.path.exists(model_path) and meal_tree_rules.SOURCE_MODEL_SHA256 == file_sha256(model_path)
+
+def recommend_meal(age, dietary_preference, has_allergy):
+    """
+    Predict meal recommendation with the compiled rules (same result as
+    MealDecisionTree.predict_meal, without loading the pickled tree)
+    """
+    import meal_tree_rules
+
+    validate_inputs(age, dietary_preference, has_allergy)
+    probabilities = meal_tree_rules.predict_proba(age, dietary_preference, has_allergy)
+    best = max(range(len(probabilities)), key=probabilities.__getitem__)
+
+    return build_result(
+        age, dietary_preference, has_allergy,
+        meal_tree_rules.CLASSES[best], probabilities[best], dict(meal_tree_rules.FEATURE_IMPORTANCES)
+    )
+
+def recommend_rows(rows, answers=None):
+    """
+    Results for validated (age, dietary_preference, has_allergy) rows:
+    answer table lookups where possible, compiled rules for the rest
+    """
+    results = []
+    for row in rows:
+        key = answer_key(*row)
+        if answers is not None and key in answers:
+            results.append(answers[key])
+        else:
+            results.append(recommend_meal(*row))
+    return results
+
+DIETARY_PREFERENCES = {'vegetarian': 0, 'veg': 0, 'non-vegetarian': 1, 'non-veg': 1}
+
+def parse_child(child):
+    """
+    Model inputs for one batch entry.
+
+    Accepts numeric or text dietary preferences (as the meal route does) and
+    either a has_allergy flag or an allergies list (non-empty means 1).
+    """
+    age = child.get('age')
+    if isinstance(age, bool) or not isinstance(age, (int, float)):
+        raise ValueError("Age must be between 1 and 6")
+    if isinstance(age, float) and age.is_integer():
+        age = int(age)
+
+    dietary_preference = child.get('dietary_preference', child.get('dietaryPreference'))
+    if isinstance(dietary_preference, str):
+        dietary_preference = DIETARY_PREFERENCES.get(dietary_preference.strip().lower(), dietary_preference)
+
+    if 'allergies' in child and 'has_allergy' not in child and 'hasAllergy' not in child:
+        has_allergy = 1 if child['allergies'] else 0
+    else:
+        has_allergy = child.get('has_allergy', child.get('hasAllergy'))
+    if isinstance(has_allergy, bool):
+        has_allergy = int(has_allergy)
+
+    validate_inputs(age, dietary_preference, has_allergy)
+    return age, int(dietary_preference), int(has_allergy)
+
+def _empty_totals():
+    return {category: {'meal_category': name, 'count': 0} for category, name in MEAL_CATEGORIES.items()}
+
+def plan_meals(children, predict_rows):
+    """
+    Meal plan for a list of children.
+
+    Entries that fail validation are reported individually; the valid ones
+    are predicted with a single predict_rows(rows) call.
+
+    Returns:
+        dict: per-child recommendations in input order, counts per meal
+        category for the kitchen, and per-classroom counts when entries
+        carry a classroom
+    """
+    recommendations = [None] * len(children)
+    rows, positions = [], []
+    for i, child in enumerate(children):
+        entry = {'index': i}
+        for field in ('child_id', 'name', 'classroom'):
+            if isinstance(child, dict) and child.get(field) is not None:
+                entry[field] = child[field]
+        try:
+            if not isinstance(child, dict):
+                raise ValueError('Each child must be an object')
+            rows.append(parse_child(child))
+            positions.append(i)
+        except ValueError as e:
+            entry['error'] = f'Invalid input: {str(e)}'
+        recommendations[i] = entry
+
+    kitchen_totals = _empty_totals()
+    classroom_totals = {}
+    for i, result in zip(positions, predict_rows(rows) if rows else []):
+        entry = recommendations[i]
+        entry.update(result)
+        kitchen_totals.setdefault(
+            result['prediction'], {'meal_category': result['meal_category'], 'count': 0}
+        )['count'] += 1
+        if 'classroom' in entry:
+            totals = classroom_totals.setdefault(str(entry['classroom']), {})
+            totals[result['prediction']] = totals.get(result['prediction'], 0) + 1
+
+    plan = {
+        'success': True,
+        'children': len(children),
+        'planned': len(rows),
+        'failed': len(children) - len(rows),
+        'recommendations': recommendations,
+        'kitchen_totals': kitchen_totals
+    }
+    if classroom_totals:
+        plan['classroom_totals'] = classroom_totals
+    return plan
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Meal Decision Tree compiler
+Walks a fitted DecisionTreeClassifier's tree_ arrays and writes a standalone
+Python module of nested if statements with the leaf class probabilities,
+the class labels and the feature importances, so recommendations need no
+pandas, sklearn or joblib at runtime.
+
+Usage:
+    python meal_tree_compiler.py [model.pkl] [output.py]
+    (also rebuilds meal_answers.json next to the rules module)
+"""
+
+import sys
+import os
+import json
+import contextlib
+from shared_model_files import atomic_write, file_sha256
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL_PATH = os.path.join(MODEL_DIR, 'meal_decision_tree_model.pkl')
+DEFAULT_RULES_PATH = os.path.join(MODEL_DIR, 'meal_tree_rules.py')
+
+LEAF = -1
+
+def _leaf_probabilities(value):
+    """Leaf class distribution normalized like predict_proba"""
+    total = float(value.sum())
+    return [float(v) / total for v in value]
+
+def _emit_node(tree, node, feature_names, depth, lines):
+    indent = '    ' * depth
+    if tree.children_left[node] == LEAF:
+        probabilities = _leaf_probabilities(tree.value[node][0])
+        lines.append(f"{indent}return [{', '.join(repr(p) for p in probabilities)}]")
+        return
+
+    name = feature_names[tree.feature[node]]
+    lines.append(f"{indent}if {name} <= {float(tree.threshold[node])!r}:")
+    _emit_node(tree, tree.children_left[node], feature_names, depth + 1, lines)
+    lines.append(f"{indent}else:")
+    _emit_node(tree, tree.children_right[node], feature_names, depth + 1, lines)
+
+def compile_tree(model, feature_names, source_sha256=None):
+    """
+    Generate the source of a standalone rules module for a fitted tree.
+
+    Thresholds are compared as Python floats; sklearn compares float32
+    copies of the inputs, which is identical for the integer meal features.
+    """
+    tree = model.tree_
+    body = []
+    _emit_node(tree, 0, feature_names, 1, body)
+    arguments = ', '.join(feature_names)
+    importances = {name: float(value) for name, value in zip(feature_names, model.feature_importances_)}
+
+    lines = [
+        '"""',
+        'Compiled Meal Decision Tree rules',
+        'Generated by meal_tree_compiler.py from the fitted tree - do not edit.',
+        '"""',
+        '',
+        f'SOURCE_MODEL_SHA256 = {source_sha256!r}',
+        '',
+        f'FEATURE_NAMES = {json.dumps(list(feature_names))}',
+        '',
+        f'CLASSES = {json.dumps([str(c) for c in model.classes_])}',
+        '',
+        f'FEATURE_IMPORTANCES = {importances!r}',
+        '',
+        f'def predict_proba({arguments}):',
+        '    """Class probabilities in CLASSES order"""',
+        *body,
+        '',
+        f'def predict({arguments}):',
+        '    """Most probable class (first one on ties, like numpy argmax)"""',
+        f'    probabilities = predict_proba({arguments})',
+        '    return CLASSES[max(range(len(probabilities)), key=probabilities.__getitem__)]',
+        ''
+    ]
+    return '\n'.join(lines)
+
+def write_compiled_module(model, feature_names, output_path=DEFAULT_RULES_PATH, source_path=None):
+    """Compile the tree and write the module (atomically, so importers never see half a file)"""
+    source_sha256 = file_sha256(source_path) if source_path and os.path.exists(source_path) else None
+    source = compile_tree(model, feature_names, source_sha256)
+
+    with atomic_write(output_path, 'w') as f:
+        f.write(source)
+    return output_path
+
+if __name__ == '__main__':
+    model_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MODEL_PATH
+    output_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_RULES_PATH
+
+    try:
+        from meal_decision_tree import MealDecisionTree
+
+        meal_tree = MealDecisionTree()
+        with contextlib.redirect_stdout(sys.stderr):
+            if not meal_tree.load_model(model_path):
+                raise FileNotFoundError(f'No model at {model_path}')
+        meal_tree.compile_rules(output_path, model_path)
+        answers_path = meal_tree.save_answer_table(
+            os.path.join(os.path.dirname(os.path.abspath(output_path)), 'meal_answers.json'), model_path
+        )
+        print(json.dumps({'success': True, 'rules': output_path, 'answers': answers_path,
+                          'nodes': int(meal_tree.model.tree_.node_count)}))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
@@ -0,0 +1,30 @@
+"""
+Compiled Meal Decision Tree rules
+Generated by meal_tree_compiler.py from the fitted tree - do not edit.
+"""
+
+SOURCE_MODEL_SHA256 = '1acceb7412b6f04acb42d6cb64c41f290ac5c64afa2aecac1373a1e11fdca42f'
+
+FEATURE_NAMES = ["age", "dietary_preference", "has_allergy"]
+
+CLASSES = ["allergy_free_soft", "allergy_free_standard", "soft_nonveg", "soft_veg", "standard_nonveg", "standard_veg"]
+
+FEATURE_IMPORTANCES = {'age': 0.423914760659306, 'dietary_preference': 0.2335232026774796, 'has_allergy': 0.3425620366632144}
+
+def predict_proba(age, dietary_preference, has_allergy):
+    """Class probabilities in CLASSES order"""
+    if has_allergy <= 0.5:
+        if dietary_preference <= 0.5:
+            return [0.0, 0.0, 0.0, 0.4, 0.0, 0.6]
+        else:
+            return [0.0, 0.0, 0.42857142857142855, 0.0, 0.5714285714285714, 0.0]
+    else:
+        if age <= 2.5:
+            return [1.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+        else:
+            return [0.0, 1.0, 0.0, 0.0, 0.0, 0.0]
+
+def predict(age, dietary_preference, has_allergy):
+    """Most probable class (first one on ties, like numpy argmax)"""
+    probabilities = predict_proba(age, dietary_preference, has_allergy)
+    return CLASSES[max(range(len(probabilities)), key=probabilities.__getitem__)]
@@ -1,11 +1,14 @@
 """
 API wrapper for Product Purchase SVM
-Handles training and prediction requests
+Handles training and prediction requests, and catalog-wide propensity scoring
+
+Usage:
+    python product_purchase_api.py score_catalog ['{"customer_types": [...], "output_dir": "...", "precision": "float32"}'] < products.json
 """
 
 import sys
 import json
-from product_purchase_svm import train_model, predict
+from product_purchase_svm import train_model, predict, score_catalog_main
 
 if __name__ == '__main__':
     if len(sys.argv) < 2:
@@ -29,6 +32,9 @@ if __name__ == '__main__':
         except json.JSONDecodeError as e:
             result = {'success': False, 'error': f'Invalid JSON data: {str(e)}'}
             print(json.dumps(result))
+    elif action == 'score_catalog':
+        # Catalog on stdin, ranked JSON lines per customer type
+        score_catalog_main(sys.argv, sys.stdin)
     else:
         result = {'success': False, 'error': 'Invalid action'}
         print(json.dumps(result))
@@ -5,16 +5,22 @@ Predicts whether a customer will purchase a product based on:
 - Price
 - Discount offered (%)
 - Customer type (Parent, Teacher, Staff)
+
+score_catalog ranks a whole product catalog for every customer type with a
+single predict_proba call, optionally with float32 support vectors
+(precision='float32', see reduced_precision.py for the drift report).
 """
 
 import sys
 import json
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.svm import SVC
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 import pickle
 import os
+from shared_model_files import atomic_write
 
 # Sample training data
 training_data = [
@@ -63,8 +69,8 @@ training_data = [
     ['Skincare', 42, 10, 'Teacher', 'Yes'],
 ]
 
-def train_model():
-    """Train the SVM model"""
+def train_model(model_dir=None):
+    """Train the SVM model (saved next to this script unless model_dir is given)"""
     try:
         # Create DataFrame
         df = pd.DataFrame(training_data, columns=['category', 'price', 'discount', 'customer_type', 'purchase'])
@@ -99,7 +105,7 @@ def train_model():
         accuracy = svm_model.score(X_test, y_test)
         
         # Save model and encoders
-        model_dir = os.path.dirname(os.path.abspath(__file__))
+        model_dir = model_dir or os.path.dirname(os.path.abspath(__file__))
         
         with open(os.path.join(model_dir, 'svm_model.pkl'), 'wb') as f:
             pickle.dump(svm_model, f)
@@ -200,6 +206,190 @@ def predict(data):
         print(json.dumps(error))
         return error
 
+def _match_class(value, classes):
+    """Encoder class for a catalog value, ignoring case and a plural 's' ('toys' -> 'Toy')"""
+    text = str(value).strip().lower()
+    for name in classes:
+        if text in (name.lower(), name.lower() + 's'):
+            return name
+    return None
+
+def _product_id(product):
+    product_id = product.get('_id', product.get('product_id', product.get('id')))
+    if isinstance(product_id, dict):
+        product_id = product_id.get('$oid')
+    return product_id
+
+def encode_catalog(products, category_classes):
+    """
+    Catalog products as [category, price, discount] rows.
+    
+    Products carry category, price and discount (or the Product model's
+    activeDiscount). Products the model cannot score get an error instead.
+    
+    Returns:
+        tuple: (rows list of (category, price, discount) for scored products,
+        errors list with None for scored products)
+    """
+    rows, errors = [], []
+    for product in products:
+        try:
+            category = _match_class(product.get('category'), category_classes)
+            if category is None:
+                raise ValueError(f"Unknown category: {product.get('category')}")
+            price = float(product['price'])
+            discount = float(product.get('discount', product.get('activeDiscount', 0)) or 0)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            errors.append(str(e) if not isinstance(e, KeyError) else f'Missing field: {e.args[0]}')
+            continue
+        rows.append((category, price, discount))
+        errors.append(None)
+    return rows, errors
+
+def _write_jsonl(path, entries):
+    with atomic_write(path, 'w') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + '\n')
+
+# Inference precisions score_catalog accepts: sklearn's float64 SVC, or
+# NumpySVC with float32 support vectors (half the memory)
+CATALOG_PRECISIONS = ('float64', 'float32')
+
+def score_catalog(products, customer_types=None, output=None, output_dir=None, model_dir=None,
+                  precision='float64'):
+    """
+    Purchase propensity for every product x customer type in one pass.
+    
+    All (product, customer type) pairs are encoded into one matrix, scaled
+    and scored with a single predict_proba call, then ranked by purchase
+    probability per customer type. Rankings are written as JSON lines, to
+    one purchase_propensity_<type>.jsonl file per customer type in
+    `output_dir` and/or to `output` (each line tagged with its customer type).
+    An entry's prediction is the SVM decision, as in predict(); Platt-scaled
+    probabilities can put it on the other side of 0.5. precision='float32'
+    scores with reduced_precision.NumpySVC and float32 support vectors.
+    
+    Returns:
+        dict: summary with the rankings per customer type and unscored products
+    """
+    if precision not in CATALOG_PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision} (expected one of {', '.join(CATALOG_PRECISIONS)})")
+    model_dir = model_dir or os.path.dirname(os.path.abspath(__file__))
+    
+    with open(os.path.join(model_dir, 'svm_model.pkl'), 'rb') as f:
+        svm_model = pickle.load(f)
+    with open(os.path.join(model_dir, 'svm_scaler.pkl'), 'rb') as f:
+        scaler = pickle.load(f)
+    with open(os.path.join(model_dir, 'svm_encoders.pkl'), 'rb') as f:
+        label_encoders = pickle.load(f)
+    
+    known_types = list(label_encoders['customer_type'].classes_)
+    if customer_types is None:
+        customer_types = known_types
+    else:
+        matched = [_match_class(name, known_types) for name in customer_types]
+        unknown = [name for name, match in zip(customer_types, matched) if match is None]
+        if unknown:
+            raise ValueError(f"Unknown customer types: {', '.join(map(str, unknown))}")
+        customer_types = list(dict.fromkeys(matched))
+    
+    rows, errors = encode_catalog(products, label_encoders['category'].classes_)
+    scored = [i for i, error in enumerate(errors) if error is None]
+    
+    # One row per (customer type, product): customer types vary slowest
+    n_products, n_types = len(rows), len(customer_types)
+    X = np.empty((n_types * n_products, 4))
+    if n_products:
+        X[:, 0] = np.tile(label_encoders['category'].transform([row[0] for row in rows]), n_types)
+        X[:, 1] = np.tile([row[1] for row in rows], n_types)
+        X[:, 2] = np.tile([row[2] for row in rows], n_types)
+        X[:, 3] = np.repeat(label_encoders['customer_type'].transform(customer_types), n_products)
+        X_scaled = scaler.transform(pd.DataFrame(X, columns=['category', 'price', 'discount', 'customer_type']))
+        if precision == 'float32':
+            from reduced_precision import NumpySVC
+            engine = NumpySVC(svm_model, np.float32)
+        else:
+            engine = svm_model
+        probabilities = engine.predict_proba(X_scaled)
+        purchase = probabilities[:, list(svm_model.classes_).index('Yes')].reshape(n_types, n_products)
+        # Binary SVC: a positive decision value is the second class, exactly as predict() decides
+        decision = engine.decision_function(X_scaled)
+        predicted = svm_model.classes_[(decision > 0).astype(int)].reshape(n_types, n_products)
+    else:
+        purchase = np.zeros((n_types, 0))
+        predicted = np.empty((n_types, 0), dtype=object)
+    
+    # Highest propensity first; ties keep catalog order
+    order = np.argsort(-purchase, axis=1, kind='stable')
+    
+    rankings = {}
+    for t, customer_type in enumerate(customer_types):
+        entries = []
+        for rank, column in enumerate(order[t], start=1):
+            product = products[scored[column]]
+            probability = float(purchase[t, column])
+            entries.append({
+                'customer_type': customer_type,
+                'rank': rank,
+                'index': scored[column],
+                'product_id': _product_id(product),
+                'name': product.get('name'),
+                'category': rows[column][0],
+                'price': rows[column][1],
+                'discount': rows[column][2],
+                'probability_yes': probability,
+                'prediction': str(predicted[t, column])
+            })
+        rankings[customer_type] = entries
+    
+    files = {}
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        for customer_type, entries in rankings.items():
+            files[customer_type] = os.path.join(output_dir, f'purchase_propensity_{customer_type.lower()}.jsonl')
+            _write_jsonl(files[customer_type], entries)
+    if output is not None:
+        for entries in rankings.values():
+            for entry in entries:
+                output.write(json.dumps(entry) + '\n')
+        output.flush()
+    
+    return {
+        'success': True,
+        'products': len(products),
+        'scored': n_products,
+        'customer_types': customer_types,
+        'precision': precision,
+        'rankings': rankings,
+        'files': files,
+        'errors': [{'index': i, 'error': error} for i, error in enumerate(errors) if error is not None]
+    }
+
+def read_catalog(stream):
+    """Read catalog products from stdin as a JSON array or JSON lines"""
+    text = stream.read().strip()
+    if text.startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def score_catalog_main(argv, stream):
+    """
+    score_catalog action: products on stdin, options as an argv JSON object
+    ({"customer_types": [...], "output_dir": ..., "precision": "float32"}). Without output_dir the
+    rankings go to stdout as JSON lines and the summary to stderr.
+    """
+    try:
+        options = json.loads(argv[2]) if len(argv) > 2 else {}
+        output_dir = options.get('output_dir')
+        summary = score_catalog(read_catalog(stream), options.get('customer_types'),
+                                output=None if output_dir else sys.stdout, output_dir=output_dir,
+                                precision=options.get('precision', 'float64'))
+        del summary['rankings']
+        print(json.dumps(summary), file=sys.stdout if output_dir else sys.stderr)
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+
 def generate_explanation(category, price, discount, customer_type, prediction, confidence):
     """Generate human-readable explanation"""
     
@@ -259,6 +449,8 @@ if __name__ == '__main__':
             predict(data)
         except json.JSONDecodeError:
             print(json.dumps({'error': 'Invalid JSON data'}))
+    elif action == 'score_catalog':
+        score_catalog_main(sys.argv, sys.stdin)
     else:
         print(json.dumps({'error': 'Invalid action'}))
 
@@ -90,7 +90,7 @@ def generate_training_data():
     
     return np.array(X), np.array(y)
 
-def train_svm_model():
+def train_svm_model(model_dir=None):
     """Train the SVM model for purchase prediction"""
     print("🤖 Training SVM Purchase Prediction Model...")
     
@@ -126,7 +126,7 @@ def train_svm_model():
     print(f"✅ Test Accuracy: {test_score:.2%}")
     
     # Save model and scaler
-    model_dir = os.path.dirname(os.path.abspath(__file__))
+    model_dir = model_dir or os.path.dirname(os.path.abspath(__file__))
     model_path = os.path.join(model_dir, 'purchase_svm_model.pkl')
     scaler_path = os.path.join(model_dir, 'purchase_svm_scaler.pkl')
     
@@ -141,7 +141,7 @@ def train_svm_model():
     
     return svm_model, scaler
 
-def predict_purchase(category, price, discount, customer_type='parent'):
+def predict_purchase(category, price, discount, customer_type='parent', model_dir=None):
     """
     Predict if a customer will purchase a product
     
@@ -150,24 +150,25 @@ def predict_purchase(category, price, discount, customer_type='parent'):
         price: Product price
         discount: Discount percentage (0-100)
         customer_type: Customer type (parent, guardian, educator)
+        model_dir: Directory holding the built model (defaults to this folder)
     
     Returns:
-        dict: Prediction result with decision and confidence
+        dict: Prediction result with decision and confidence (the rule-based
+        fallback if the model has not been built - predictions never train)
     """
     try:
         # Load model and scaler
-        model_dir = os.path.dirname(os.path.abspath(__file__))
+        model_dir = model_dir or os.path.dirname(os.path.abspath(__file__))
         model_path = os.path.join(model_dir, 'purchase_svm_model.pkl')
         scaler_path = os.path.join(model_dir, 'purchase_svm_scaler.pkl')
         
         if not os.path.exists(model_path) or not os.path.exists(scaler_path):
-            print("⚠️ Model not found. Training new model...")
-            svm_model, scaler = train_svm_model()
-        else:
-            with open(model_path, 'rb') as f:
-                svm_model = pickle.load(f)
-            with open(scaler_path, 'rb') as f:
-                scaler = pickle.load(f)
+            raise FileNotFoundError(f"Purchase model not built in {model_dir}; run build_models.py")
+        
+        with open(model_path, 'rb') as f:
+            svm_model = pickle.load(f)
+        with open(scaler_path, 'rb') as f:
+            scaler = pickle.load(f)
         
         # Encode category
         category_map = {
@@ -247,7 +248,7 @@ def predict_purchase(category, price, discount, customer_type='parent'):
         }
         
     except Exception as e:
-        print(f"❌ Error in prediction: {e}")
+        print(f"❌ Error in prediction: {e}", file=sys.stderr)
         # Fallback rule-based prediction
         will_purchase = (
             discount >= 15 or
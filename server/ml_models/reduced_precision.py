@@ -0,0 +1,244 @@
+"""
+Reduced-precision inference for the demand network and the purchase SVM
+Runs the BPNN with float32 or int8-quantized weights (demand_bpnn_numpy)
+and RBF SVMs with float32 support vectors (NumpySVC), and reports how far
+each variant drifts from the float64 sklearn models. The float32 NumpySVC
+serves product_purchase_svm.score_catalog(precision='float32').
+
+Usage:
+    python reduced_precision.py report
+"""
+
+import sys
+import json
+import os
+import pickle
+import numpy as np
+from demand_bpnn_numpy import BUNDLE_PATH, PRECISIONS, NumpyDemandPredictor, encode_products
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Column order the purchase SVM scaler was fitted with
+SVM_FEATURE_COLUMNS = ['category', 'price', 'discount', 'customer_type']
+
+def _sigmoid_predict(decision_value, A, B):
+    """libsvm's numerically stable Platt sigmoid"""
+    fApB = decision_value * A + B
+    exp = np.exp(-np.abs(fApB))
+    return np.where(fApB >= 0, exp / (1.0 + exp), 1.0 / (1.0 + exp))
+
+def _multiclass_probability(r):
+    """
+    libsvm's pairwise coupling (Wu, Lin and Weng method 2), vectorized over rows.
+
+    r[:, i, j] is the pairwise probability of class i against class j.
+    sklearn runs this iteration even for two classes, so it is reproduced
+    here to match predict_proba exactly.
+    """
+    n, k = r.shape[0], r.shape[1]
+    Q = -r.transpose(0, 2, 1) * r
+    for t in range(k):
+        Q[:, t, t] = (r[:, :, t] ** 2).sum(axis=1) - r[:, t, t] ** 2
+
+    p = np.full((n, k), 1.0 / k, dtype=r.dtype)
+    eps = 0.005 / k
+    active = np.ones(n, dtype=bool)
+    for _ in range(max(100, k)):
+        Qp = np.einsum('ntj,nj->nt', Q, p)
+        pQp = (p * Qp).sum(axis=1)
+        active &= ~(np.abs(Qp - pQp[:, None]).max(axis=1) < eps)
+        if not active.any():
+            break
+
+        a = active
+        for t in range(k):
+            diff = (-Qp[a, t] + pQp[a]) / Q[a, t, t]
+            p[a, t] += diff
+            pQp[a] = (pQp[a] + diff * (diff * Q[a, t, t] + 2 * Qp[a, t])) / (1 + diff) ** 2
+            Qp[a] = (Qp[a] + diff[:, None] * Q[a, t, :]) / (1 + diff)[:, None]
+            p[a] /= (1 + diff)[:, None]
+    return p
+
+class NumpySVC:
+    """
+    Decision function and probabilities of a fitted binary RBF sklearn SVC,
+    computed in plain NumPy with float64 or float32 support vectors.
+    """
+
+    def __init__(self, svc, dtype=np.float64):
+        if svc.kernel != 'rbf':
+            raise ValueError(f"Unsupported kernel: {svc.kernel}")
+        if len(svc.classes_) != 2:
+            raise ValueError("Only binary SVCs are supported")
+
+        self.dtype = np.dtype(dtype)
+        self.classes_ = svc.classes_
+        self.support_vectors = np.asarray(svc.support_vectors_, dtype=self.dtype)
+        self.dual_coef = np.asarray(svc.dual_coef_[0], dtype=self.dtype)
+        self.intercept = self.dtype.type(svc.intercept_[0])
+        self.gamma = self.dtype.type(svc._gamma)
+        self.sv_norms = (self.support_vectors ** 2).sum(axis=1)
+        self.probA = getattr(svc, 'probA_', np.array([]))
+        self.probB = getattr(svc, 'probB_', np.array([]))
+
+    def weight_bytes(self):
+        """Memory held by support vectors, their norms and dual coefficients"""
+        return int(self.support_vectors.nbytes + self.sv_norms.nbytes + self.dual_coef.nbytes)
+
+    def decision_function(self, X):
+        """Signed distance to the separating surface (positive means classes_[1])"""
+        X = np.asarray(X, dtype=self.dtype)
+        squared = (X ** 2).sum(axis=1)[:, None] + self.sv_norms[None, :] - 2 * X @ self.support_vectors.T
+        kernel = np.exp(-self.gamma * np.maximum(squared, 0))
+        return kernel @ self.dual_coef + self.intercept
+
+    def predict(self, X):
+        """Class labels"""
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+    def predict_proba(self, X):
+        """Platt-scaled class probabilities, columns in classes_ order"""
+        if len(self.probA) == 0:
+            raise ValueError("The SVC was fitted without probability=True")
+
+        decision = self.decision_function(X).astype(np.float64)
+        # libsvm's decision value is the negation of sklearn's for binary models
+        r01 = np.clip(_sigmoid_predict(-decision, self.probA[0], self.probB[0]), 1e-7, 1 - 1e-7)
+        r = np.zeros((len(decision), 2, 2))
+        r[:, 0, 1] = r01
+        r[:, 1, 0] = 1 - r01
+        return _multiclass_probability(r)
+
+def drift_stats(reference_proba, proba, class_names, labels=None):
+    """Agreement and probability drift of a reduced-precision variant against float64"""
+    reference = class_names[reference_proba.argmax(axis=1)]
+    predicted = class_names[proba.argmax(axis=1)]
+    drift = np.abs(proba - reference_proba)
+    stats = {
+        'label_agreement': float((predicted == reference).mean()) if len(reference) else 1.0,
+        'max_probability_drift': float(drift.max()) if drift.size else 0.0,
+        'mean_probability_drift': float(drift.mean()) if drift.size else 0.0
+    }
+    if labels is not None:
+        stats['accuracy'] = float((predicted == labels).mean())
+        stats['reference_accuracy'] = float((reference == labels).mean())
+    return stats
+
+def demand_grid(product_classes):
+    """Dense grid over product type, previous sales, delivery time and price"""
+    grid = np.array(np.meshgrid(
+        np.arange(len(product_classes)),
+        np.linspace(0, 150, 31),
+        np.arange(1, 8),
+        np.linspace(100, 1200, 45)
+    )).reshape(4, -1).T
+    return grid[:, [1, 2, 3, 0]]
+
+def bpnn_precision_report(bundle_path=BUNDLE_PATH):
+    """Compare float32 and int8 BPNN inference with float64 on the training data and a dense grid"""
+    from demand_bpnn import training_data
+
+    reference = NumpyDemandPredictor(bundle_path)
+    products = [
+        {'product_type': product_type, 'previous_sales': sales, 'delivery_time': delivery, 'price': price}
+        for product_type, sales, delivery, price, _ in training_data
+    ]
+    labels = np.array([row[4] for row in training_data])
+    train_features, _, _ = encode_products(products, reference.product_classes)
+    grid = demand_grid(reference.product_classes)
+
+    reference_train = reference.predict_proba(train_features)
+    reference_grid = reference.predict_proba(grid)
+
+    report = {}
+    for precision in PRECISIONS:
+        predictor = NumpyDemandPredictor(bundle_path, precision) if precision != 'float64' else reference
+        train_stats = drift_stats(reference_train, predictor.predict_proba(train_features), reference.class_names,
+                                  labels=labels)
+        grid_stats = drift_stats(reference_grid, predictor.predict_proba(grid), reference.class_names)
+        report[precision] = {
+            'weight_bytes': predictor.weight_bytes(),
+            'accuracy': train_stats['accuracy'],
+            'reference_accuracy': train_stats['reference_accuracy'],
+            'label_agreement': grid_stats['label_agreement'],
+            'max_probability_drift': max(train_stats['max_probability_drift'], grid_stats['max_probability_drift']),
+            'mean_probability_drift': grid_stats['mean_probability_drift'],
+            'grid_points': len(grid)
+        }
+    return report
+
+def load_svm_artifacts(model_dir=MODEL_DIR):
+    """Load the product purchase SVM, its scaler and label encoders"""
+    artifacts = []
+    for name in ['svm_model.pkl', 'svm_scaler.pkl', 'svm_encoders.pkl']:
+        with open(os.path.join(model_dir, name), 'rb') as f:
+            artifacts.append(pickle.load(f))
+    return tuple(artifacts)
+
+def _scale_svm_features(scaler, features):
+    """Scale encoded SVM rows the way product_purchase_svm does"""
+    if hasattr(scaler, 'feature_names_in_'):
+        import pandas as pd
+        features = pd.DataFrame(features, columns=SVM_FEATURE_COLUMNS)
+    return scaler.transform(features)
+
+def svm_precision_report(model_dir=MODEL_DIR):
+    """Compare float64 and float32 NumpySVC inference with sklearn on the training data and a grid"""
+    from product_purchase_svm import training_data
+
+    svm_model, scaler, label_encoders = load_svm_artifacts(model_dir)
+
+    rows = np.array([
+        [label_encoders['category'].transform([category])[0], price, discount,
+         label_encoders['customer_type'].transform([customer_type])[0]]
+        for category, price, discount, customer_type, _ in training_data
+    ], dtype=np.float64)
+    labels = np.array([row[4] for row in training_data])
+    grid = np.array(np.meshgrid(
+        np.arange(len(label_encoders['category'].classes_)),
+        np.linspace(5, 80, 31),
+        np.linspace(0, 30, 31),
+        np.arange(len(label_encoders['customer_type'].classes_))
+    )).reshape(4, -1).T
+
+    train_scaled = _scale_svm_features(scaler, rows)
+    grid_scaled = _scale_svm_features(scaler, grid)
+    reference_train = svm_model.predict_proba(train_scaled)
+    reference_grid = svm_model.predict_proba(grid_scaled)
+
+    report = {}
+    for name, dtype in [('float64', np.float64), ('float32', np.float32)]:
+        engine = NumpySVC(svm_model, dtype)
+        train_stats = drift_stats(reference_train, engine.predict_proba(train_scaled), svm_model.classes_,
+                                  labels=labels)
+        grid_stats = drift_stats(reference_grid, engine.predict_proba(grid_scaled), svm_model.classes_)
+        report[name] = {
+            'weight_bytes': engine.weight_bytes(),
+            'accuracy': train_stats['accuracy'],
+            'reference_accuracy': train_stats['reference_accuracy'],
+            'label_agreement': grid_stats['label_agreement'],
+            'decision_agreement': float((engine.predict(grid_scaled) == svm_model.predict(grid_scaled)).mean()),
+            'max_probability_drift': max(train_stats['max_probability_drift'], grid_stats['max_probability_drift']),
+            'mean_probability_drift': grid_stats['mean_probability_drift'],
+            'grid_points': len(grid)
+        }
+    return report
+
+def precision_report():
+    """Parity report for every reduced-precision variant"""
+    return {
+        'success': True,
+        'bpnn': bpnn_precision_report(),
+        'product_purchase_svm': svm_precision_report()
+    }
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'report':
+        print(json.dumps({'error': 'Usage: reduced_precision.py report'}))
+        sys.exit(1)
+
+    try:
+        print(json.dumps(precision_report(), indent=2))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
@@ -0,0 +1,236 @@
+"""
+Rolling monthly sales features for demand prediction
+Streams an exported orders file (JSON lines, e.g. from mongoexport) once
+and aggregates Order items into per-product monthly sales, average price
+and order counts. Memory grows with products x retained months, not with
+the number of orders.
+
+Each output row describes one product in one month, in the shape the batch
+demand predictor expects (product_type, previous_sales, price), plus the
+observed sales of that month.
+
+Usage:
+    python sales_features.py <orders.jsonl> [--window 3] [--retain 24]
+                             [--product-types types.json] [--latest]
+"""
+
+import sys
+import json
+from datetime import datetime, timezone
+
+# Orders that never turned into sales
+EXCLUDED_STATUSES = ('cancelled', 'refunded')
+
+def _unwrap(value, key):
+    """Unwrap MongoDB extended JSON ({"$oid": ...}, {"$date": ...}, {"$numberLong": ...})"""
+    while isinstance(value, dict) and key in value:
+        value = value[key]
+    return value
+
+def parse_date(value):
+    """Order createdAt as a datetime (ISO string, epoch milliseconds or extended JSON)"""
+    value = _unwrap(value, '$date')
+    value = _unwrap(value, '$numberLong')
+    if isinstance(value, str) and value.lstrip('-').isdigit():
+        value = int(value)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    raise ValueError(f'Unrecognised date: {value!r}')
+
+def month_index(timestamp):
+    """Months since year 0, so consecutive months differ by one"""
+    return timestamp.year * 12 + timestamp.month - 1
+
+def month_label(index):
+    """'YYYY-MM' for a month index"""
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+def _number(value):
+    value = _unwrap(value, '$numberInt')
+    value = _unwrap(value, '$numberDouble')
+    value = _unwrap(value, '$numberLong')
+    return float(value)
+
+class SalesFeatureBuilder:
+    """
+    Single-pass aggregator of order items into monthly product sales.
+
+    Rows cover the `retain_months` up to the newest month seen; `window`
+    more months before them are kept as lag history. Older buckets are
+    dropped as the stream advances, and late orders for dropped months are
+    counted in `skipped_items`.
+    """
+
+    def __init__(self, window=3, retain_months=24, product_types=None,
+                 excluded_statuses=EXCLUDED_STATUSES):
+        self.window = window
+        self.retain_months = max(retain_months, window + 1)
+        self.product_types = product_types or {}
+        self.excluded_statuses = set(excluded_statuses)
+        # product id -> {month index: [units, revenue, orders]}
+        self.monthly = {}
+        self.names = {}
+        self.categories = {}
+        self.latest_month = None
+        self.orders = 0
+        self.skipped_orders = 0
+        self.skipped_items = 0
+
+    def add_order(self, order):
+        """Fold one order document into the monthly buckets; returns False if it was skipped"""
+        try:
+            if order.get('status') in self.excluded_statuses:
+                self.skipped_orders += 1
+                return False
+            month = month_index(parse_date(order['createdAt']))
+            items = order.get('items') or []
+        except (AttributeError, KeyError, TypeError, ValueError):
+            self.skipped_orders += 1
+            return False
+
+        if self.latest_month is None or month > self.latest_month:
+            self.latest_month = month
+            self._prune()
+        if month <= self._history_cutoff():
+            self.skipped_items += len(items)
+            return False
+
+        counted = set()
+        for item in items:
+            try:
+                product_id = _unwrap(item.get('product'), '$oid') or item.get('name')
+                units = _number(item['quantity'])
+                price = _number(item['price'])
+            except (AttributeError, KeyError, TypeError, ValueError):
+                self.skipped_items += 1
+                continue
+            if not product_id:
+                self.skipped_items += 1
+                continue
+
+            product_id = str(product_id)
+            bucket = self.monthly.setdefault(product_id, {}).setdefault(month, [0.0, 0.0, 0])
+            bucket[0] += units
+            bucket[1] += units * price
+            if product_id not in counted:
+                bucket[2] += 1
+                counted.add(product_id)
+            if item.get('name'):
+                self.names[product_id] = item['name']
+            if item.get('category'):
+                self.categories[product_id] = item['category']
+
+        self.orders += 1
+        return True
+
+    def _history_cutoff(self):
+        """Newest month index that is no longer kept (emitted months plus lag history)"""
+        return self.latest_month - self.retain_months - self.window
+
+    def _prune(self):
+        cutoff = self._history_cutoff()
+        for product_id, months in self.monthly.items():
+            for month in [month for month in months if month <= cutoff]:
+                del months[month]
+
+    def product_type(self, product_id):
+        """Mapped product type, else the exported item category, else 'Unknown'"""
+        return self.product_types.get(product_id) or self.categories.get(product_id) or 'Unknown'
+
+    def rows(self, latest_only=False):
+        """
+        Yield feature rows per product and month, oldest month first.
+
+        previous_sales is the units sold in the month before, rolling_sales
+        the mean over the `window` months before, avg_price the mean unit
+        price in the month (carried forward through months without sales).
+        Months before a product's first known price are not yielded. With
+        latest_only, only each product's row for the newest month is
+        yielded.
+        """
+        if self.latest_month is None:
+            return
+        first_month = self.latest_month - self.retain_months + 1
+
+        for product_id in sorted(self.monthly):
+            months = self.monthly[product_id]
+            if not months:
+                continue
+            start = max(min(months), first_month)
+            history = [months.get(month, (0.0, 0.0, 0))[0] for month in range(start - self.window, start)]
+            # Seed the carried price from the last month with sales before start
+            earlier = [months[month] for month in sorted(months) if month < start and months[month][0]]
+            price = earlier[-1][1] / earlier[-1][0] if earlier else None
+
+            for month in range(start, self.latest_month + 1):
+                units, revenue, orders = months.get(month, (0.0, 0.0, 0))
+                if units:
+                    price = revenue / units
+                if price is None or (latest_only and month != self.latest_month):
+                    history = history[1:] + [units]
+                    continue
+
+                yield {
+                    'product_id': product_id,
+                    'name': self.names.get(product_id),
+                    'product_type': self.product_type(product_id),
+                    'month': month_label(month),
+                    'sales': units,
+                    'previous_sales': history[-1],
+                    'rolling_sales': sum(history) / len(history),
+                    'avg_price': price,
+                    'price': price,
+                    'order_count': orders
+                }
+                history = history[1:] + [units]
+
+    def summary(self):
+        return {
+            'orders': self.orders,
+            'skipped_orders': self.skipped_orders,
+            'skipped_items': self.skipped_items,
+            'products': len(self.monthly),
+            'latest_month': month_label(self.latest_month) if self.latest_month is not None else None
+        }
+
+def build_features(lines, **options):
+    """Aggregate an iterable of order JSON lines; malformed lines are skipped"""
+    builder = SalesFeatureBuilder(**options)
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            order = json.loads(line)
+        except json.JSONDecodeError:
+            builder.skipped_orders += 1
+            continue
+        builder.add_order(order)
+    return builder
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if not args:
+        print(json.dumps({'success': False, 'error': 'Missing orders file'}))
+        sys.exit(1)
+
+    try:
+        options = {}
+        if '--window' in args:
+            options['window'] = int(args[args.index('--window') + 1])
+        if '--retain' in args:
+            options['retain_months'] = int(args[args.index('--retain') + 1])
+        if '--product-types' in args:
+            with open(args[args.index('--product-types') + 1], 'r') as f:
+                options['product_types'] = json.load(f)
+
+        with open(args[0], 'r', encoding='utf-8') as f:
+            builder = build_features(f, **options)
+
+        for row in builder.rows(latest_only='--latest' in args):
+            sys.stdout.write(json.dumps(row) + '\n')
+        sys.stderr.write(json.dumps({'success': True, **builder.summary()}) + '\n')
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
@@ -0,0 +1,23 @@
+"""
+Model file helpers shared with the feedback models
+Loads ml_models/model_files.py (atomic_write, file_sha256) so the server
+models and the feedback classifier use one implementation.
+"""
+
+import os
+import sys
+import importlib.util
+
+SHARED_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'ml_models', 'model_files.py'
+)
+
+_shared = sys.modules.get('model_files')
+if _shared is None:
+    _spec = importlib.util.spec_from_file_location('model_files', SHARED_PATH)
+    _shared = importlib.util.module_from_spec(_spec)
+    sys.modules['model_files'] = _shared
+    _spec.loader.exec_module(_shared)
+
+atomic_write = _shared.atomic_write
+file_sha256 = _shared.file_sha256
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for the ahead-of-time model build and the no-training serving paths
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import build_models
+from build_models import BUILDERS, build_all, promote, list_versions, read_manifest
+from shared_model_files import file_sha256
+from meal_recommender import load_answer_table
+from meal_decision_tree_api import predict_rows
+from purchase_prediction_svm import predict_purchase
+
+def test_build_and_promote():
+    """Test that one build trains, validates and versions every model, then promotes it"""
+    print("🏗️  Testing ahead-of-time model build...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifacts_dir = os.path.join(tmp_dir, 'artifacts')
+        manifest = build_all('v1', artifacts_dir=artifacts_dir)
+
+        assert sorted(manifest['models']) == sorted(BUILDERS)
+        assert read_manifest('v1', artifacts_dir) == manifest
+        for name, model in manifest['models'].items():
+            for filename, sha256 in model['files'].items():
+                assert file_sha256(os.path.join(artifacts_dir, 'v1', name, filename)) == sha256
+        assert manifest['models']['demand_bpnn']['metrics']['bundle_drift'] < 1e-9
+
+        try:
+            build_all('v1', models=['meal'], artifacts_dir=artifacts_dir)
+            assert False, "rebuilding an existing version should fail"
+        except FileExistsError:
+            pass
+
+        serving_dirs = {name: os.path.join(tmp_dir, 'serving', name) for name in BUILDERS}
+        installed = promote('v1', artifacts_dir, serving_dirs)
+        assert len(installed) == sum(len(model['files']) for model in manifest['models'].values())
+        assert list_versions(artifacts_dir) == (['v1'], 'v1')
+        assert not [name for directory in serving_dirs.values() for name in os.listdir(directory)
+                    if name.endswith('.tmp')]
+
+        meal_dir = serving_dirs['meal']
+        assert load_answer_table(os.path.join(meal_dir, 'meal_answers.json'),
+                                 os.path.join(meal_dir, 'meal_decision_tree_model.pkl')) is not None
+        result = predict_purchase('toy', 40, 20, 'parent', model_dir=serving_dirs['purchase_svm'])
+        assert 'Rule-based' not in result['explanation']
+        print(f"   built and promoted {len(installed)} files ✅")
+
+def test_failed_validation_leaves_no_version():
+    """Test that a build whose validation fails leaves nothing behind"""
+    print("\n🧪 Testing failed build cleanup...")
+
+    def broken(output_dir):
+        open(os.path.join(output_dir, 'model.pkl'), 'w').close()
+        build_models._check(False, 'broken model')
+
+    BUILDERS['broken'] = broken
+    try:
+        with tempfile.TemporaryDirectory() as artifacts_dir:
+            try:
+                build_all('v2', models=['meal', 'broken'], artifacts_dir=artifacts_dir)
+                assert False, "validation failure should abort the build"
+            except ValueError as e:
+                assert 'broken model' in str(e)
+            assert os.listdir(artifacts_dir) == []
+    finally:
+        del BUILDERS['broken']
+    print("   no partial version left ✅")
+
+def test_serving_paths_never_train():
+    """Test that predictions without built models fall back or fail fast instead of training"""
+    print("\n🚫 Testing serving paths without models...")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        result = predict_purchase('diaper', 40, 0, 'parent', model_dir=model_dir)
+        assert result['confidence'] == 0.7 and 'Rule-based' in result['explanation']
+
+        try:
+            predict_rows([(2.5, 0, 1)], os.path.join(model_dir, 'meal_decision_tree_model.pkl'),
+                         os.path.join(model_dir, 'meal_answers.json'))
+            assert False, "a missing meal model should not be trained"
+        except FileNotFoundError as e:
+            assert 'build_models.py' in str(e)
+
+        assert os.listdir(model_dir) == []
+    print("   fallback and fail-fast, nothing trained ✅")
+
+if __name__ == "__main__":
+    try:
+        test_build_and_promote()
+        test_failed_validation_leaves_no_version()
+        test_serving_paths_never_train()
+        print("\n✅ All model build tests completed successfully!")
+    except Exception as e:
+        print(f"❌ Error during testing: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Test script for the BPNN demand prediction model
+"""
+
+import sys
+import os
+import io
+import json
+import shutil
+import tempfile
+import subprocess
+from datetime import date
+import numpy as np
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from demand_bpnn import (
+    predict, predict_batch, retrain_model, search_hyperparameters, sweep_demand, train_type_models,
+    training_data, load_artifacts, predict_proba_matrix, parse_search_options, type_model_filename
+)
+from demand_bpnn_numpy import DemandModelRouter, NumpyDemandPredictor, encode_products
+from demand_grid import DemandGrid, build_grid, disagreement_report, grid_axes, DEFAULT_GRID_SPEC
+from sales_features import build_features
+from inventory_simulation import run_simulation
+from reduced_precision import NumpySVC, load_svm_artifacts, svm_precision_report
+
+def sample_products():
+    """Products covering every type in the training data"""
+    return [
+        {'product_type': product_type, 'previous_sales': sales, 'delivery_time': delivery, 'price': price}
+        for product_type, sales, delivery, price, _ in training_data
+    ]
+
+def test_batch_matches_single_predictions():
+    """Test that batch prediction returns the same results as per-product predict"""
+    print("📦 Testing batch demand prediction...")
+    
+    products = sample_products() + [{'product_type': 'Unknown'}]
+    output = io.StringIO()
+    results = predict_batch(products, output=output)
+    
+    assert len(output.getvalue().splitlines()) == len(products)
+    for product, result in zip(products, results):
+        single = predict(product)
+        assert result['success'] == single['success']
+        assert result['prediction'] == single['prediction']
+        assert abs(result['confidence'] - single['confidence']) < 1e-9
+        if result['success']:
+            assert result['explanation'] == single['explanation']
+            assert abs(sum(result['probabilities'].values()) - 1) < 1e-9
+    
+    print(f"   {len(products)} products scored in one pass ✅")
+
+def grid_features(product_classes):
+    """Dense grid over the input space, including out-of-range values"""
+    grid = np.array(np.meshgrid(
+        np.arange(len(product_classes)),
+        np.linspace(0, 150, 16),
+        np.arange(1, 7),
+        np.linspace(100, 1200, 23)
+    )).reshape(4, -1).T
+    return grid[:, [1, 2, 3, 0]]
+
+def test_numpy_engine_parity():
+    """Test that the NumPy forward pass reproduces sklearn's predict_proba"""
+    print("\n🧮 Testing NumPy engine parity...")
+    
+    bpnn_model, scaler, product_encoder, demand_encoder = load_artifacts()
+    predictor = NumpyDemandPredictor()
+    
+    features, _, _ = encode_products(sample_products(), product_encoder.classes_)
+    features = np.vstack([features, grid_features(product_encoder.classes_)])
+    
+    labels, expected, class_names = predict_proba_matrix(features, bpnn_model, scaler, demand_encoder)
+    actual = predictor.predict_proba(features)
+    
+    assert list(predictor.class_names) == list(class_names)
+    assert np.allclose(actual, expected, rtol=0, atol=1e-12)
+    assert (predictor.predict(features) == labels).all()
+    
+    numpy_results = predict_batch(sample_products(), engine='numpy')
+    sklearn_results = predict_batch(sample_products())
+    assert [r['prediction'] for r in numpy_results] == [r['prediction'] for r in sklearn_results]
+    
+    print(f"   {len(features)} inputs, max probability difference {np.abs(actual - expected).max():.2e} ✅")
+
+def test_reduced_precision_drift():
+    """Test that float32 and int8 inference stay close to the float64 models"""
+    print("\n🪶 Testing reduced-precision inference...")
+    
+    reference = NumpyDemandPredictor()
+    features = grid_features(reference.product_classes)
+    expected = reference.predict_proba(features)
+    
+    float32 = NumpyDemandPredictor(precision='float32')
+    int8 = NumpyDemandPredictor(precision='int8')
+    assert float32.weight_bytes() * 2 == reference.weight_bytes()
+    assert int8.weight_bytes() * 4 < reference.weight_bytes() * 1.2
+    assert np.abs(float32.predict_proba(features) - expected).max() < 1e-5
+    assert (float32.predict(features) == reference.predict(features)).all()
+    assert np.abs(int8.predict_proba(features) - expected).max() < 0.05
+    assert (int8.predict(features) == reference.predict(features)).mean() > 0.99
+    
+    quantized = predict_batch(sample_products(), engine='numpy', precision='int8')
+    assert all(abs(sum(r['probabilities'].values()) - 1) < 1e-5 for r in quantized)
+    
+    svm_model, _, _ = load_svm_artifacts()
+    X = np.random.RandomState(0).normal(size=(500, svm_model.support_vectors_.shape[1]))
+    assert np.allclose(NumpySVC(svm_model).predict_proba(X), svm_model.predict_proba(X), rtol=0, atol=1e-12)
+    assert (NumpySVC(svm_model, np.float32).predict(X) == svm_model.predict(X)).all()
+    
+    report = svm_precision_report()
+    assert report['float32']['max_probability_drift'] < 1e-5
+    assert report['float32']['accuracy'] == report['float32']['reference_accuracy']
+    
+    print(f"   int8 weights {int8.weight_bytes()} bytes vs {reference.weight_bytes()} float64 ✅")
+
+def monthly_sales_records(count, seed=0):
+    """Noisy copies of the training rows, as a month of observed sales"""
+    rng = np.random.RandomState(seed)
+    records = []
+    for _ in range(count):
+        product_type, sales, delivery, price, demand = training_data[rng.randint(len(training_data))]
+        records.append({
+            'product_type': product_type,
+            'previous_sales': int(max(0, sales + rng.randint(-3, 4))),
+            'delivery_time': delivery,
+            'price': int(price + rng.randint(-10, 11)),
+            'demand': demand
+        })
+    return records
+
+def test_warm_start_retraining():
+    """Test that retraining continues from the saved network and refreshes the bundle"""
+    print("\n🔁 Testing warm-start retraining...")
+    
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as model_dir:
+        for name in ['bpnn_model.pkl', 'bpnn_scaler.pkl', 'bpnn_product_encoder.pkl',
+                     'bpnn_demand_encoder.pkl', 'bpnn_bundle.npz']:
+            shutil.copy(os.path.join(source_dir, name), model_dir)
+        
+        sales_path = os.path.join(model_dir, 'sales-2026-09.jsonl')
+        with open(sales_path, 'w') as f:
+            for record in monthly_sales_records(300):
+                f.write(json.dumps(record) + '\n')
+            f.write('not json\n')
+            f.write(json.dumps({'product_type': 'Stroller', 'previous_sales': 5, 'delivery_time': 2,
+                                'price': 900, 'demand': 'Low'}) + '\n')
+            f.write(json.dumps({'product_type': 'Diaper', 'previous_sales': 5, 'demand': 'Low'}) + '\n')
+        
+        before = load_artifacts(model_dir)[0]
+        result = retrain_model([sales_path], model_dir=model_dir, max_epochs=30, patience=5)
+        assert result['success'], result
+        assert result['records'] == 300 and result['skipped'] == 3
+        assert not [name for name in os.listdir(model_dir) if name.endswith('.tmp')]
+        assert result['accuracy'] >= result['initial_accuracy']
+        assert result['epochs'] <= 30
+        
+        after, scaler, product_encoder, demand_encoder = load_artifacts(model_dir)
+        assert [c.shape for c in after.coefs_] == [c.shape for c in before.coefs_]
+        if result['best_epoch']:
+            assert not np.array_equal(after.coefs_[0], before.coefs_[0])
+        
+        # The exported bundle follows the retrained network
+        features = grid_features(product_encoder.classes_)
+        _, expected, _ = predict_proba_matrix(features, after, scaler, demand_encoder)
+        predictor = NumpyDemandPredictor(os.path.join(model_dir, 'bpnn_bundle.npz'))
+        assert np.allclose(predictor.predict_proba(features), expected, rtol=0, atol=1e-12)
+        
+        missing = retrain_model([os.path.join(model_dir, 'missing.jsonl')], model_dir=model_dir)
+        assert not missing['success']
+    
+    print(f"   {result['epochs']} epochs, holdout accuracy "
+          f"{result['initial_accuracy']:.2f} -> {result['accuracy']:.2f} ✅")
+
+def test_demand_lookup_grid():
+    """Test grid lookups against the network on and off the grid points"""
+    print("\n🗂️  Testing precomputed demand grid...")
+    
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as model_dir:
+        bundle_path = os.path.join(model_dir, 'bpnn_bundle.npz')
+        shutil.copy(os.path.join(source_dir, 'bpnn_bundle.npz'), bundle_path)
+        try:
+            predict_batch(sample_products(), model_dir=model_dir, engine='grid')
+            assert False, 'grid engine should not build the grid in-request'
+        except FileNotFoundError:
+            pass
+        assert not os.path.exists(os.path.join(model_dir, 'bpnn_grid.npz'))
+        
+        # Invalid or oversized specs are rejected before anything is allocated or written
+        for spec in [{'price': [100, 1200, 0]}, {'price': [100, 1200, -5]}, {'price': [1200, 100, 10]},
+                     {'price': [0, 1e300, 1e-300]}, {'price': [0, 1e6, 0.5]}, {'price': 'cheap'}, {'colour': [0, 1, 1]}]:
+            try:
+                build_grid(bundle_path, os.path.join(model_dir, 'bpnn_grid.npz'), spec)
+                assert False, f'{spec} should be rejected'
+            except ValueError:
+                pass
+        assert not os.path.exists(os.path.join(model_dir, 'bpnn_grid.npz'))
+        grid_path = build_grid(bundle_path, os.path.join(model_dir, 'bpnn_grid.npz'))
+        
+        grid = DemandGrid(grid_path, bundle_path)
+        network = NumpyDemandPredictor(bundle_path)
+        
+        # Exact at grid points
+        sales, delivery, price = grid_axes(DEFAULT_GRID_SPEC)
+        points = np.array([[s, d, p, t] for t in range(len(grid.product_classes))
+                           for s in sales[::7] for d in delivery for p in price[::20]], dtype=float)
+        assert np.allclose(grid.predict_proba(points), network.predict_proba(points), rtol=0, atol=1e-12)
+        
+        # Out-of-grid inputs fall back to the network
+        outside = np.array([[500, 2, 300, 0], [40, 12, 300, 1], [40, 2, 5000, 2]], dtype=float)
+        probabilities, hits = grid.predict_proba(outside, return_hits=True)
+        assert not hits.any()
+        assert np.allclose(probabilities, network.predict_proba(outside), rtol=0, atol=1e-12)
+        
+        report = disagreement_report(grid_path, bundle_path, samples=5000)
+        assert report['label_disagreement'] < 0.05
+        assert 0 < report['mean_probability_difference'] < 0.05
+        
+        products = sample_products() + [{'product_type': 'Unknown'}]
+        looked_up = predict_batch(products, model_dir=model_dir, engine='grid')
+        computed = predict_batch(products, model_dir=model_dir, engine='numpy')
+        assert [r['success'] for r in looked_up] == [r['success'] for r in computed]
+        agreement = np.mean([a['prediction'] == b['prediction'] for a, b in zip(looked_up, computed)])
+        assert agreement > 0.9
+    
+    result = subprocess.run([sys.executable, 'demand_bpnn.py', 'build_grid', '{"price": [100, 1200, 0]}'],
+                            cwd=source_dir, capture_output=True, text=True, timeout=60)
+    error = json.loads(result.stdout)
+    assert error['success'] is False and 'step > 0' in error['error']
+    
+    print(f"   label disagreement {report['label_disagreement']:.4f}, "
+          f"max probability difference {report['max_probability_difference']:.3f} ✅")
+
+def test_sales_feature_builder():
+    """Test monthly sales features from an exported orders stream"""
+    print("\n🧾 Testing sales feature builder...")
+    
+    def order(created_at, items, status='delivered'):
+        return json.dumps({'status': status, 'createdAt': created_at, 'items': items})
+    
+    diaper = {'$oid': '64b000000000000000000001'}
+    toy = {'$oid': '64b000000000000000000002'}
+    lines = [
+        order({'$date': '2026-06-03T10:00:00.000Z'}, [{'product': diaper, 'quantity': 10, 'price': 200, 'name': 'Diapers'},
+                                                      {'product': toy, 'quantity': 0, 'price': 600}]),
+        order({'$date': {'$numberLong': '1752000000000'}},  # 2025-07-08, outside the retained window
+              [{'product': diaper, 'quantity': 99, 'price': 1}]),
+        order('2026-07-15T09:30:00Z', [{'product': diaper, 'quantity': 20, 'price': 250},
+                                       {'product': diaper, 'quantity': 5, 'price': 250},
+                                       {'product': toy, 'quantity': 2, 'price': 600, 'name': 'Blocks'}]),
+        order('2026-07-20T09:30:00Z', [{'product': toy, 'quantity': 1, 'price': 500}], status='cancelled'),
+        order({'$date': '2026-09-01T00:00:00Z'}, [{'product': toy, 'quantity': 3, 'price': 700},
+                                                  {'product': toy, 'quantity': 'lots', 'price': 700}]),
+        'not json',
+    ]
+    builder = build_features(lines, window=2, retain_months=6,
+                             product_types={'64b000000000000000000001': 'Diaper', '64b000000000000000000002': 'Toy'})
+    rows = list(builder.rows())
+    by_key = {(row['product_id'][-1], row['month']): row for row in rows}
+    assert all(row['price'] is not None for row in rows)
+    assert ('2', '2026-06') not in by_key and by_key[('2', '2026-07')]['price'] == 600
+    
+    july = by_key[('1', '2026-07')]
+    assert july['sales'] == 25 and july['previous_sales'] == 10
+    assert july['avg_price'] == 250 and july['order_count'] == 1
+    assert by_key[('1', '2026-06')]['previous_sales'] == 0
+    september = by_key[('1', '2026-09')]
+    assert september['sales'] == 0 and september['rolling_sales'] == 12.5 and september['price'] == 250
+    toy_september = by_key[('2', '2026-09')]
+    assert toy_september['previous_sales'] == 0 and toy_september['sales'] == 3 and toy_september['avg_price'] == 700
+    assert builder.summary() == {'orders': 3, 'skipped_orders': 2, 'skipped_items': 2,
+                                 'products': 2, 'latest_month': '2026-09'}
+    
+    # The first retained months see their lag history, even though it is not emitted
+    steady = [order(f'{year}-{month:02d}-10T00:00:00Z', [{'product': diaper, 'quantity': 100, 'price': 200}])
+              for year in (2024, 2025) for month in range(1, 13)]
+    steady.append(order('2024-11-05T00:00:00Z', [{'product': toy, 'quantity': 4, 'price': 500}]))
+    history = build_features(steady, window=3, retain_months=12)
+    steady_rows = {(row['product_id'][-1], row['month']): row for row in history.rows()}
+    assert min(month for _, month in steady_rows) == '2025-01'
+    for month in ['2025-01', '2025-02', '2025-03', '2025-12']:
+        assert steady_rows[('1', month)]['previous_sales'] == 100
+        assert steady_rows[('1', month)]['rolling_sales'] == 100
+    toy_january = steady_rows[('2', '2025-01')]
+    assert toy_january['sales'] == 0 and toy_january['price'] == 500 and toy_january['rolling_sales'] == 4 / 3
+    
+    latest = list(builder.rows(latest_only=True))
+    assert [row['month'] for row in latest] == ['2026-09', '2026-09']
+    assert latest == [by_key[('1', '2026-09')], toy_september]
+    
+    # Rows feed straight into the batch predictor
+    results = predict_batch(latest, engine='numpy')
+    assert all(result['success'] for result in results)
+    assert results[0]['factors']['previous_sales'] == 0
+    
+    print(f"   {len(rows)} product-month rows from {builder.orders} orders ✅")
+
+def test_inventory_reorder_simulation():
+    """Test Monte Carlo stock trajectories and suggested reorder points"""
+    print("\n📦 Testing inventory reorder simulation...")
+    
+    demand = {'product_type': 'Diaper', 'previous_sales': 90, 'delivery_time': 4, 'price': 200}
+    items = [
+        dict(demand, product='well-stocked', warehouse='w1', quantity=10000, reorderPoint=0),
+        dict(demand, product='empty', warehouse='w1', quantity=0, reorderPoint=0),
+        dict(demand, product='expiring', warehouse='w2', quantity=10000, reorderPoint=0,
+             expiryDate={'$date': '2026-10-21T00:00:00Z'}),
+        dict(demand, product='low-reorder-point', warehouse='w2', quantity=40, reorderPoint=1),
+        {'product': 'unknown', 'product_type': 'Stroller', 'quantity': 5},
+    ]
+    results = run_simulation(items, trials=400, horizon=30, start_date=date(2026, 10, 19))
+    well_stocked, empty, expiring, low, unknown = results
+    
+    assert well_stocked['stockout_probability'] == 0 and well_stocked['expected_orders'] == 0
+    assert empty['stockout_probability'] == 1
+    assert expiring['expected_expired_units'] > 9000 and expiring['stockout_probability'] == 1
+    assert low['stockout_probability'] > 0.5
+    
+    # Reorder points cover lead-time demand and cut stockouts
+    lead_time_demand = low['expected_daily_demand'] * low['lead_time_days']
+    assert low['suggested_reorder_point'] >= lead_time_demand
+    assert low['suggested_stockout_probability'] < low['stockout_probability']
+    assert not unknown['success'] and 'Stroller' in unknown['error']
+    
+    # Same seed, same trajectories
+    assert run_simulation(items, trials=400, start_date=date(2026, 10, 19)) == results
+    
+    print(f"   stockout probability {low['stockout_probability']:.2f} -> "
+          f"{low['suggested_stockout_probability']:.2f} at reorder point {low['suggested_reorder_point']:.0f} ✅")
+
+def test_parallel_hyperparameter_search():
+    """Test k-fold search over a small grid saves the best model and its table"""
+    print("\n🔍 Testing parallel hyperparameter search...")
+    
+    with tempfile.TemporaryDirectory() as model_dir:
+        result = search_hyperparameters(
+            param_grid={'hidden_layer_sizes': [(16,), (32, 16)], 'alpha': [0.001, 0.1]},
+            folds=3, workers=2, model_dir=model_dir
+        )
+        assert result['success'], result
+        assert result['candidates'] == 4 and result['folds'] == 3
+        
+        table = result['results']
+        assert table[0] == result['best']
+        assert [row['mean_accuracy'] for row in table] == sorted((row['mean_accuracy'] for row in table), reverse=True)
+        assert all(0 <= row['mean_accuracy'] <= 1 and row['fit_seconds'] > 0 for row in table)
+        with open(os.path.join(model_dir, 'bpnn_search_results.json')) as f:
+            assert json.load(f) == table
+        assert not [name for name in os.listdir(model_dir) if name.endswith('.tmp')]
+        
+        bpnn_model, scaler, product_encoder, demand_encoder = load_artifacts(model_dir)
+        assert bpnn_model.hidden_layer_sizes == tuple(result['best']['hidden_layer_sizes'])
+        assert bpnn_model.alpha == result['best']['alpha']
+        
+        features = grid_features(product_encoder.classes_)
+        _, expected, _ = predict_proba_matrix(features, bpnn_model, scaler, demand_encoder)
+        predictor = NumpyDemandPredictor(os.path.join(model_dir, 'bpnn_bundle.npz'))
+        assert np.allclose(predictor.predict_proba(features), expected, rtol=0, atol=1e-12)
+        
+        sampled = search_hyperparameters(param_grid={'hidden_layer_sizes': [(16,), (32, 16)]}, folds=3,
+                                         n_iter=2, workers=1, model_dir=model_dir)
+        assert sampled['candidates'] == 2
+    
+    # CLI options must be a JSON object with known keys
+    assert parse_search_options(None) == {}
+    assert parse_search_options('{"folds": 3, "n_iter": 2}') == {'folds': 3, 'n_iter': 2}
+    for text in ['[1, 2]', '"folds"', '{"fold": 3}', '{"model_dir": "/tmp"}']:
+        try:
+            parse_search_options(text)
+            assert False, f'{text} should be rejected'
+        except ValueError:
+            pass
+    
+    print(f"   {result['message']} ✅")
+
+def test_price_delivery_sweep():
+    """Test that a what-if sweep matches per-point predictions"""
+    print("\n📈 Testing price x delivery-time sweep...")
+    
+    base = {'product_type': 'Feeding', 'previous_sales': 35, 'delivery_time': 2, 'price': 400}
+    result = sweep_demand(dict(base, price_range={'start': 200, 'stop': 1000, 'step': 100},
+                               delivery_time_range=[1, 3, 5]))
+    assert result['success'], result
+    assert result['prices'] == [200.0 + 100 * i for i in range(9)]
+    assert result['delivery_times'] == [1.0, 3.0, 5.0]
+    assert len(result['classes']) == 3 and all(len(row) == 9 for row in result['classes'])
+    
+    for i, delivery_time in enumerate(result['delivery_times']):
+        for j, price in enumerate(result['prices']):
+            single = predict(dict(base, delivery_time=delivery_time, price=price))
+            assert result['classes'][i][j] == single['prediction']
+            assert abs(result['probabilities'][single['prediction']][i][j] - single['confidence']) < 1e-4
+    
+    # Omitted ranges fall back to the base product's value
+    single_axis = sweep_demand(dict(base, price_range=[250, 750]))
+    assert single_axis['delivery_times'] == [2.0] and len(single_axis['classes'][0]) == 2
+    
+    assert not sweep_demand(dict(base, product_type='Stroller'))['success']
+    assert not sweep_demand(dict(base, price_range={'start': 1000, 'stop': 200}))['success']
+    assert not sweep_demand(dict(base, price_range={'start': 0, 'stop': 1e6, 'step': 1}))['success']
+    # Oversized sweeps are rejected before any axis is allocated
+    huge = sweep_demand(dict(base, price_range={'start': 0, 'stop': 1e300, 'step': 1e-300},
+                             delivery_time_range=list(range(1000))))
+    assert not huge['success'] and 'exceeds' in huge['error']
+    long_lists = sweep_demand(dict(base, price_range=list(range(1000)), delivery_time_range=list(range(101))))
+    assert not long_lists['success'] and 'exceeds' in long_lists['error']
+    
+    print(f"   {len(result['prices']) * len(result['delivery_times'])} grid points in one call ✅")
+
+def test_per_type_models():
+    """Test per-type training and routing with fallback to the global model"""
+    print("\n🧭 Testing per-product-type models...")
+    
+    rows = [row for row in training_data if row[0] in ('Diaper', 'Toy')] + [
+        ['Bath', 50, 2, 200, 'High'], ['Bath', 45, 1, 220, 'High'],
+        ['Bath', 12, 4, 260, 'Low'], ['Bath', 10, 5, 250, 'Low'],
+        ['Feeding', 60, 1, 400, 'High'], ['Feeding', 45, 2, 450, 'High'],
+    ]
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as model_dir:
+        shutil.copy(os.path.join(source_dir, 'bpnn_bundle.npz'), model_dir)
+        result = train_type_models(rows, model_dir=model_dir, workers=2)
+        assert result['success'], result
+        by_type = {model['product_type']: model for model in result['models']}
+        assert result['trained'] == 3 and 'error' in by_type['Feeding']
+        assert by_type['Bath']['classes'] == ['High', 'Low']
+        assert by_type['Bath']['cv_folds'] == 2 and 0 <= by_type['Bath']['cv_accuracy'] <= 1
+        
+        types_dir = os.path.join(model_dir, 'bpnn_types')
+        assert sorted(os.listdir(types_dir)) == ['manifest.json', 'type_Bath.npz', 'type_Diaper.npz', 'type_Toy.npz']
+        
+        router = DemandModelRouter(model_dir)
+        assert sorted(router.models) == ['Bath', 'Diaper', 'Toy']
+        
+        products = sample_products() + [{'product_type': 'Unknown'}]
+        features, _, errors = encode_products(products, router.product_classes)
+        valid = np.array([error is None for error in errors])
+        features = features[valid]
+        routed = router.predict_proba(features)
+        assert np.allclose(routed.sum(axis=1), 1)
+        
+        global_model = NumpyDemandPredictor(os.path.join(model_dir, 'bpnn_bundle.npz'))
+        for row, product in zip(range(len(features)), [p for p, ok in zip(products, valid) if ok]):
+            product_type = product['product_type']
+            if product_type in router.models:
+                model, columns = router.models[product_type]
+                expected = np.zeros(len(router.class_names))
+                expected[columns] = model.predict_proba(features[row:row + 1])[0]
+            else:
+                expected = global_model.predict_proba(features[row:row + 1])[0]
+            assert np.allclose(routed[row], expected, rtol=0, atol=1e-12)
+        
+        # Two-class type models never predict the class they have not seen
+        bath = features[:, 3] == list(router.product_classes).index('Bath')
+        assert (routed[bath][:, list(router.class_names).index('Medium')] == 0).all()
+        
+        results = predict_batch(products, model_dir=model_dir, engine='per_type')
+        assert [r['success'] for r in results] == list(valid)
+        assert [r['prediction'] for r in results if r['success']] == list(router.predict(features))
+        
+        # Types that drop out of a retrain leave no bundle behind
+        retrained = train_type_models([row for row in rows if row[0] != 'Bath'], model_dir=model_dir, workers=1)
+        assert retrained['trained'] == 2
+        assert sorted(os.listdir(types_dir)) == ['manifest.json', 'type_Diaper.npz', 'type_Toy.npz']
+        assert sorted(DemandModelRouter(model_dir).models) == ['Diaper', 'Toy']
+    
+    assert type_model_filename('../Baby Care') == 'type_Baby_Care.npz'
+    assert type_model_filename('Baby/Care', {'type_Baby_Care.npz'}) == 'type_Baby_Care_2.npz'
+    
+    print(f"   {result['trained']} type models in {result['seconds']}s ✅")
+
+if __name__ == "__main__":
+    try:
+        test_batch_matches_single_predictions()
+        test_numpy_engine_parity()
+        test_reduced_precision_drift()
+        test_warm_start_retraining()
+        test_demand_lookup_grid()
+        test_sales_feature_builder()
+        test_inventory_reorder_simulation()
+        test_parallel_hyperparameter_search()
+        test_price_delivery_sweep()
+        test_per_type_models()
+        print("\n✅ All demand model tests completed successfully!")
+    except Exception as e:
+        print(f"❌ Error during testing: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
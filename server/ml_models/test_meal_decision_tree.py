@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test script for the Meal Decision Tree and its compiled rules
+"""
+
+import sys
+import os
+import json
+import tempfile
+import importlib.util
+import subprocess
+import numpy as np
+import joblib
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from meal_decision_tree import MealDecisionTree
+from shared_model_files import file_sha256
+from meal_recommender import (
+    answer_key, load_answer_table, compiled_rules_current, recommend_meal, recommend_rows, plan_meals
+)
+import meal_tree_rules
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(MODEL_DIR, 'meal_decision_tree_model.pkl')
+
+def all_inputs():
+    """Every valid (age, dietary_preference, has_allergy) combination, plus fractional ages"""
+    return [(age, diet, allergy) for age in [1, 1.5, 2, 2.5, 2.6, 3, 4, 5, 5.9, 6]
+            for diet in [0, 1] for allergy in [0, 1]]
+
+def load_module(path):
+    spec = importlib.util.spec_from_file_location('compiled_meal_rules', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_compiled_rules_parity():
+    """Test that the committed compiled rules reproduce the pickled tree"""
+    print("🌳 Testing compiled meal rules parity...")
+
+    meal_tree = MealDecisionTree()
+    assert meal_tree.load_model(MODEL_PATH)
+    assert compiled_rules_current(MODEL_PATH)
+
+    inputs = all_inputs()
+    expected = meal_tree.model.predict_proba(np.array(inputs, dtype=float))
+    actual = np.array([meal_tree_rules.predict_proba(*features) for features in inputs])
+    assert list(meal_tree_rules.CLASSES) == list(meal_tree.model.classes_)
+    assert np.array_equal(actual, expected)
+
+    for features in inputs:
+        assert recommend_meal(*features) == meal_tree.predict_meal(*features)
+
+    assert meal_tree_rules.FEATURE_IMPORTANCES == dict(zip(meal_tree.feature_names, meal_tree.model.feature_importances_))
+    print(f"   {len(inputs)} inputs match predict_proba exactly ✅")
+
+def test_compile_on_save():
+    """Test that saving a retrained tree regenerates matching rules"""
+    print("\n⚙️  Testing rule compilation on save...")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        meal_tree = MealDecisionTree()
+        meal_tree.model.set_params(max_depth=3, min_samples_leaf=1, min_samples_split=2)
+        df = meal_tree.create_sample_data()
+        meal_tree.model.fit(df[meal_tree.feature_names].values, df['meal_recommendation'])
+        model_path = os.path.join(model_dir, 'meal_decision_tree_model.pkl')
+        meal_tree.save_model(model_path)
+
+        rules = load_module(os.path.join(model_dir, 'meal_tree_rules.py'))
+        inputs = all_inputs()
+        expected = meal_tree.model.predict_proba(np.array(inputs, dtype=float))
+        assert np.array_equal(np.array([rules.predict_proba(*features) for features in inputs]), expected)
+        assert [rules.predict(*features) for features in inputs] == list(meal_tree.model.predict(np.array(inputs)))
+        assert rules.SOURCE_MODEL_SHA256 != meal_tree_rules.SOURCE_MODEL_SHA256
+
+        # The committed rules do not describe this pickle
+        assert not compiled_rules_current(model_path)
+        
+        answers = load_answer_table(os.path.join(model_dir, 'meal_answers.json'), model_path)
+        assert len(answers) == 24
+        for (age, diet, allergy) in all_inputs():
+            if age == int(age):
+                expected = json.loads(json.dumps(meal_tree.predict_meal(int(age), diet, allergy)))
+                assert answers[answer_key(int(age), diet, allergy)] == expected
+        
+        # A corrupt or truncated table reads as missing
+        answers_path = os.path.join(model_dir, 'meal_answers.json')
+        with open(answers_path, 'r') as f:
+            text = f.read()
+        for broken in [text[:len(text) // 2], '[]', json.dumps({'source_model_sha256': file_sha256(model_path)})]:
+            with open(answers_path, 'w') as f:
+                f.write(broken)
+            assert load_answer_table(answers_path, model_path) is None
+        with open(answers_path, 'w') as f:
+            f.write(text)
+        
+        # Retraining makes the old table stale
+        meal_tree.model.set_params(max_depth=1).fit(df[meal_tree.feature_names].values, df['meal_recommendation'])
+        joblib.dump(meal_tree.model, model_path)
+        assert load_answer_table(os.path.join(model_dir, 'meal_answers.json'), model_path) is None
+
+    print("   regenerated rules match the retrained tree ✅")
+
+def test_precomputed_answer_table():
+    """Test that the committed answer table covers the whole input domain"""
+    print("\n📋 Testing precomputed meal answers...")
+    
+    answers = load_answer_table(os.path.join(MODEL_DIR, 'meal_answers.json'), MODEL_PATH)
+    assert answers is not None, "meal_answers.json is missing or stale; run meal_tree_compiler.py"
+    
+    meal_tree = MealDecisionTree()
+    meal_tree.load_model(MODEL_PATH)
+    for age in range(1, 7):
+        for diet in [0, 1]:
+            for allergy in [0, 1]:
+                expected = json.loads(json.dumps(meal_tree.predict_meal(age, diet, allergy)))
+                assert answers[answer_key(age, diet, allergy)] == expected
+    
+    assert answer_key(2.5, 0, 1) is None and answer_key(True, 0, 1) is None
+    print(f"   {len(answers)} answers match predict_meal ✅")
+
+def test_api_uses_compiled_rules():
+    """Test that the CLI answers without importing sklearn"""
+    print("\n⚡ Testing meal API fast path...")
+
+    code = ("import sys, runpy; sys.argv = ['meal_decision_tree_api.py', '4', '1', '0']; "
+            "runpy.run_path('meal_decision_tree_api.py', run_name='__main__'); "
+            "print(json.dumps('sklearn' in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', 'import json; ' + code], cwd=MODEL_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    *result_lines, sklearn_loaded = output.strip().splitlines()
+    result = json.loads('\n'.join(result_lines))
+
+    assert json.loads(sklearn_loaded) is False
+    meal_tree = MealDecisionTree()
+    meal_tree.load_model(MODEL_PATH)
+    assert result == json.loads(json.dumps(meal_tree.predict_meal(4, 1, 0)))
+    
+    invalid = subprocess.run([sys.executable, 'meal_decision_tree_api.py', '9', '0', '0'], cwd=MODEL_DIR,
+                             capture_output=True, text=True)
+    assert invalid.returncode == 1 and 'Age must be between 1 and 6' in json.loads(invalid.stdout)['error']
+    print(f"   {result['meal_category']} without sklearn ✅")
+
+def test_batch_meal_plan():
+    """Test that the batch plan matches single predictions and counts every meal"""
+    print("\n🍽️  Testing batch meal planning...")
+    
+    meal_tree = MealDecisionTree()
+    meal_tree.load_model(MODEL_PATH)
+    inputs = all_inputs()
+    vectorized = meal_tree.predict_meals(inputs)
+    assert vectorized == [meal_tree.predict_meal(*features) for features in inputs]
+    
+    answers = load_answer_table(os.path.join(MODEL_DIR, 'meal_answers.json'), MODEL_PATH)
+    assert recommend_rows(inputs, answers) == json.loads(json.dumps(vectorized))
+    
+    children = [{'child_id': i, 'age': age, 'dietary_preference': diet, 'has_allergy': allergy, 'classroom': f'room{i % 3}'}
+                for i, (age, diet, allergy) in enumerate(inputs)]
+    children += [
+        {'age': 4, 'dietary_preference': 'Non-Veg', 'allergies': ['peanut']},
+        {'age': 4.0, 'dietary_preference': 'vegetarian', 'hasAllergy': False},
+        {'age': 0, 'dietary_preference': 0, 'has_allergy': 0},
+        {'age': True, 'dietary_preference': 0, 'has_allergy': 0},
+        {'age': 3, 'dietary_preference': 'vegan', 'has_allergy': 0}
+    ]
+    calls = []
+    plan = plan_meals(children, lambda rows: calls.append(rows) or meal_tree.predict_meals(rows))
+    
+    assert len(calls) == 1 and plan['planned'] == len(inputs) + 2 and plan['failed'] == 3
+    assert plan['recommendations'][-3:] == [
+        {'index': len(children) - 3, 'error': 'Invalid input: Age must be between 1 and 6'},
+        {'index': len(children) - 2, 'error': 'Invalid input: Age must be between 1 and 6'},
+        {'index': len(children) - 1, 'error': 'Invalid input: Dietary preference must be 0 (Vegetarian) or 1 (Non-Vegetarian)'}
+    ]
+    extra = plan['recommendations'][len(inputs):len(inputs) + 2]
+    assert extra[0]['prediction'] == meal_tree.predict_meal(4, 1, 1)['prediction']
+    assert extra[1]['input_features'] == {'age': 4, 'dietary_preference': 'Vegetarian', 'has_allergy': 'No'}
+    
+    counts = {category: totals['count'] for category, totals in plan['kitchen_totals'].items()}
+    assert set(counts) == set(meal_tree.meal_categories)
+    assert sum(counts.values()) == plan['planned']
+    assert sum(sum(room.values()) for room in plan['classroom_totals'].values()) == len(inputs)
+    
+    payload = json.dumps({'date': '2026-10-19', 'children': children})
+    output = subprocess.run([sys.executable, 'meal_decision_tree_api.py', '--batch'], cwd=MODEL_DIR, input=payload,
+                            capture_output=True, text=True, check=True).stdout
+    assert json.loads(output) == json.loads(json.dumps({**plan, 'date': '2026-10-19'}))
+    print(f"   {plan['planned']} children planned, {plan['failed']} rejected ✅")
+
+if __name__ == "__main__":
+    try:
+        test_compiled_rules_parity()
+        test_compile_on_save()
+        test_precomputed_answer_table()
+        test_api_uses_compiled_rules()
+        test_batch_meal_plan()
+        print("\n✅ All meal decision tree tests completed successfully!")
+    except Exception as e:
+        print(f"❌ Error during testing: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for catalog-wide purchase propensity scoring
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import contextlib
+import subprocess
+import numpy as np
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from product_purchase_svm import predict, score_catalog
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def sample_catalog():
+    return [
+        {'_id': {'$oid': 'p1'}, 'name': 'Building Blocks', 'category': 'Toys', 'price': 30, 'activeDiscount': 15},
+        {'_id': 'p2', 'name': 'Diapers XL', 'category': 'diaper', 'price': 45, 'discount': 0},
+        {'product_id': 'p3', 'name': 'Baby Lotion', 'category': 'Skincare', 'price': 60, 'discount': 20},
+        {'product_id': 'p4', 'name': 'T-Shirt', 'category': 'Apparel', 'price': 20},
+        {'product_id': 'p5', 'name': 'Rattle', 'category': 'Toy'},
+        {'product_id': 'p6', 'name': 'Wipes', 'category': 'Diaper', 'price': 12, 'discount': 5}
+    ]
+
+def test_catalog_matches_single_predictions():
+    """Test that the one-pass catalog scores match per-product predictions"""
+    print("🛒 Testing catalog propensity scoring...")
+
+    catalog = sample_catalog()
+    summary = score_catalog(catalog)
+
+    assert summary['customer_types'] == ['Parent', 'Staff', 'Teacher']
+    assert summary['scored'] == 4
+    assert summary['errors'] == [{'index': 3, 'error': 'Unknown category: Apparel'},
+                                 {'index': 4, 'error': 'Missing field: price'}]
+
+    for customer_type, entries in summary['rankings'].items():
+        probabilities = [entry['probability_yes'] for entry in entries]
+        assert probabilities == sorted(probabilities, reverse=True)
+        assert [entry['rank'] for entry in entries] == [1, 2, 3, 4]
+        for entry in entries:
+            with contextlib.redirect_stdout(io.StringIO()):
+                single = predict({'category': entry['category'], 'price': entry['price'],
+                                  'discount': entry['discount'], 'customer_type': customer_type})
+            assert np.isclose(max(entry['probability_yes'], 1 - entry['probability_yes']), single['confidence'])
+            assert entry['prediction'] == single['prediction']
+
+    top = summary['rankings']['Parent'][0]
+    assert top['product_id'] == 'p1' and top['discount'] == 15.0
+    print(f"   {summary['scored']} products x {len(summary['customer_types'])} customer types ✅")
+
+def test_catalog_ranked_files():
+    """Test the ranked JSON-lines output per customer type"""
+    print("\n📄 Testing ranked propensity files...")
+
+    catalog = [{'product_id': i, 'category': ['Toy', 'Diaper', 'Skincare'][i % 3],
+                'price': 10 + i % 60, 'discount': i % 25} for i in range(3000)]
+    with tempfile.TemporaryDirectory() as output_dir:
+        summary = score_catalog(catalog, customer_types=['parents', 'Teacher'], output_dir=output_dir)
+        assert sorted(os.listdir(output_dir)) == ['purchase_propensity_parent.jsonl',
+                                                  'purchase_propensity_teacher.jsonl']
+        with open(summary['files']['Parent'], 'r') as f:
+            lines = [json.loads(line) for line in f]
+        assert lines == summary['rankings']['Parent'] and len(lines) == len(catalog)
+
+        # Labels follow the SVM decision even where the probability disagrees
+        with contextlib.redirect_stdout(io.StringIO()):
+            for entry in lines[::50]:
+                single = predict({'category': entry['category'], 'price': entry['price'],
+                                  'discount': entry['discount'], 'customer_type': 'Parent'})
+                assert entry['prediction'] == single['prediction']
+
+        try:
+            score_catalog(catalog, customer_types=['Grandparent'])
+            assert False, "unknown customer types should be rejected"
+        except ValueError as e:
+            assert 'Grandparent' in str(e)
+
+    stdin = json.dumps(sample_catalog())
+    result = subprocess.run([sys.executable, 'product_purchase_api.py', 'score_catalog', '{"customer_types": ["Staff"]}'],
+                            cwd=MODEL_DIR, input=stdin, capture_output=True, text=True, check=True)
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [line['customer_type'] for line in lines] == ['Staff'] * 4
+    assert json.loads(result.stderr.strip().splitlines()[-1])['scored'] == 4
+    print(f"   {len(catalog)} products ranked per customer type ✅")
+
+def test_catalog_float32_precision():
+    """Test that float32 support vectors score the catalog like the sklearn model"""
+    print("\n🪶 Testing float32 catalog scoring...")
+
+    catalog = [{'product_id': i, 'category': ['Toy', 'Diaper', 'Skincare'][i % 3],
+                'price': 10 + i % 60, 'discount': i % 25} for i in range(600)]
+    reference = score_catalog(catalog)
+    reduced = score_catalog(catalog, precision='float32')
+    assert reference['precision'] == 'float64' and reduced['precision'] == 'float32'
+
+    for customer_type, entries in reference['rankings'].items():
+        by_id = {entry['product_id']: entry for entry in reduced['rankings'][customer_type]}
+        for entry in entries:
+            other = by_id[entry['product_id']]
+            assert other['prediction'] == entry['prediction']
+            assert abs(other['probability_yes'] - entry['probability_yes']) < 1e-4
+
+    try:
+        score_catalog(catalog, precision='float16')
+        assert False, "unknown precisions should be rejected"
+    except ValueError as e:
+        assert 'float16' in str(e)
+    print(f"   {len(catalog)} products agree between float64 and float32 ✅")
+
+if __name__ == "__main__":
+    try:
+        test_catalog_matches_single_predictions()
+        test_catalog_ranked_files()
+        test_catalog_float32_precision()
+        print("\n✅ All purchase propensity tests completed successfully!")
+    except Exception as e:
+        print(f"❌ Error during testing: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)